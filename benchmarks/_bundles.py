@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def make_payload(task_count: int, sessions_per_task: int = 2, week_id: str = "2026-W03") -> dict:
+    # ベンチマーク用に、日付行7件と任意件数のタスク・セッションを持つバンドルJSONを作る。
+    report_id = "wr_bench"
+    cycle_start = date(2026, 1, 17)
+    days = [
+        {
+            "id": f"{week_id}-{(cycle_start + timedelta(days=offset)).isoformat()}",
+            "week_report_id": report_id,
+            "date": (cycle_start + timedelta(days=offset)).isoformat(),
+        }
+        for offset in range(7)
+    ]
+    tasks = []
+    sessions = []
+    for index in range(task_count):
+        day = days[index % 7]
+        task_id = f"task_{index:06d}"
+        tasks.append(
+            {
+                "id": task_id,
+                "week_report_id": report_id,
+                "day_id": day["id"],
+                "title": f"タスク {index}",
+                "estimated_minutes": 30 + index % 90,
+                "priority": index % 3,
+                "status": "done" if index % 2 else "todo",
+                "reason_tags": ["focus"] if index % 5 == 0 else [],
+                "note": "bench",
+                "created_at": "2026-01-16T18:10:00",
+                "updated_at": "2026-01-16T18:10:00",
+            }
+        )
+        for slot in range(sessions_per_task):
+            hour = 6 + slot * 2
+            sessions.append(
+                {
+                    "id": f"session_{index:06d}_{slot}",
+                    "task_id": task_id,
+                    "start_at": f"{day['date']}T{hour:02d}:00:00",
+                    "end_at": f"{day['date']}T{hour + 1:02d}:00:00",
+                    "note": "bench",
+                    "is_completed": slot % 2 == 0,
+                }
+            )
+    return {
+        "week_report": {
+            "id": report_id,
+            "week_id": week_id,
+            "cycle_start": cycle_start.isoformat(),
+            "cycle_end": (cycle_start + timedelta(days=6)).isoformat(),
+            "review_at": "2026-01-16T18:00:00",
+            "status": "draft",
+            "goals_week": ["focus"],
+            "goals_month": ["month"],
+            "goals_long": ["long"],
+            "good_points": ["steady"],
+            "issues": [
+                {
+                    "problem": "late",
+                    "root_cause": "plan",
+                    "improvement": "plan early",
+                    "tags": ["p"],
+                }
+            ],
+            "created_at": "2026-01-16T18:05:00",
+            "updated_at": "2026-01-16T18:05:00",
+        },
+        "days": days,
+        "tasks": tasks,
+        "task_sessions": sessions,
+        "last_week_tasks": [],
+    }
+
+
+def best_of(func, repeat: int = 5) -> float:
+    import time
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
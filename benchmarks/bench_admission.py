@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+import httpx
+import uvicorn
+from _bundles import make_payload
+
+from weekly_reports.admission import AdmissionController
+from weekly_reports.api import create_app
+
+# 1人がPDF付きの確定を並行して送り続ける間に、別のユーザーの描画リクエストの待ち時間を測る。
+DURATION_SECONDS = 8.0
+ABUSIVE_THREADS = 6
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _run(admission: AdmissionController, output_dir: str) -> dict[str, float]:
+    port = _free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(
+            create_app(admission=admission), host="127.0.0.1", port=port, log_level="error"
+        )
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + DURATION_SECONDS
+    finalize = {"bundle": make_payload(300), "output_dir": output_dir}
+    render = {"bundle": make_payload(20), "report_format": "markdown"}
+    counts = {"ok": 0, "rejected": 0}
+    lock = threading.Lock()
+
+    def abuse() -> None:
+        with httpx.Client(base_url=base_url, timeout=120) as client:
+            while time.monotonic() < deadline:
+                status = client.post("/api/weeks/finalize", json=finalize).status_code
+                with lock:
+                    counts["ok" if status == 200 else "rejected"] += 1
+                if status == 429:
+                    # 行儀の悪いクライアントを想定し、Retry-After を守らずすぐに再送する。
+                    time.sleep(0.01)
+
+    threads = [threading.Thread(target=abuse) for _ in range(ABUSIVE_THREADS)]
+    for thread in threads:
+        thread.start()
+    latencies = []
+    with httpx.Client(base_url=base_url, timeout=120) as client:
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            client.post("/api/weeks/render", json=render).raise_for_status()
+            latencies.append(time.perf_counter() - started)
+            time.sleep(0.2)
+    for thread in threads:
+        thread.join()
+    server.should_exit = True
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "abuser_ok": counts["ok"],
+        "abuser_rejected": counts["rejected"],
+    }
+
+
+def main() -> None:
+    unlimited = AdmissionController(rate_per_minute=1e9, burst=10**9, pdf_concurrency=64)
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, admission in (("no limits", unlimited), ("default limits", None)):
+            result = _run(admission or AdmissionController(), tmp)
+            print(
+                f"{label:<15} student p50 {result['p50_ms']:>7.1f} ms  "
+                f"p95 {result['p95_ms']:>7.1f} ms  "
+                f"abuser ok {result['abuser_ok']:>4}  rejected {result['abuser_rejected']:>5}"
+            )
+
+
+if __name__ == "__main__":
+    main()
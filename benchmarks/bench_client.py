@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import socket
+import tempfile
+import threading
+import time
+
+import httpx
+import uvicorn
+from _bundles import make_payload
+
+from weekly_reports.api import create_app
+from weekly_reports.client import WeeklyReportsClient
+
+# 実際のソケット越しに、1件ずつ新しい接続で送る場合と、接続プール＋並行送信の場合を比べる。
+REQUESTS = 200
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(draft_dir: str) -> tuple[uvicorn.Server, str]:
+    port = _free_port()
+    config = uvicorn.Config(
+        create_app(draft_dir=draft_dir), host="127.0.0.1", port=port, log_level="warning"
+    )
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def _naive(base_url: str, payload: dict) -> float:
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        response = httpx.post(f"{base_url}/api/weeks/render", json=payload)
+        response.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def _pooled(base_url: str, bundle: dict, *, concurrency: int, compress: bool) -> float:
+    async with WeeklyReportsClient(
+        base_url, concurrency=concurrency, compress=compress
+    ) as client:
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(client.render(bundle, report_format="markdown") for _ in range(REQUESTS))
+        )
+        return time.perf_counter() - started
+
+
+def main() -> None:
+    bundle = make_payload(100)
+    payload = {"bundle": bundle, "report_format": "markdown"}
+    indented = json.dumps(payload, indent=2).encode()
+    compact = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+    print(
+        f"payload: indented {len(indented) / 1024:.0f} KiB, compact {len(compact) / 1024:.0f} KiB, "
+        f"gzip {len(gzip.compress(compact, 6)) / 1024:.0f} KiB; {REQUESTS} requests"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        server, base_url = _start_server(tmp)
+        try:
+            elapsed = _naive(base_url, payload)
+            print(f"{'naive (new connection each)':<32} {REQUESTS / elapsed:>8.1f} req/s")
+            for concurrency, compress in ((1, False), (8, False), (8, True)):
+                elapsed = asyncio.run(
+                    _pooled(base_url, bundle, concurrency=concurrency, compress=compress)
+                )
+                label = f"pooled c={concurrency}" + (" gzip" if compress else "")
+                print(f"{label:<32} {REQUESTS / elapsed:>8.1f} req/s")
+        finally:
+            server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from _bundles import make_payload
+
+from weekly_reports.cohort import CohortDashboard
+from weekly_reports.rollups import append_rollup, build_rollup
+from weekly_reports.schemas import parse_bundle_json
+from weekly_reports.snapshot import build_snapshot
+from weekly_reports.workflow import week_id_from_date
+
+# 生徒200人 × 52週のロールアップから1週ぶんの横断集計を作る時間（初回・キャッシュ命中）。
+
+
+def _seed(cohort_dir: Path, students: int, weeks: int) -> list[str]:
+    bundle = parse_bundle_json(json.dumps(make_payload(30)))
+    snapshot = build_snapshot(bundle, pdf_path="", json_path="")
+    week_ids = [week_id_from_date(date(2025, 1, 4) + timedelta(weeks=n)) for n in range(weeks)]
+    rollups = [build_rollup({**snapshot, "week_id": week_id}) for week_id in week_ids]
+    for index in range(students):
+        student_dir = cohort_dir / f"student_{index:04d}"
+        student_dir.mkdir(parents=True)
+        for rollup in rollups:
+            append_rollup(student_dir, rollup)
+    return week_ids
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        cohort_dir = Path(tmp)
+        week_ids = _seed(cohort_dir, 200, 52)
+        print(f"{'workers':>8} {'cold(ms)':>10} {'cached(ms)':>11}")
+        for workers in (1, 4, 8, 16):
+            dashboard = CohortDashboard(cohort_dir, max_workers=workers)
+            started = time.perf_counter()
+            dashboard.week(week_ids[-1])
+            cold = time.perf_counter() - started
+            started = time.perf_counter()
+            dashboard.week(week_ids[-1])
+            cached = time.perf_counter() - started
+            print(f"{workers:>8} {cold * 1000:>10.1f} {cached * 1000:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
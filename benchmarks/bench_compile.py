@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+
+from _bundles import make_payload
+
+from weekly_reports.rollups import append_rollup, build_rollup, write_compiled_json
+from weekly_reports.schemas import parse_bundle_json
+from weekly_reports.snapshot import build_snapshot
+from weekly_reports.workflow import week_id_from_date
+
+# 4週と200週のまとめで、ピークメモリがほぼ変わらないことを確認する。
+
+
+def _seed(output_dir: Path, weeks: int) -> list[str]:
+    bundle = parse_bundle_json(json.dumps(make_payload(50)))
+    snapshot = build_snapshot(bundle, pdf_path="", json_path="")
+    week_ids = []
+    start = date(2022, 1, 1)
+    for offset in range(weeks):
+        week_id = week_id_from_date(start + timedelta(weeks=offset))
+        week_ids.append(week_id)
+        append_rollup(output_dir, build_rollup({**snapshot, "week_id": week_id}))
+    return week_ids
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        output_dir = Path(tmp)
+        week_ids = _seed(output_dir, 200)
+        print(f"{'weeks':>6} {'elapsed(ms)':>12} {'peak(KiB)':>10}")
+        for span in (4, 13, 52, 200):
+            tracemalloc.start()
+            started = time.perf_counter()
+            write_compiled_json(output_dir, week_ids[0], week_ids[span - 1], output_dir / "c.json")
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{span:>6} {elapsed * 1000:>12.2f} {peak / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
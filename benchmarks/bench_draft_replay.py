@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from _bundles import make_payload
+
+from weekly_reports.drafts import DraftStore
+from weekly_reports.schemas import parse_bundle_json
+
+# ログ長ごとに、冷えた状態からの読み込み時間（スナップショット1回＋再生）を比べる。
+# compact_every を大きくした場合はログ全体の再生になる。
+
+
+def _fill(store: DraftStore, events: int) -> str:
+    bundle = parse_bundle_json(json.dumps(make_payload(100)))
+    draft_id = store.create(bundle)
+    for index in range(events):
+        task_id = f"task_{index % 100:06d}"
+        if index % 2:
+            store.append(
+                draft_id, "task_status_changed", {"task_id": task_id, "status": "done"}
+            )
+        else:
+            store.append(
+                draft_id,
+                "task_updated",
+                {"task_id": task_id, "fields": {"estimated_minutes": 30 + index % 60}},
+            )
+    return draft_id
+
+
+def _load_ms(root: Path, draft_id: str, repeat: int = 5) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        DraftStore(root).load(draft_id)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main() -> None:
+    print(f"{'events':>7} {'full replay(ms)':>16} {'compacted(ms)':>14}")
+    for events in (100, 1_000, 5_000):
+        with tempfile.TemporaryDirectory() as tmp:
+            full_root, compact_root = Path(tmp) / "full", Path(tmp) / "compact"
+            full_id = _fill(DraftStore(full_root, compact_every=events + 1), events)
+            compact_id = _fill(DraftStore(compact_root), events)
+            print(
+                f"{events:>7} {_load_ms(full_root, full_id):>16.2f} "
+                f"{_load_ms(compact_root, compact_id):>14.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
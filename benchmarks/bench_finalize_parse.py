@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import json
+
+from _bundles import best_of, make_payload
+
+from weekly_reports.models import build_bundle
+from weekly_reports.schemas import parse_bundle_json
+
+# 旧経路: json.loads -> dict -> build_bundle（フィールドごとに再走査）
+# 新経路: BundleSchema.model_validate_json でドメインモデルまで1回で組み立てる
+
+
+def main() -> None:
+    print(f"{'tasks':>8} {'dict+build_bundle(ms)':>22} {'typed schema(ms)':>18} {'speedup':>8}")
+    for task_count in (100, 1_000, 10_000):
+        raw = json.dumps(make_payload(task_count))
+        legacy = best_of(lambda: build_bundle(json.loads(raw)))
+        typed = best_of(lambda: parse_bundle_json(raw))
+        print(
+            f"{task_count:>8} {legacy * 1000:>22.1f} {typed * 1000:>18.1f} {legacy / typed:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
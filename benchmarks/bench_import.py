@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import csv
+import json
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from _bundles import make_payload
+
+from weekly_reports.importer import MappingRule, SessionImporter, iter_entries
+
+# 大きなCSVを読み込み、1秒あたりの処理行数を測る（重複行を1割混ぜる）。
+
+
+def main() -> None:
+    import re
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bundle_path = Path(tmp) / "week.json"
+        bundle_path.write_text(json.dumps(make_payload(20, sessions_per_task=0)), encoding="utf-8")
+        rules = [
+            MappingRule(task_id=f"task_{index:06d}", pattern=re.compile(f"^t{index} "))
+            for index in range(20)
+        ]
+        for rows in (10_000, 100_000, 300_000):
+            source = Path(tmp) / "export.csv"
+            start = datetime(2026, 1, 17)
+            with source.open("w", newline="", encoding="utf-8") as handle:
+                writer = csv.writer(handle)
+                writer.writerow(["Description", "Start", "End"])
+                row: list[str] = []
+                for index in range(rows):
+                    if index % 10 == 9:
+                        writer.writerow(row)
+                        continue
+                    begin = start + timedelta(seconds=index)
+                    end = begin + timedelta(minutes=30)
+                    row = [f"t{index % 20} work", begin.isoformat(), end.isoformat()]
+                    writer.writerow(row)
+            importer = SessionImporter([bundle_path], rules)
+            report = importer.run(iter_entries(source), dry_run=True)
+            print(
+                f"{rows:>8} rows  imported={report.imported:>7} duplicates={report.duplicates:>6} "
+                f"rejected={len(report.rejected):>3}  {report.rows_per_second:>9.0f} rows/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _bundles import make_payload
+
+from weekly_reports.fonts import register_japanese_font
+from weekly_reports.pdf import generate_pdf
+from weekly_reports.schemas import parse_bundle_json
+
+# フォント登録（解析）は初回だけ。2回目以降の描画時間とPDFサイズを比べる。
+# TTFを試すには: python benchmarks/bench_pdf_fonts.py /path/to/ipaexg.ttf
+
+
+def _measure(bundle, font_path: str | None, directory: str) -> None:
+    label = Path(font_path).name if font_path else "default"
+    started = time.perf_counter()
+    registered = register_japanese_font(font_path)
+    register_ms = (time.perf_counter() - started) * 1000
+    renders = []
+    for attempt in range(3):
+        path = os.path.join(directory, f"fonts_{attempt}.pdf")
+        started = time.perf_counter()
+        generate_pdf(bundle, path, font_path=font_path)
+        renders.append((time.perf_counter() - started) * 1000)
+    size = os.path.getsize(path) / 1024
+    source_size = (
+        f"{os.path.getsize(registered.source) / 1024:.0f}KB" if registered.embedded else "-"
+    )
+    print(
+        f"{label:>24} font={registered.name} embedded={registered.embedded} "
+        f"register={register_ms:.1f}ms first={renders[0]:.1f}ms "
+        f"warm={min(renders[1:]):.1f}ms pdf={size:.0f}KB font_file={source_size}"
+    )
+
+
+def main() -> None:
+    import json
+
+    import reportlab
+
+    bundle = parse_bundle_json(json.dumps(make_payload(200)))
+    vera = str(Path(reportlab.__file__).parent / "fonts" / "Vera.ttf")
+    with tempfile.TemporaryDirectory() as tmp:
+        _measure(bundle, None, tmp)
+        for font_path in sys.argv[1:] or [vera]:
+            _measure(bundle, font_path, tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+
+from _bundles import best_of, make_payload
+
+from weekly_reports.metrics import update_day_metrics
+from weekly_reports.pdf import generate_pdf
+from weekly_reports.schemas import parse_bundle_json
+
+# 行数を倍々に増やし、1行あたりの描画時間がほぼ一定（線形）であることを確認する。
+
+
+def main() -> None:
+    print(f"{'tasks':>7} {'rows':>7} {'mode':>8} {'render(s)':>10} {'us/row':>8} {'size(KB)':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.pdf")
+        for task_count in (250, 500, 1_000, 2_000, 4_000):
+            bundle = parse_bundle_json(json.dumps(make_payload(task_count)))
+            bundle = type(bundle)(
+                report=bundle.report,
+                days=update_day_metrics(bundle.days, bundle.tasks, bundle.task_sessions),
+                tasks=bundle.tasks,
+                task_sessions=bundle.task_sessions,
+                last_week_tasks=bundle.last_week_tasks,
+            )
+            rows = len(bundle.tasks) + len(bundle.task_sessions)
+            for mode in ("full", "summary"):
+                elapsed = best_of(lambda: generate_pdf(bundle, path, session_mode=mode), repeat=3)
+                size = os.path.getsize(path) / 1024
+                print(
+                    f"{task_count:>7} {rows:>7} {mode:>8} {elapsed:>10.2f} "
+                    f"{elapsed / rows * 1e6:>8.1f} {size:>9.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+
+from _bundles import best_of, make_payload
+
+from weekly_reports.pdf import generate_pdf
+from weekly_reports.render import write_report
+from weekly_reports.schemas import parse_bundle_json
+
+# 同じバンドルをPDF/HTML/Markdownで出力し、描画コストを比べる。
+
+
+def main() -> None:
+    print(f"{'tasks':>7} {'pdf(ms)':>9} {'html(ms)':>9} {'md(ms)':>8} {'pdf/html':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for task_count in (100, 1_000, 5_000):
+            bundle = parse_bundle_json(json.dumps(make_payload(task_count)))
+            pdf = best_of(lambda: generate_pdf(bundle, os.path.join(tmp, "r.pdf")), repeat=3)
+            html = best_of(lambda: write_report(bundle, os.path.join(tmp, "r.html"), "html"))
+            markdown = best_of(
+                lambda: write_report(bundle, os.path.join(tmp, "r.md"), "markdown")
+            )
+            print(
+                f"{task_count:>7} {pdf * 1000:>9.1f} {html * 1000:>9.1f} "
+                f"{markdown * 1000:>8.1f} {pdf / html:>8.0f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
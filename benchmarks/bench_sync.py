@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from _bundles import make_payload
+
+from weekly_reports.drafts import DraftStore
+from weekly_reports.metrics import recompute_days, update_day_metrics
+from weekly_reports.schemas import BundleSchema
+from weekly_reports.sync import SyncEvent, SyncHub, SyncMessage
+
+# 同じ下書きに多数の接続がある状態で、1件の変更を確定して全員へ配るまでの時間と、
+# 配る差分の大きさ（バンドル全体を送り直す場合との比較）を測る。
+TASK_COUNT = 300
+EDITS = 200
+CONNECTION_COUNTS = (1, 1_000, 5_000)
+
+
+class _Socket:
+    # ネットワークへは書かず、送った量だけ数える。
+    def __init__(self) -> None:
+        self.sent_bytes = 0
+
+    async def send_text(self, data: str) -> None:
+        self.sent_bytes += len(data)
+
+    async def close(self, code: int = 1000, reason: str | None = None) -> None:
+        pass
+
+
+async def _fanout(store: DraftStore, draft_id: str, connections: int) -> float:
+    hub = SyncHub(store)
+    sockets = [_Socket() for _ in range(connections)]
+    for socket in sockets:
+        channel = hub.join(draft_id, socket)
+    await channel.hello(sockets[0])
+    seq, bundle = store.load(draft_id)
+    started = time.perf_counter()
+    for index in range(EDITS):
+        task = bundle.tasks[index % len(bundle.tasks)]
+        data = {"task_id": task.id, "fields": {"estimated_minutes": 30 + index}}
+        message = SyncMessage(
+            type="event",
+            op_id=f"op{index}",
+            client_id="bench",
+            base_seq=seq,
+            event=SyncEvent(type="task_updated", data=data),
+        )
+        reply, _ = await channel.submit(message)
+        seq = reply["seq"]
+    return (time.perf_counter() - started) / EDITS * 1000
+
+
+def _fanout_ms(store: DraftStore, draft_id: str, connections: int) -> float:
+    return asyncio.run(_fanout(store, draft_id, connections))
+
+
+def main() -> None:
+    payload = make_payload(TASK_COUNT)
+    bundle = BundleSchema.model_validate(payload).to_bundle()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = DraftStore(Path(tmp), compact_every=10_000)
+        draft_id = store.create(bundle)
+        for connections in CONNECTION_COUNTS:
+            elapsed = _fanout_ms(store, draft_id, connections)
+            print(f"{connections:>5} connections  {elapsed:>7.2f} ms/edit")
+
+    day_ids = {bundle.tasks[0].day_id}
+    rounds = 200
+    started = time.perf_counter()
+    for _ in range(rounds):
+        update_day_metrics(bundle.days, bundle.tasks, bundle.task_sessions)
+    full_ms = (time.perf_counter() - started) / rounds * 1000
+    started = time.perf_counter()
+    for _ in range(rounds):
+        recompute_days(bundle, day_ids)
+    partial_ms = (time.perf_counter() - started) / rounds * 1000
+    print(f"day metrics: all days {full_ms:.3f} ms  affected day only {partial_ms:.3f} ms")
+
+    bundle_bytes = len(json.dumps(payload, ensure_ascii=False, separators=(",", ":")))
+    patch = {
+        "type": "patch",
+        "op_id": "op1",
+        "origin": "bench",
+        "seq": 1,
+        "event": {
+            "type": "task_updated",
+            "data": {"task_id": bundle.tasks[0].id, "fields": {"estimated_minutes": 45}},
+        },
+        "days": [
+            {
+                "id": bundle.tasks[0].day_id,
+                "planned_minutes": 0,
+                "scheduled_minutes": 0,
+                "done_count": 0,
+                "total_count": 0,
+            }
+        ],
+    }
+    patch_bytes = len(json.dumps(patch, ensure_ascii=False, separators=(",", ":")))
+    print(f"message size: full bundle {bundle_bytes} B  patch {patch_bytes} B")
+
+
+
+if __name__ == "__main__":
+    main()
@@ -43,6 +43,7 @@ export type Task = {
   status: string;
   reason_tags: string[];
   note?: string | null;
+  origin_task_id?: string | null;
   created_at?: string | null;
   updated_at?: string | null;
 };
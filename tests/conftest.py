@@ -1,6 +1,54 @@
+import json
 import sys
+from dataclasses import replace
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+from weekly_reports.models import Task, WeekReportBundle
+from weekly_reports.schemas import parse_bundle_json
+from weekly_reports.workflow import FinalizeResult, finalize_week_report
+
+EXAMPLE = ROOT / "example_report.json"
+
+
+@pytest.fixture
+def example_path() -> Path:
+    return EXAMPLE
+
+
+@pytest.fixture
+def example_payload() -> dict:
+    # テストごとに読み直すので、書き換えても他のテストに漏れない。
+    return json.loads(EXAMPLE.read_text(encoding="utf-8"))
+
+
+@pytest.fixture
+def example_bundle() -> WeekReportBundle:
+    return parse_bundle_json(EXAMPLE.read_bytes())
+
+
+@pytest.fixture
+def finalize_week(example_bundle):
+    # 例のバンドルを週IDと報告の項目だけ差し替えて確定する（PDFは作らない）。
+    def finalize(
+        output_dir: Path,
+        week_id: str,
+        *,
+        tasks: tuple[Task, ...] | None = None,
+        **report_fields,
+    ) -> FinalizeResult:
+        report = replace(example_bundle.report, week_id=week_id, **report_fields)
+        bundle = replace(
+            example_bundle,
+            report=report,
+            tasks=example_bundle.tasks if tasks is None else tasks,
+        )
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        return finalize_week_report(bundle, Path(output_dir), generate_pdf=False)
+
+    return finalize
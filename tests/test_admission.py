@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+from weekly_reports.admission import AdmissionController, AdmissionRejected
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_refills_per_user() -> None:
+    clock = FakeClock()
+    controller = AdmissionController(rate_per_minute=60, burst=2, clock=clock)
+    controller.admit("a")
+    controller.admit("a")
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.admit("a")
+    assert rejected.value.retry_after == pytest.approx(1.0)
+    assert rejected.value.retry_after_header == "1"
+    controller.admit("b")
+
+    clock.now = 1.0
+    controller.admit("a")
+    stats = controller.stats()
+    assert stats["admitted"] == 4
+    assert stats["rejected_rate"] == 1
+    assert stats["tracked_users"] == 2
+
+
+def test_pdf_slots_reject_when_busy() -> None:
+    controller = AdmissionController(pdf_concurrency=1, pdf_queue_seconds=0.01)
+    entered, release = threading.Event(), threading.Event()
+
+    def hold() -> None:
+        with controller.pdf_slot():
+            entered.set()
+            release.wait()
+
+    worker = threading.Thread(target=hold)
+    worker.start()
+    entered.wait()
+    with pytest.raises(AdmissionRejected) as rejected:
+        with controller.pdf_slot():
+            pass
+    assert rejected.value.reason == "pdf_busy"
+    release.set()
+    worker.join()
+
+    with controller.pdf_slot():
+        pass
+    stats = controller.stats()
+    assert stats["pdf_started"] == 2
+    assert stats["pdf_rejected"] == 1
+    assert stats["pdf_in_flight"] == 0
+
+
+def test_finalize_returns_429_with_retry_after(tmp_path, example_payload) -> None:
+    pytest.importorskip("fastapi")
+    from fastapi.testclient import TestClient
+
+    from weekly_reports.api import create_app
+
+    app = create_app(admission=AdmissionController(rate_per_minute=6, burst=1))
+    client = TestClient(app)
+    payload = {
+        "bundle": example_payload,
+        "output_dir": str(tmp_path),
+        "generate_pdf": False,
+    }
+    assert client.post("/api/weeks/finalize", json=payload).status_code == 200
+    limited = client.post("/api/weeks/finalize", json=payload)
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "10"
+    # 名乗るIDを変えても同じ接続元なら制限は外れない。ボディの検証より先に断る。
+    rotated = client.post("/api/weeks/finalize", content=b"{", headers={"X-User-Id": "other"})
+    assert rotated.status_code == 429
+    other_host = TestClient(app, client=("10.0.0.2", 50000))
+    assert other_host.post("/api/weeks/finalize", json=payload).status_code == 200
+
+    stats = client.get("/api/admission/stats").json()
+    assert stats["admitted"] == 2
+    assert stats["rejected_rate"] == 2
+    assert stats["tracked_users"] == 2
@@ -16,7 +16,7 @@ def test_init_week_endpoint() -> None:
     assert len(payload["days"]) == 7
 
 
-def test_finalize_endpoint() -> None:
+def test_finalize_endpoint(tmp_path) -> None:
     client = TestClient(create_app())
     bundle = {
         "week_report": {
@@ -66,8 +66,128 @@ def test_finalize_endpoint() -> None:
     }
     response = client.post(
         "/api/weeks/finalize",
-        json={"bundle": bundle, "generate_pdf": False, "output_dir": "outputs"},
+        json={"bundle": bundle, "generate_pdf": False, "output_dir": str(tmp_path)},
     )
     assert response.status_code == 200
     payload = response.json()
-    assert payload["snapshot"]["schema_version"] == "1.0"
+    assert payload["snapshot"]["schema_version"] == "1.3"
+
+
+def test_openapi_exposes_typed_bundle_schema() -> None:
+    client = TestClient(create_app())
+    schemas = client.get("/openapi.json").json()["components"]["schemas"]
+    assert "BundleSchema" in schemas
+    assert "Task" in schemas
+
+
+def test_finalize_rejects_malformed_bundle() -> None:
+    client = TestClient(create_app())
+    response = client.post(
+        "/api/weeks/finalize",
+        json={"bundle": {"week_report": {"id": "wr_1"}}, "generate_pdf": False},
+    )
+    assert response.status_code == 400
+    assert any(error["loc"][-1] == "review_at" for error in response.json()["detail"])
+
+
+def test_finalize_fills_build_bundle_defaults(tmp_path, example_payload) -> None:
+    client = TestClient(create_app())
+    del example_payload["week_report"]["status"]
+    for task in example_payload["tasks"]:
+        del task["week_report_id"]
+    example_payload["week_report"]["good_points"] = None
+    response = client.post(
+        "/api/weeks/finalize",
+        json={
+            "bundle": example_payload,
+            "output_dir": str(tmp_path),
+            "generate_pdf": False,
+        },
+    )
+    assert response.status_code == 200
+    body = response.json()["bundle"]
+    assert body["week_report"]["status"] == "final"
+    assert body["week_report"]["good_points"] == []
+    assert {task["week_report_id"] for task in body["tasks"]} == {""}
+
+
+def test_draft_body_fills_build_bundle_defaults(tmp_path, example_payload) -> None:
+    client = TestClient(create_app(draft_dir=str(tmp_path)))
+    for task in example_payload["tasks"]:
+        del task["status"]
+    created = client.post("/api/drafts", json=example_payload)
+    assert created.status_code == 200
+    assert {task["status"] for task in created.json()["bundle"]["tasks"]} == {"todo"}
+
+
+def test_draft_endpoints(tmp_path, example_payload) -> None:
+    client = TestClient(create_app(draft_dir=str(tmp_path)))
+    created = client.post("/api/drafts", json=example_payload)
+    assert created.status_code == 200
+    draft_id = created.json()["draft_id"]
+
+    response = client.post(
+        f"/api/drafts/{draft_id}/events",
+        json={"type": "task_status_changed", "data": {"task_id": "task_01", "status": "done"}},
+    )
+    assert response.json()["seq"] == 1
+    invalid = client.post(
+        f"/api/drafts/{draft_id}/events",
+        json={"type": "task_status_changed", "data": {"task_id": "task_01", "status": "?"}},
+    )
+    assert invalid.status_code == 400
+
+    draft = client.get(f"/api/drafts/{draft_id}").json()
+    assert draft["seq"] == 1
+    assert draft["bundle"]["tasks"][0]["status"] == "done"
+    history = client.get(f"/api/drafts/{draft_id}/events").json()
+    assert [event["type"] for event in history["events"]] == ["task_status_changed"]
+    assert client.get("/api/drafts/missing").status_code == 404
+
+
+def test_cohort_endpoint(tmp_path) -> None:
+    client = TestClient(create_app(cohort_dir=str(tmp_path)))
+    response = client.get("/api/cohort/2026-W03")
+    assert response.status_code == 200
+    assert response.json()["student_count"] == 0
+    assert client.get("/api/cohort/latest").status_code == 400
+
+
+def test_goal_endpoint(tmp_path, example_payload) -> None:
+    client = TestClient(create_app())
+    response = client.post(
+        "/api/weeks/finalize",
+        json={
+            "bundle": example_payload,
+            "output_dir": str(tmp_path),
+            "generate_pdf": False,
+        },
+    )
+    goal_id = response.json()["snapshot"]["goals"]["month"][0]
+
+    goal = client.get(f"/api/goals/{goal_id}", params={"output_dir": str(tmp_path)}).json()
+    assert goal["goal"]["text"] == "模試で偏差値5アップ"
+    assert goal["weeks"] == ["2026-W03"]
+    missing = client.get("/api/goals/goal_missing", params={"output_dir": str(tmp_path)})
+    assert missing.status_code == 404
+
+
+def test_init_week_carries_over_and_reports_depth(tmp_path, example_payload) -> None:
+    client = TestClient(create_app(draft_dir=str(tmp_path / "drafts")))
+    response = client.post(
+        "/api/weeks/init",
+        json={"review_at": "2026-01-23T18:00:00", "prev_bundle": example_payload},
+    )
+    payload = response.json()
+    assert [task["origin_task_id"] for task in payload["tasks"]] == ["task_01", "task_02"]
+    assert {task["status"] for task in payload["last_week_tasks"]} == {"carried_over"}
+
+    carried = client.get(
+        "/api/tasks/task_01/carryover", params={"output_dir": str(tmp_path)}
+    ).json()
+    assert carried == {
+        "task_id": "task_01",
+        "root_task_id": "task_01",
+        "depth": 0,
+        "chain": ["task_01"],
+    }
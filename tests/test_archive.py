@@ -0,0 +1,67 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from weekly_reports.archive import SnapshotArchive, compact_outputs
+
+
+def _write_week(output_dir, week_id: str) -> None:
+    snapshot = {"schema_version": "1.0", "week_id": week_id, "goals": {"week": ["focus"]}}
+    (output_dir / f"{week_id}_snapshot.json").write_text(
+        json.dumps(snapshot, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    (output_dir / f"{week_id}_weekly_report.pdf").write_bytes(b"%PDF-" + week_id.encode())
+
+
+def test_archive_append_and_read(tmp_path) -> None:
+    archive = SnapshotArchive(tmp_path, "alice")
+    archive.append_snapshot({"schema_version": "1.0", "week_id": "2026-W03", "note": "first"})
+    archive.append_snapshot({"schema_version": "1.0", "week_id": "2026-W04", "note": "週報"})
+    archive.append_snapshot({"schema_version": "1.0", "week_id": "2026-W03", "note": "again"})
+
+    reopened = SnapshotArchive(tmp_path, "alice")
+    assert reopened.week_ids() == ["2026-W03", "2026-W04"]
+    assert reopened.read_snapshot("2026-W03")["note"] == "again"
+    assert reopened.read_snapshot("2026-W04")["note"] == "週報"
+
+
+def test_concurrent_appends_record_their_own_offsets(tmp_path) -> None:
+    archives = [SnapshotArchive(tmp_path, "alice"), SnapshotArchive(tmp_path, "alice")]
+
+    def append(week: int) -> None:
+        snapshot = {"schema_version": "1.0", "week_id": f"2026-W{week:02d}", "note": "x" * week}
+        archives[week % 2].append_snapshot(snapshot)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(append, range(1, 41)))
+
+    reopened = SnapshotArchive(tmp_path, "alice")
+    for week in range(1, 41):
+        assert reopened.read_snapshot(f"2026-W{week:02d}")["note"] == "x" * week
+
+
+def test_read_from_empty_log_fails_cleanly(tmp_path) -> None:
+    archive = SnapshotArchive(tmp_path, "alice")
+    archive.append_snapshot({"schema_version": "1.0", "week_id": "2026-W03"})
+    archive.log_path.write_bytes(b"")
+
+    with pytest.raises(ValueError):
+        SnapshotArchive(tmp_path, "alice").read_raw_snapshot("2026-W03")
+
+
+def test_compact_outputs_keeps_recent_weeks(tmp_path) -> None:
+    output_dir = tmp_path / "outputs"
+    output_dir.mkdir()
+    for week in range(1, 6):
+        _write_week(output_dir, f"2026-W{week:02d}")
+
+    archive = SnapshotArchive(tmp_path / "archive", "default")
+    result = compact_outputs(output_dir, archive, keep_weeks=2)
+
+    assert result.archived_snapshots == ("2026-W01", "2026-W02", "2026-W03")
+    assert result.kept_weeks == ("2026-W04", "2026-W05")
+    assert not (output_dir / "2026-W01_snapshot.json").exists()
+    assert (output_dir / "2026-W05_snapshot.json").exists()
+    assert archive.read_snapshot("2026-W02")["week_id"] == "2026-W02"
+    assert archive.read_pdf("2026-W03") == b"%PDF-2026-W03"
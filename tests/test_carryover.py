@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+import pytest
+
+from weekly_reports.carryover import CarryOverIndex
+from weekly_reports.workflow import finalize_week_report, init_week_report
+
+
+@pytest.fixture
+def prev_bundle(example_bundle):
+    tasks = (replace(example_bundle.tasks[0], status="done"),) + example_bundle.tasks[1:]
+    return replace(example_bundle, tasks=tasks)
+
+
+def test_init_carries_todo_tasks_forward(prev_bundle) -> None:
+    bundle = init_week_report(datetime(2026, 1, 23, 18, 0), prev_bundle)
+
+    assert [task.status for task in bundle.last_week_tasks] == ["done", "carried_over"]
+    assert len(bundle.tasks) == 1
+    carried = bundle.tasks[0]
+    assert carried.origin_task_id == "task_02"
+    assert carried.status == "todo"
+    assert carried.week_report_id == bundle.report.id
+    # 前週の 01-20（サイクル4日目）は新しい週の 01-27 に置かれる。
+    assert carried.day_id == f"{bundle.report.week_id}-2026-01-27"
+
+    empty = init_week_report(datetime(2026, 1, 23, 18, 0), prev_bundle, carry_over=False)
+    assert empty.tasks == () and empty.last_week_tasks == ()
+
+
+def test_index_tracks_chain_depth_across_weeks(tmp_path, prev_bundle) -> None:
+    bundle = prev_bundle
+    review_at = datetime(2026, 1, 23, 18, 0)
+    carried_ids = []
+    for _ in range(3):
+        result = finalize_week_report(bundle, tmp_path, generate_pdf=False)
+        bundle = init_week_report(review_at, result.bundle)
+        carried_ids.append(bundle.tasks[0].id)
+        review_at += timedelta(days=7)
+    finalize_week_report(bundle, tmp_path, generate_pdf=False)
+
+    index = CarryOverIndex(tmp_path)
+    assert index.depth(carried_ids[-1]) == 3
+    assert index.depth("task_02") == 0
+    assert index.root(carried_ids[-1]) == "task_02"
+    assert index.chain(carried_ids[0]) == ["task_02"] + carried_ids
+
+
+def test_concurrent_records_are_not_lost(tmp_path, prev_bundle) -> None:
+    task = prev_bundle.tasks[1]
+    carried = [
+        replace(task, id=f"task_c{index:02d}", origin_task_id="task_02") for index in range(32)
+    ]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda item: CarryOverIndex(tmp_path).record("2026-W04", [item]), carried))
+
+    chain = CarryOverIndex(tmp_path).chain("task_02")
+    assert chain[0] == "task_02"
+    assert sorted(chain[1:]) == [item.id for item in carried]
@@ -0,0 +1,140 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+
+from fastapi.testclient import TestClient
+
+from weekly_reports.api import create_app
+from weekly_reports.client import APIError, WeeklyReportsClient
+
+
+def _client(tmp_path, **kwargs) -> WeeklyReportsClient:
+    app = create_app(draft_dir=str(tmp_path / "drafts"))
+    return WeeklyReportsClient(
+        "http://testserver", transport=httpx.ASGITransport(app=app), **kwargs
+    )
+
+
+def test_finalize_many_with_compressed_payloads(tmp_path, example_payload) -> None:
+    report = example_payload["week_report"]
+    bundles = [
+        {**example_payload, "week_report": {**report, "week_id": f"2026-W{week:02d}"}}
+        for week in range(3, 9)
+    ]
+
+    async def run():
+        async with _client(tmp_path, concurrency=3, compress=True) as client:
+            return await client.finalize_many(
+                bundles, output_dir=str(tmp_path), generate_pdf=False
+            )
+
+    results = asyncio.run(run())
+    assert [result["snapshot"]["week_id"] for result in results] == [
+        f"2026-W{week:02d}" for week in range(3, 9)
+    ]
+    assert (tmp_path / "2026-W08_snapshot.json").exists()
+
+
+def test_errors_are_not_retried_and_keep_order(tmp_path) -> None:
+    async def run():
+        async with _client(tmp_path) as client:
+            return await client.init_many(["2026-01-16T18:00:00", "not-a-date"])
+
+    ok, failed = asyncio.run(run())
+    assert len(ok["days"]) == 7
+    assert isinstance(failed, APIError) and failed.status_code == 422
+
+
+def test_retries_honour_retry_after() -> None:
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(503, headers={"Retry-After": "0"})
+        return httpx.Response(200, json={"status": "ok"})
+
+    async def run():
+        async with WeeklyReportsClient(
+            "http://testserver", transport=httpx.MockTransport(handler), retries=2
+        ) as client:
+            return await client.health()
+
+    assert asyncio.run(run()) == {"status": "ok"}
+    assert len(calls) == 3
+
+
+def _replay(responses: list) -> tuple[list[str], httpx.MockTransport]:
+    # 用意した失敗を順に返し（例外は送出し）、尽きたら 200 を返すトランスポート。
+    calls: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        outcome = responses.pop(0) if responses else httpx.Response(200, json={"seq": 1})
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return calls, httpx.MockTransport(handler)
+
+
+def _call(transport: httpx.MockTransport, method):
+    async def run():
+        async with WeeklyReportsClient(
+            "http://testserver", transport=transport, retries=5, backoff=0
+        ) as client:
+            return await method(client)
+
+    return asyncio.run(run())
+
+
+def test_side_effecting_calls_retry_only_unprocessed_failures() -> None:
+    def append(client):
+        return client.append_draft_event("wr_1", "task_removed", {})
+
+    # 接続失敗・429・Retry-After 付き 503 は処理前なので再送し、502 で止める。
+    calls, transport = _replay(
+        [
+            httpx.ConnectError("refused"),
+            httpx.Response(429, headers={"Retry-After": "0"}),
+            httpx.Response(503, headers={"Retry-After": "0"}),
+            httpx.Response(502),
+        ]
+    )
+    with pytest.raises(APIError) as exc_info:
+        _call(transport, append)
+    assert exc_info.value.status_code == 502
+    assert len(calls) == 4
+
+    # 処理後かもしれない読み込みタイムアウトは、追記では再送しない。
+    calls, transport = _replay([httpx.ReadTimeout("slow")] * 2)
+    with pytest.raises(httpx.ReadTimeout):
+        _call(transport, append)
+    assert len(calls) == 1
+
+    # 読み込みだけの呼び出しは再送する。
+    calls, transport = _replay([httpx.ReadTimeout("slow"), httpx.Response(502)])
+    assert _call(transport, lambda client: client.get_draft("wr_1")) == {"seq": 1}
+    assert len(calls) == 3
+
+
+def test_server_accepts_gzip_request_bodies() -> None:
+    client = TestClient(create_app())
+    body = gzip.compress(json.dumps({"review_at": "2026-01-16T18:00:00"}).encode())
+    response = client.post(
+        "/api/weeks/init",
+        content=body,
+        headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+    )
+    assert response.status_code == 200
+    broken = client.post(
+        "/api/weeks/init",
+        content=b"not gzip",
+        headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+    )
+    assert broken.status_code == 400
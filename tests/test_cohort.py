@@ -0,0 +1,34 @@
+from dataclasses import replace
+
+import pytest
+
+from weekly_reports.cohort import CohortDashboard
+
+
+def test_cohort_week_aggregates_students(tmp_path, example_bundle, finalize_week) -> None:
+    done = tuple(replace(task, status="done") for task in example_bundle.tasks[:2])
+    finalize_week(tmp_path / "alice", "2026-W03", tasks=done + example_bundle.tasks[2:])
+    finalize_week(tmp_path / "bob", "2026-W03")
+    finalize_week(tmp_path / "carol", "2026-W04")
+
+    summary = CohortDashboard(tmp_path, max_workers=2).week("2026-W03")
+
+    assert summary["student_count"] == 2
+    assert summary["missing_students"] == ["carol"]
+    assert summary["totals"]["planned_minutes"] == 420
+    assert summary["issue_tags"] == [{"tag": "planning", "count": 2, "students": 2}]
+    assert [student["student_id"] for student in summary["students"]] == ["bob", "alice"]
+    assert summary["students"][1]["done_count"] == 2
+
+
+def test_cohort_cache_is_invalidated_by_new_rollups(tmp_path, finalize_week) -> None:
+    finalize_week(tmp_path / "alice", "2026-W03")
+    dashboard = CohortDashboard(tmp_path)
+
+    first = dashboard.week("2026-W03")
+    assert dashboard.week("2026-W03") is first
+
+    finalize_week(tmp_path / "bob", "2026-W03")
+    assert dashboard.week("2026-W03")["student_count"] == 2
+    with pytest.raises(ValueError):
+        dashboard.week("2026-3")
@@ -0,0 +1,165 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+
+import pytest
+
+from weekly_reports.drafts import DraftNotFound, DraftStore
+
+
+def _new_task(task_id: str) -> dict:
+    return {
+        "id": task_id,
+        "week_report_id": "wr_12345678",
+        "day_id": "2026-W03-2026-01-19",
+        "title": "数学 演習",
+        "estimated_minutes": 45,
+    }
+
+
+def test_events_replay_after_restart(tmp_path, example_bundle) -> None:
+    store = DraftStore(tmp_path)
+    draft_id = store.create(example_bundle)
+    store.append(draft_id, "task_added", {"task": _new_task("task_new")})
+    store.append(draft_id, "task_status_changed", {"task_id": "task_new", "status": "done"})
+    store.append(
+        draft_id,
+        "session_logged",
+        {
+            "session": {
+                "id": "session_new",
+                "task_id": "task_new",
+                "start_at": "2026-01-19T20:00:00",
+                "end_at": "2026-01-19T20:45:00",
+            }
+        },
+    )
+    store.append(draft_id, "report_updated", {"fields": {"good_points": ["早起き"]}})
+
+    seq, bundle = DraftStore(tmp_path).load(draft_id)
+    assert seq == 4
+    task = next(task for task in bundle.tasks if task.id == "task_new")
+    assert task.status == "done"
+    assert bundle.task_sessions[-1].id == "session_new"
+    assert bundle.report.good_points == ("早起き",)
+
+
+def test_invalid_event_is_not_logged(tmp_path, example_bundle) -> None:
+    store = DraftStore(tmp_path)
+    draft_id = store.create(example_bundle)
+    with pytest.raises(ValueError):
+        store.append(draft_id, "task_status_changed", {"task_id": "task_01", "status": "later"})
+    with pytest.raises(ValueError):
+        store.append(
+            draft_id,
+            "session_logged",
+            {
+                "session": {
+                    "id": "s",
+                    "task_id": "missing",
+                    "start_at": "2026-01-19T09:00:00",
+                    "end_at": "2026-01-19T10:00:00",
+                }
+            },
+        )
+    with pytest.raises(ValueError):
+        store.append(draft_id, "unknown", {})
+    assert list(store.history(draft_id)) == []
+    with pytest.raises(DraftNotFound):
+        store.load("missing")
+
+
+def test_compaction_keeps_state_and_history(tmp_path, example_bundle) -> None:
+    store = DraftStore(tmp_path, compact_every=3)
+    draft_id = store.create(example_bundle)
+    for minutes in range(30, 37):
+        store.append(
+            draft_id,
+            "task_updated",
+            {"task_id": "task_01", "fields": {"estimated_minutes": minutes}},
+        )
+    directory = tmp_path / draft_id
+    snapshot = json.loads((directory / "snapshot.json").read_text(encoding="utf-8"))
+    assert snapshot["seq"] == 6
+    assert len((directory / "events.jsonl").read_text(encoding="utf-8").splitlines()) == 1
+    assert len(list(directory.glob("events.*-*.jsonl"))) == 2
+
+    seq, bundle = DraftStore(tmp_path).load(draft_id)
+    assert seq == 7
+    assert bundle.tasks[0].estimated_minutes == 36
+    assert [event.seq for event in store.history(draft_id, since=2)] == [3, 4, 5, 6, 7]
+
+
+def test_removing_task_drops_its_sessions(tmp_path, example_bundle) -> None:
+    store = DraftStore(tmp_path)
+    draft_id = store.create(example_bundle)
+    store.append(draft_id, "task_removed", {"task_id": "task_01"})
+    _, bundle = store.load(draft_id)
+    assert all(task.id != "task_01" for task in bundle.tasks)
+    assert all(session.task_id != "task_01" for session in bundle.task_sessions)
+
+
+def _session(session_id: str) -> dict:
+    return {
+        "session": {
+            "id": session_id,
+            "task_id": "task_01",
+            "start_at": "2026-01-19T20:00:00",
+            "end_at": "2026-01-19T20:45:00",
+        }
+    }
+
+
+def test_duplicate_session_id_is_rejected(tmp_path, example_bundle) -> None:
+    store = DraftStore(tmp_path)
+    draft_id = store.create(example_bundle)
+    store.append(draft_id, "session_logged", _session("session_new"))
+    with pytest.raises(ValueError):
+        store.append(draft_id, "session_logged", _session("session_new"))
+    assert store.load(draft_id)[0] == 1
+
+
+def test_stores_sharing_a_directory_never_reuse_seq(tmp_path, example_bundle) -> None:
+    # ワーカーごとに別の DraftStore があっても、seq はファイルロックの中で採番される。
+    stores = [DraftStore(tmp_path, compact_every=7), DraftStore(tmp_path, compact_every=7)]
+    draft_id = stores[0].create(example_bundle)
+
+    def edit(index: int) -> int:
+        data = {"task_id": "task_01", "fields": {"estimated_minutes": index + 1}}
+        return stores[index % 2].append(draft_id, "task_updated", data).seq
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        seqs = list(pool.map(edit, range(40)))
+
+    assert sorted(seqs) == list(range(1, 41))
+    assert [event.seq for event in stores[1].history(draft_id)] == list(range(1, 41))
+    assert DraftStore(tmp_path).load(draft_id)[0] == 40
+
+
+def test_cached_drafts_are_bounded(tmp_path, example_bundle) -> None:
+    store = DraftStore(tmp_path, max_cached=1)
+    first = store.create(example_bundle)
+    report = replace(example_bundle.report, id="wr_second")
+    second = store.create(replace(example_bundle, report=report))
+    store.append(first, "task_status_changed", {"task_id": "task_01", "status": "done"})
+
+    assert list(store._states) == [first]
+    assert store.load(second)[0] == 0
+    assert list(store._states) == [second]
+    assert store.load(first)[0] == 1
+
+
+def test_torn_last_line_is_dropped_before_the_next_append(tmp_path, example_bundle) -> None:
+    store = DraftStore(tmp_path)
+    draft_id = store.create(example_bundle)
+    store.append(draft_id, "task_status_changed", {"task_id": "task_01", "status": "done"})
+    with (tmp_path / draft_id / "events.jsonl").open("a", encoding="utf-8") as handle:
+        handle.write('{"seq":2,"type":"task_upd')
+
+    restarted = DraftStore(tmp_path)
+    assert restarted.load(draft_id)[0] == 1
+    restarted.append(draft_id, "task_status_changed", {"task_id": "task_02", "status": "done"})
+
+    seq, bundle = DraftStore(tmp_path).load(draft_id)
+    assert seq == 2
+    assert {task.status for task in bundle.tasks} == {"done"}
@@ -0,0 +1,31 @@
+from pathlib import Path
+
+import pytest
+
+reportlab = pytest.importorskip("reportlab")
+
+from weekly_reports import fonts
+from weekly_reports.pdf import generate_pdf
+
+VERA = str(Path(reportlab.__file__).parent / "fonts" / "Vera.ttf")
+
+
+def test_font_is_registered_once_per_process() -> None:
+    assert fonts.register_japanese_font() is fonts.register_japanese_font()
+
+
+def test_ttf_font_is_embedded_as_subset(tmp_path, example_bundle) -> None:
+    registered = fonts.register_japanese_font(VERA)
+    assert registered.embedded
+
+    path = generate_pdf(example_bundle, str(tmp_path / "report.pdf"), font_path=VERA)
+
+    data = path.read_bytes()
+    assert b"/FontFile2" in data
+    assert len(data) < Path(VERA).stat().st_size
+
+
+def test_invalid_font_env_is_rejected(monkeypatch, tmp_path) -> None:
+    monkeypatch.setenv(fonts.FONT_ENV, str(tmp_path / "missing.ttf"))
+    with pytest.raises(ValueError):
+        fonts._find_font_file()
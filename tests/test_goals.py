@@ -0,0 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from weekly_reports.goals import GoalStore
+from weekly_reports.models import goal_id
+from weekly_reports.snapshot import snapshot_to_bundle
+
+
+def test_snapshots_define_only_goals_first_set_that_week(tmp_path, finalize_week) -> None:
+    first = finalize_week(tmp_path, "2026-W03")
+    second = finalize_week(tmp_path, "2026-W04", goals_month=("模試で偏差値5アップ", "英検2級"))
+    again = finalize_week(tmp_path, "2026-W03")
+    month_id = goal_id("month", "模試で偏差値5アップ")
+    new_id = goal_id("month", "英検2級")
+
+    assert first.snapshot["goals"]["month"] == [month_id]
+    assert second.snapshot["goals"]["month"] == [month_id, new_id]
+    # 前の週から持ち越した目標は文面を書かず、その週に初めて掲げた目標だけを定義する。
+    assert second.snapshot["goal_defs"] == {new_id: {"scope": "month", "text": "英検2級"}}
+    # 確定し直しても、初めて掲げた週のスナップショットには定義が残る。
+    for result in (first, again):
+        assert result.snapshot["goal_defs"][month_id]["text"] == "模試で偏差値5アップ"
+        restored = snapshot_to_bundle(result.snapshot)
+        assert restored.report.goals_month == ("模試で偏差値5アップ",)
+
+    with pytest.raises(ValueError):
+        snapshot_to_bundle(second.snapshot)
+    restored = snapshot_to_bundle(second.snapshot, GoalStore(tmp_path).definitions())
+    assert restored.report.goals_month == ("模試で偏差値5アップ", "英検2級")
+
+
+def test_concurrent_finalizes_keep_every_goal(tmp_path, finalize_week) -> None:
+    weeks = [f"2026-W{week:02d}" for week in range(10, 26)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda week: finalize_week(tmp_path, week, goals_month=(week,)), weeks))
+
+    store = GoalStore(tmp_path)
+    for week in weeks:
+        assert store.weeks_for_goal(goal_id("month", week)) == [week]
+
+
+def test_goal_index_and_progress_history(tmp_path, finalize_week) -> None:
+    finalize_week(tmp_path, "2026-W03")
+    finalize_week(tmp_path, "2026-W05", goals_month=("英検2級",))
+    finalize_week(tmp_path, "2026-W04")
+    store = GoalStore(tmp_path)
+    month_id = goal_id("month", "模試で偏差値5アップ")
+
+    assert store.weeks_for_goal(month_id) == ["2026-W03", "2026-W04"]
+    assert store.weeks_for_goal(goal_id("month", "英検2級")) == ["2026-W05"]
+    assert store.get(month_id)["last_week"] == "2026-W04"
+    history = store.history(month_id)
+    assert [entry["week_id"] for entry in history] == ["2026-W03", "2026-W04"]
+    assert history[0]["planned_minutes"] == 210
+
+    # 同じ週を目標を変えて確定し直すと、外した目標の索引からその週が消える。
+    finalize_week(tmp_path, "2026-W04", goals_month=("英検2級",))
+    assert GoalStore(tmp_path).weeks_for_goal(month_id) == ["2026-W03"]
@@ -0,0 +1,110 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from weekly_reports.importer import SessionImporter, iter_entries, load_rules
+from weekly_reports.schemas import parse_bundle_json
+
+CSV_EXPORT = """Description,Project,Start,End
+化学 1章,受験,2026-01-19T09:00:00,2026-01-19T10:00:00
+化学 2章,受験,2026-01-19T11:00:00,2026-01-19T12:00:00
+化学 2章,受験,2026-01-19T11:00:00,2026-01-19T12:00:00
+長文,英語,2026-01-20T09:00:00,2026-01-20T09:45:00
+散歩,生活,2026-01-20T18:00:00,2026-01-20T18:30:00
+化学 3章,受験,2026-02-20T09:00:00,2026-02-20T10:00:00
+化学 4章,受験,not-a-date,2026-01-21T10:00:00
+"""
+
+ICS_EXPORT = """BEGIN:VCALENDAR
+BEGIN:VEVENT
+UID:1
+SUMMARY:英語
+  長文
+CATEGORIES:英語
+DTSTART:20260121T070000
+DTEND:20260121T080000
+END:VEVENT
+BEGIN:VEVENT
+UID:2
+SUMMARY:英語 終日
+DTSTART;VALUE=DATE:20260122
+DTEND;VALUE=DATE:20260123
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+@pytest.fixture
+def week_setup(tmp_path, example_path):
+    bundle_path = tmp_path / "week_report.json"
+    bundle_path.write_bytes(example_path.read_bytes())
+    rules_path = tmp_path / "rules.json"
+    rules_path.write_text(
+        json.dumps(
+            [
+                {"task_id": "task_01", "match": "^化学"},
+                {"task_id": "task_02", "match": "英語", "field": "any"},
+            ],
+            ensure_ascii=False,
+        ),
+        encoding="utf-8",
+    )
+    return bundle_path, load_rules(rules_path)
+
+
+def test_import_csv_dedupes_and_rejects(tmp_path, week_setup) -> None:
+    bundle_path, rules = week_setup
+    source = tmp_path / "export.csv"
+    source.write_text(CSV_EXPORT, encoding="utf-8")
+
+    importer = SessionImporter([bundle_path], rules)
+    report = importer.run(iter_entries(source), chunk_rows=2)
+
+    # チャンクごとに書き戻すので、取り込み待ちは残らず、同じバンドルは1度だけ報告される。
+    assert importer.pending == {}
+    assert report.updated_bundles == [str(bundle_path)]
+    assert report.rows_read == 7
+    assert report.imported == 2
+    assert report.duplicates == 2
+    reasons = sorted(row.reason.split(":")[0] for row in report.rejected)
+    assert reasons == ["Invalid isoformat string", "no rule matched", "no week covers 2026-02-20"]
+    bundle = parse_bundle_json(bundle_path.read_bytes())
+    assert len(bundle.task_sessions) == 3
+    assert {session.task_id for session in bundle.task_sessions} == {"task_01", "task_02"}
+
+
+def test_import_ics_unfolds_lines_and_rejects_all_day_events(tmp_path, week_setup) -> None:
+    bundle_path, rules = week_setup
+    source = tmp_path / "calendar.ics"
+    source.write_text(ICS_EXPORT, encoding="utf-8")
+
+    report = SessionImporter([bundle_path], rules).run(iter_entries(source), dry_run=True)
+
+    assert report.imported == 1
+    assert [row.reason for row in report.rejected] == ["all-day events are not supported"]
+    assert report.updated_bundles == []
+    before = parse_bundle_json(bundle_path.read_bytes()).task_sessions
+    assert before[0].id == "session_01"
+
+    SessionImporter([bundle_path], rules).run(iter_entries(source))
+    sessions = parse_bundle_json(bundle_path.read_bytes()).task_sessions
+    (session,) = sessions[len(before) :]
+    assert session.task_id == "task_02"
+    assert session.note == "英語 長文"
+
+
+def test_non_bundle_json_files_are_skipped_and_reported(tmp_path, week_setup) -> None:
+    bundle_path, rules = week_setup
+    (tmp_path / "goals.json").write_text('{"goals":{},"weeks":{}}', encoding="utf-8")
+    (tmp_path / "broken.json").write_text("{", encoding="utf-8")
+    source = tmp_path / "export.csv"
+    source.write_text(CSV_EXPORT, encoding="utf-8")
+
+    paths = sorted(tmp_path.glob("*.json"))
+    report = SessionImporter(paths, rules).run(iter_entries(source))
+
+    skipped = [Path(path).name for path, _ in report.skipped_bundles]
+    assert skipped == ["broken.json", "goals.json", "rules.json"]
+    assert report.imported == 2
+    assert report.updated_bundles == [str(bundle_path)]
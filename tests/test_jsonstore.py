@@ -0,0 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from weekly_reports.jsonstore import JsonFile
+
+
+def test_separate_instances_do_not_lose_updates(tmp_path) -> None:
+    # ワーカープロセスごとに別のインスタンスになる状況。ファイルロックだけで直列になる。
+    path = tmp_path / "counts.json"
+    files = [JsonFile(path, dict), JsonFile(path, dict)]
+
+    def bump(index: int) -> None:
+        with files[index % 2].update() as data:
+            data[str(index)] = index
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(bump, range(60)))
+
+    with JsonFile(path, dict).read() as data:
+        assert data == {str(index): index for index in range(60)}
@@ -0,0 +1,145 @@
+import json
+
+import pytest
+
+from weekly_reports.archive import SnapshotArchive
+from weekly_reports.migrations import (
+    BulkMigrator,
+    known_versions,
+    read_snapshot_file,
+    upgrade_snapshot,
+)
+from weekly_reports.models import WeekReportBundle, build_bundle, validate_report
+from weekly_reports.snapshot import SCHEMA_VERSION, build_snapshot, snapshot_to_bundle
+
+PAYLOAD = {
+    "week_report": {
+        "id": "wr_1",
+        "week_id": "2026-W03",
+        "cycle_start": "2026-01-17",
+        "cycle_end": "2026-01-23",
+        "review_at": "2026-01-16T18:00:00",
+        "status": "final",
+        "goals_week": ["focus"],
+        "goals_month": ["month"],
+        "goals_long": [],
+        "good_points": ["steady"],
+        "issues": [
+            {"problem": "late", "root_cause": "plan", "improvement": "plan early", "tags": ["p"]}
+        ],
+    },
+    "days": [
+        {"id": "d1", "week_report_id": "wr_1", "date": "2026-01-17", "planned_minutes": 90},
+    ],
+    "tasks": [
+        {
+            "id": "t1",
+            "week_report_id": "wr_1",
+            "day_id": "d1",
+            "title": "Task",
+            "estimated_minutes": 90,
+            "status": "done",
+        }
+    ],
+    "task_sessions": [
+        {
+            "id": "s1",
+            "task_id": "t1",
+            "start_at": "2026-01-17T09:00:00",
+            "end_at": "2026-01-17T10:30:00",
+            "is_completed": True,
+        }
+    ],
+    "last_week_tasks": [],
+}
+
+
+def _snapshot_v1_2() -> dict:
+    snapshot = build_snapshot(build_bundle(PAYLOAD), pdf_path="out.pdf", json_path="out.json")
+    for day in snapshot["next_week_days"]:
+        for task in day["tasks"]:
+            task.pop("origin_task_id")
+    snapshot["schema_version"] = "1.2"
+    return snapshot
+
+
+def _snapshot_v1_1() -> dict:
+    snapshot = _snapshot_v1_2()
+    definitions = snapshot.pop("goal_defs")
+    snapshot["goals"] = {
+        scope: [definitions[ref]["text"] for ref in refs]
+        for scope, refs in snapshot["goals"].items()
+    }
+    snapshot["schema_version"] = "1.1"
+    return snapshot
+
+
+def _snapshot_v1_0() -> dict:
+    snapshot = _snapshot_v1_1()
+    for key in ("week_report_id", "status", "prev_week_report_id"):
+        snapshot.pop(key)
+    for day in snapshot["next_week_days"]:
+        day.pop("available_minutes")
+    snapshot["schema_version"] = "1.0"
+    return snapshot
+
+
+HISTORICAL_SNAPSHOTS = {
+    "1.0": _snapshot_v1_0,
+    "1.1": _snapshot_v1_1,
+    "1.2": _snapshot_v1_2,
+    SCHEMA_VERSION: lambda: build_snapshot(
+        build_bundle(PAYLOAD), pdf_path="out.pdf", json_path="out.json"
+    ),
+}
+
+
+@pytest.mark.parametrize("version", known_versions())
+def test_every_version_round_trips_to_bundle(version: str) -> None:
+    snapshot = HISTORICAL_SNAPSHOTS[version]()
+    assert snapshot["schema_version"] == version
+
+    upgraded = upgrade_snapshot(snapshot)
+    bundle = snapshot_to_bundle(upgraded)
+
+    assert isinstance(bundle, WeekReportBundle)
+    validate_report(bundle)
+    assert upgraded["schema_version"] == SCHEMA_VERSION
+    assert bundle.report.week_id == "2026-W03"
+    assert bundle.report.goals_month == ("month",)
+    assert bundle.tasks[0].title == "Task"
+    assert bundle.task_sessions[0].task_id == "t1"
+    assert snapshot["schema_version"] == version
+
+
+def test_unknown_version_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        upgrade_snapshot({"schema_version": "0.1"})
+
+
+def test_read_snapshot_file_caches_upgraded_form(tmp_path) -> None:
+    path = tmp_path / "2026-W03_snapshot.json"
+    path.write_text(json.dumps(_snapshot_v1_0()), encoding="utf-8")
+
+    first = read_snapshot_file(path)
+    assert first["schema_version"] == SCHEMA_VERSION
+    assert read_snapshot_file(path) is first
+
+
+def test_bulk_migrator_upgrades_archive_and_files(tmp_path) -> None:
+    archive = SnapshotArchive(tmp_path / "archive")
+    archive.append_snapshot(_snapshot_v1_0())
+    output_dir = tmp_path / "outputs"
+    output_dir.mkdir()
+    loose = output_dir / "2026-W04_snapshot.json"
+    loose.write_text(json.dumps({**_snapshot_v1_0(), "week_id": "2026-W04"}), encoding="utf-8")
+
+    reports = []
+    migrator = BulkMigrator(archive=archive, output_dir=output_dir, on_progress=reports.append)
+    progress = migrator.start().join()
+
+    assert progress.total == 2
+    assert progress.upgraded == 2
+    assert reports[-1].processed == 2
+    assert json.loads(archive.read_raw_snapshot("2026-W03"))["schema_version"] == SCHEMA_VERSION
+    assert json.loads(loose.read_text(encoding="utf-8"))["schema_version"] == SCHEMA_VERSION
@@ -0,0 +1,44 @@
+from dataclasses import replace
+from datetime import timedelta
+
+import pytest
+
+pytest.importorskip("reportlab")
+
+from weekly_reports import pdf
+
+
+def _bundle_with_sessions(bundle, count: int):
+    base = bundle.task_sessions[0]
+    sessions = tuple(
+        replace(
+            base,
+            id=f"s{index}",
+            start_at=base.start_at + timedelta(minutes=index),
+            end_at=base.end_at + timedelta(minutes=index),
+        )
+        for index in range(count)
+    )
+    return replace(bundle, task_sessions=sessions)
+
+
+def test_long_tables_are_chunked_with_repeating_header() -> None:
+    header = ["a", "b"]
+    rows = [[str(index), ""] for index in range(pdf.TABLE_CHUNK_ROWS * 2 + 1)]
+    tables = pdf._chunked_tables(header, rows, [10, 10], "Helvetica")
+
+    assert len(tables) == 3
+    assert all(table.repeatRows == 1 for table in tables)
+    assert [table._cellvalues[0] for table in tables] == [header] * 3
+
+
+@pytest.mark.parametrize("session_mode", ["full", "summary"])
+def test_generate_pdf_with_many_sessions(tmp_path, example_bundle, session_mode: str) -> None:
+    bundle = _bundle_with_sessions(example_bundle, 600)
+    path = pdf.generate_pdf(bundle, str(tmp_path / "report.pdf"), session_mode=session_mode)
+    assert path.read_bytes().startswith(b"%PDF")
+
+
+def test_generate_pdf_rejects_unknown_session_mode(tmp_path, example_bundle) -> None:
+    with pytest.raises(ValueError):
+        pdf.generate_pdf(example_bundle, str(tmp_path / "report.pdf"), session_mode="nope")
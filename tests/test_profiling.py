@@ -0,0 +1,98 @@
+import json
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from weekly_reports.profiling import StageProfiler
+from weekly_reports.workflow import finalize_week_report
+
+
+def test_finalize_profiles_each_stage(tmp_path, example_bundle) -> None:
+    profiler = StageProfiler(memory=True)
+    finalize_week_report(example_bundle, tmp_path, generate_pdf=False, profiler=profiler)
+
+    report_path = profiler.write_reports(tmp_path, "2026-W03_finalize")
+
+    stages = [stage["stage"] for stage in profiler.summary()]
+    assert stages == [
+        "update_day_metrics",
+        "build_snapshot",
+        "write_snapshot",
+        "write_rollup",
+        "update_goals",
+        "update_carryover",
+    ]
+    assert all(stage["peak_memory_bytes"] is not None for stage in profiler.summary())
+    assert report_path.exists()
+    assert (tmp_path / "2026-W03_finalize_update_day_metrics.prof").exists()
+
+
+def test_profiled_stages_run_concurrently(tmp_path) -> None:
+    # 両方の段階が同時に中へ入れなければ Barrier がタイムアウトする。
+    barrier = threading.Barrier(2, timeout=5)
+    profilers = [StageProfiler(), StageProfiler()]
+
+    def run(profiler: StageProfiler) -> None:
+        with profiler.stage("render"):
+            barrier.wait()
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(run, profilers))
+
+    for index, profiler in enumerate(profilers):
+        assert [stage["stage"] for stage in profiler.summary()] == ["render"]
+        assert profiler.write_reports(tmp_path, f"p{index}").exists()
+
+
+def test_memory_stages_do_not_overlap() -> None:
+    # reset_peak() が他の段階のピークを消さないよう、メモリ計測の段階は1つずつ入る。
+    inside = {"now": 0, "max": 0}
+    lock = threading.Lock()
+    profilers = [StageProfiler(memory=True) for _ in range(4)]
+
+    def run(profiler: StageProfiler) -> None:
+        with profiler.stage("render"):
+            with lock:
+                inside["now"] += 1
+                inside["max"] = max(inside["max"], inside["now"])
+            buffer = bytearray(1 << 20)
+            time.sleep(0.02)
+            with lock:
+                inside["now"] -= 1
+            del buffer
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(run, profilers))
+
+    assert inside["max"] == 1
+    for profiler in profilers:
+        assert profiler.summary()[0]["peak_memory_bytes"] >= 1 << 20
+    assert not tracemalloc.is_tracing()
+
+
+def test_finalize_endpoint_profile_header(tmp_path, example_payload) -> None:
+    pytest.importorskip("fastapi")
+    from fastapi.testclient import TestClient
+
+    from weekly_reports.api import create_app
+
+    client = TestClient(create_app())
+    response = client.post(
+        "/api/weeks/finalize",
+        json={
+            "bundle": example_payload,
+            "generate_pdf": False,
+            "output_dir": str(tmp_path),
+        },
+        headers={"X-Profile": "1"},
+    )
+
+    assert response.status_code == 200
+    report_path = Path(response.headers["X-Profile-Report"])
+    assert report_path.parent == tmp_path
+    summary = json.loads((tmp_path / "2026-W03_finalize_profile.json").read_text())
+    assert summary[0]["stage"] == "build_bundle"
@@ -0,0 +1,85 @@
+from dataclasses import replace
+
+import pytest
+
+from weekly_reports.render import iter_buffered, iter_html, iter_markdown, write_report
+from weekly_reports.workflow import finalize_week_report
+
+SECTIONS = ["週目標", "月目標", "長期目標", "先週の宿題（実績）", "来週タスク（日付行）", "GOOD"]
+
+
+def test_html_contains_pdf_sections_and_escapes_text(example_bundle) -> None:
+    report = replace(example_bundle.report, good_points=("<script>",))
+    html = "".join(iter_html(replace(example_bundle, report=report)))
+
+    for section in SECTIONS + ["課題/原因/改善策", "タスク実行枠"]:
+        assert f"<h3>{section}</h3>" in html
+    assert "&lt;script&gt;" in html
+    assert "<script>" not in html
+
+
+def test_markdown_escapes_table_cells(example_bundle) -> None:
+    tasks = (replace(example_bundle.tasks[0], title="a|b"),) + example_bundle.tasks[1:]
+    markdown = "".join(iter_markdown(replace(example_bundle, tasks=tasks), session_mode="summary"))
+
+    for section in SECTIONS:
+        assert f"## {section}" in markdown
+    assert "| a\\|b |" in markdown
+    assert "タスク実行枠（タスク・日別集計）" in markdown
+
+
+def test_finalize_writes_html_report(tmp_path, example_bundle) -> None:
+    result = finalize_week_report(example_bundle, tmp_path, report_format="html")
+
+    assert result.report_path == tmp_path / "2026-W03_weekly_report.html"
+    assert result.report_path.read_text(encoding="utf-8").startswith("<!DOCTYPE html>")
+    assert result.pdf_path is None
+    assert not (tmp_path / "2026-W03_weekly_report.pdf").exists()
+    assert result.snapshot["exports"]["pdf_path"] is None
+    assert result.snapshot["exports"]["report_path"] == str(result.report_path)
+
+
+def test_generate_pdf_false_still_writes_text_formats(tmp_path, example_bundle) -> None:
+    result = finalize_week_report(
+        example_bundle, tmp_path, generate_pdf=False, report_format="markdown"
+    )
+
+    assert result.report_path == tmp_path / "2026-W03_weekly_report.md"
+    assert result.report_path.exists()
+    assert result.snapshot["exports"]["report_path"] == str(result.report_path)
+
+
+def test_unknown_session_mode_is_rejected(tmp_path, example_bundle) -> None:
+    for render in (iter_html, iter_markdown):
+        with pytest.raises(ValueError, match="Invalid session_mode"):
+            render(example_bundle, session_mode="detailed")
+    with pytest.raises(ValueError, match="Invalid session_mode"):
+        write_report(
+            example_bundle, str(tmp_path / "report.md"), "markdown", session_mode="detailed"
+        )
+    with pytest.raises(ValueError, match="Invalid session_mode"):
+        finalize_week_report(
+            example_bundle, tmp_path, report_format="html", session_mode="detailed"
+        )
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_render_endpoint_streams_markdown(example_payload) -> None:
+    pytest.importorskip("fastapi")
+    from fastapi.testclient import TestClient
+
+    from weekly_reports.api import create_app
+
+    client = TestClient(create_app())
+    response = client.post(
+        "/api/weeks/render", json={"bundle": example_payload, "report_format": "markdown"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/markdown")
+    assert response.text.startswith("# Weekly Report 2026-W03")
+
+
+def test_iter_buffered_joins_small_chunks() -> None:
+    chunks = list(iter_buffered(["a"] * 10, size=4))
+    assert chunks == ["aaaa", "aaaa", "aa"]
@@ -0,0 +1,95 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from weekly_reports.rollups import (
+    iter_rollups,
+    rollup_week_ids,
+    upsert_rollup,
+    write_compiled_json,
+    write_compiled_pdf,
+)
+
+
+def test_refinalize_replaces_rollup_line(tmp_path, finalize_week) -> None:
+    for week_id in ["2026-W03", "2026-W04", "2026-W03"]:
+        finalize_week(tmp_path, week_id)
+
+    rollups = list(iter_rollups(tmp_path, "2026-W01", "2026-W52"))
+    lines = (tmp_path / "rollups.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["week_id"] for line in lines] == ["2026-W04", "2026-W03"]
+
+    assert [rollup["week_id"] for rollup in rollups] == ["2026-W03", "2026-W04"]
+    assert rollups[0]["planned_minutes"] == 210
+    assert rollups[0]["issue_tags"] == {"planning": 1}
+
+
+def test_concurrent_upserts_keep_one_line_per_week(tmp_path) -> None:
+    weeks = [f"2026-W{week:02d}" for week in range(10, 30)]
+
+    def write(index: int) -> None:
+        upsert_rollup(tmp_path, {"week_id": weeks[index % len(weeks)], "round": index})
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, range(80)))
+
+    assert sorted(rollup_week_ids(tmp_path)) == weeks
+    lines = (tmp_path / "rollups.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == len(weeks)
+
+
+def test_rollup_lines_are_read_by_key_not_position(tmp_path) -> None:
+    lines = [
+        {"goals_week": ['"week_id":"2026-W09"'], "week_id": "2026-W03"},
+        {"week_id": "2026-W04", "planned_minutes": 10},
+        {"week_id": "2027-W01", "note": "x"},
+    ]
+    (tmp_path / "rollups.jsonl").write_text(
+        "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines), encoding="utf-8"
+    )
+
+    assert rollup_week_ids(tmp_path) == {"2026-W03", "2026-W04", "2027-W01"}
+    rollups = list(iter_rollups(tmp_path, "2026-W01", "2026-W52"))
+    assert [rollup["week_id"] for rollup in rollups] == ["2026-W03", "2026-W04"]
+
+
+def test_compile_json_covers_requested_range(tmp_path, finalize_week) -> None:
+    for week_id in ["2026-W02", "2026-W03", "2026-W04", "2026-W05"]:
+        finalize_week(tmp_path, week_id)
+
+    path = write_compiled_json(tmp_path, "2026-W03", "2026-W04", tmp_path / "c.json")
+    compiled = json.loads(path.read_text(encoding="utf-8"))
+
+    assert [week["week_id"] for week in compiled["weeks"]] == ["2026-W03", "2026-W04"]
+    assert compiled["totals"]["weeks"] == 2
+    assert compiled["totals"]["planned_minutes"] == 420
+    assert compiled["totals"]["goals_month"][0]["weeks"] == 2
+
+
+def test_compile_pdf(tmp_path, finalize_week) -> None:
+    pytest.importorskip("reportlab")
+    for week_id in ["2026-W03", "2026-W04"]:
+        finalize_week(tmp_path, week_id)
+
+    path = write_compiled_pdf(tmp_path, "2026-W01", "2026-W10", tmp_path / "c.pdf")
+
+    assert path.read_bytes().startswith(b"%PDF")
+
+
+def test_compile_endpoint_streams_json(tmp_path, finalize_week) -> None:
+    pytest.importorskip("fastapi")
+    from fastapi.testclient import TestClient
+
+    from weekly_reports.api import create_app
+
+    for week_id in ["2026-W03"]:
+        finalize_week(tmp_path, week_id)
+    client = TestClient(create_app())
+    response = client.post(
+        "/api/compile",
+        json={"from_week": "2026-W01", "to_week": "2026-W04", "output_dir": str(tmp_path)},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["totals"]["weeks"] == 1
@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+from weekly_reports.models import build_bundle
+from weekly_reports.schemas import BundleSchema, parse_bundle_json
+
+
+def test_typed_schema_matches_build_bundle(example_path) -> None:
+    raw = example_path.read_text(encoding="utf-8")
+    assert parse_bundle_json(raw) == build_bundle(json.loads(raw))
+
+
+def test_typed_schema_round_trips_to_json(example_bundle) -> None:
+    dumped = BundleSchema.from_bundle(example_bundle).model_dump(mode="json")
+    assert parse_bundle_json(json.dumps(dumped)) == example_bundle
+
+
+def test_typed_schema_runs_domain_validation(example_payload) -> None:
+    example_payload["tasks"][0]["estimated_minutes"] = 0
+    with pytest.raises(ValueError):
+        parse_bundle_json(json.dumps(example_payload))
+
+
+def test_typed_schema_fills_build_bundle_defaults(example_payload) -> None:
+    del example_payload["week_report"]["id"]
+    example_payload["week_report"]["issues"] = None
+    for task in example_payload["tasks"]:
+        del task["week_report_id"]
+        task["reason_tags"] = None
+    assert parse_bundle_json(json.dumps(example_payload)) == build_bundle(example_payload)
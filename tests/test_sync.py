@@ -0,0 +1,219 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from weekly_reports.api import create_app
+from weekly_reports.drafts import DraftStore
+from weekly_reports.metrics import recompute_days, update_day_metrics
+from weekly_reports.sync import SyncHub, SyncMessage
+
+def _event(op_id: str, base_seq: int, event_type: str, data: dict, client_id: str) -> dict:
+    return {
+        "type": "event",
+        "op_id": op_id,
+        "client_id": client_id,
+        "base_seq": base_seq,
+        "event": {"type": event_type, "data": data},
+    }
+
+
+def _message(*args) -> SyncMessage:
+    return SyncMessage.model_validate(_event(*args))
+
+
+def _retitle(op_id: str, base_seq: int, title: str, client_id: str) -> SyncMessage:
+    data = {"task_id": "task_01", "fields": {"title": title}}
+    return _message(op_id, base_seq, "task_updated", data, client_id)
+
+
+def _status(op_id: str, base_seq: int, task_id: str, status: str, client_id: str) -> dict:
+    data = {"task_id": task_id, "status": status}
+    return _event(op_id, base_seq, "task_status_changed", data, client_id)
+
+
+def test_recompute_days_matches_full_recompute(example_bundle) -> None:
+    full = {day.id: day for day in update_day_metrics(
+        example_bundle.days, example_bundle.tasks, example_bundle.task_sessions
+    )}
+    partial = recompute_days(example_bundle, {"2026-W03-2026-01-20"})
+    assert [day.id for day in partial] == ["2026-W03-2026-01-20"]
+    assert partial[0] == full["2026-W03-2026-01-20"]
+
+
+class _Socket:
+    def __init__(self) -> None:
+        self.received: list[dict] = []
+
+    async def send_text(self, data: str) -> None:
+        self.received.append(json.loads(data))
+
+    async def close(self, code: int = 1000, reason: str | None = None) -> None:
+        pass
+
+
+def test_endpoint_sends_hello_and_patch_with_affected_days_only(tmp_path, example_bundle) -> None:
+    draft_id = DraftStore(tmp_path).create(example_bundle)
+    client = TestClient(create_app(draft_dir=str(tmp_path)))
+    with client.websocket_connect(f"/api/drafts/{draft_id}/ws") as socket:
+        hello = socket.receive_json()
+        assert (hello["type"], hello["seq"]) == ("hello", 0)
+        assert client.get("/api/sync/stats").json() == {"channels": 1, "connections": 1}
+
+        socket.send_json(_status("op1", 0, "task_01", "done", "a"))
+        patch = socket.receive_json()
+        assert (patch["type"], patch["seq"], patch["op_id"]) == ("patch", 1, "op1")
+        assert [day["id"] for day in patch["days"]] == ["2026-W03-2026-01-19"]
+        assert patch["days"][0]["done_count"] == 1
+
+    assert client.get("/api/sync/stats").json() == {"channels": 0, "connections": 0}
+    assert DraftStore(tmp_path).load(draft_id)[0] == 1
+
+
+def test_stale_edit_keeps_first_write_and_applies_the_rest(tmp_path, example_bundle) -> None:
+    store = DraftStore(tmp_path)
+    draft_id = store.create(example_bundle)
+    hub = SyncHub(store)
+    alice, bob = _Socket(), _Socket()
+
+    async def scenario() -> list[dict]:
+        channel = hub.join(draft_id, alice)
+        hub.join(draft_id, bob)
+        replies = []
+        for message in (
+            _retitle("a1", 0, "A", "a"),
+            # bob はまだ seq 0 を見ているので、title は alice の変更が残る。
+            _message(
+                "b1",
+                0,
+                "task_updated",
+                {"task_id": "task_01", "fields": {"title": "B", "estimated_minutes": 30}},
+                "b",
+            ),
+            _retitle("b2", 0, "C", "b"),
+            # 同じ送り主が確認を待たずに続けた変更は競合にしない。
+            _retitle("a2", 1, "D", "a"),
+        ):
+            reply, _ = await channel.submit(message)
+            replies.append(reply)
+        return replies
+
+    a1, b1, b2, a2 = asyncio.run(scenario())
+    assert [message["op_id"] for message in alice.received] == ["a1", "b1", "a2"]
+    assert alice.received == bob.received
+    assert b1["event"]["data"]["fields"] == {"estimated_minutes": 30}
+    assert b1["dropped"] == [["task", "task_01", "title"]]
+    assert (b2["type"], b2["seq"], b2["resync"]) == ("conflict", 2, False)
+    assert (a2["type"], a2["seq"]) == ("patch", 3)
+
+    task = next(task for task in store.load(draft_id)[1].tasks if task.id == "task_01")
+    assert (task.title, task.estimated_minutes) == ("D", 30)
+
+
+def test_edit_older_than_recent_window_requires_resync(tmp_path, example_bundle) -> None:
+    store = DraftStore(tmp_path)
+    draft_id = store.create(example_bundle)
+    store.append(draft_id, "task_status_changed", {"task_id": "task_01", "status": "done"})
+    channel = SyncHub(store).join(draft_id, _Socket())
+    data = {"task_id": "task_02", "fields": {"title": "X"}}
+    message = _message("op", 0, "task_updated", data, "a")
+    reply, broadcast = asyncio.run(channel.submit(message))
+    assert not broadcast
+    assert (reply["type"], reply["resync"]) == ("conflict", True)
+
+
+def test_rest_and_out_of_band_events_reach_the_channel(tmp_path, example_bundle) -> None:
+    store = DraftStore(tmp_path)
+    draft_id = store.create(example_bundle)
+    hub = SyncHub(store)
+    alice, bob = _Socket(), _Socket()
+
+    async def scenario() -> None:
+        channel = hub.join(draft_id, alice)
+        await channel.hello(alice)
+        # REST からの追記はチャネルを通って配られ、集計と競合判定にも載る。
+        await hub.append(draft_id, "task_status_changed", {"task_id": "task_01", "status": "done"})
+        stale = SyncMessage.model_validate(_status("a1", 0, "task_01", "todo", "a"))
+        await channel.submit(stale, alice)
+        # チャネルを通らない追記も、次の操作の前に取り込まれて配られる。
+        store.append(draft_id, "task_status_changed", {"task_id": "task_02", "status": "done"})
+        hub.join(draft_id, bob)
+        await channel.hello(bob)
+
+    asyncio.run(scenario())
+    kinds = [(message["type"], message["seq"]) for message in alice.received]
+    assert kinds == [("hello", 0), ("patch", 1), ("conflict", 1), ("patch", 2)]
+    assert alice.received[1]["days"][0]["done_count"] == 1
+    assert [(day["id"], day["done_count"]) for day in alice.received[3]["days"]] == [
+        ("2026-W03-2026-01-20", 1)
+    ]
+    assert [(message["type"], message["seq"]) for message in bob.received] == [("hello", 2)]
+    days = {day["id"]: day for day in bob.received[0]["bundle"]["days"]}
+    assert days["2026-W03-2026-01-19"]["done_count"] == 1
+    assert days["2026-W03-2026-01-20"]["done_count"] == 1
+
+
+class _SlowStore(DraftStore):
+    # 別プロセスがファイルロックを持っている状態の代わりに、読み込みを遅らせる。
+    def load(self, draft_id: str):
+        time.sleep(0.2)
+        return super().load(draft_id)
+
+
+def test_store_reads_do_not_block_the_event_loop(tmp_path, example_bundle) -> None:
+    store = _SlowStore(tmp_path)
+    draft_id = store.create(example_bundle)
+    hub = SyncHub(store)
+    socket = _Socket()
+
+    async def scenario() -> int:
+        ticks = 0
+
+        async def tick() -> None:
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        await hub.join(draft_id, socket).hello(socket)
+        ticker.cancel()
+        return ticks
+
+    assert asyncio.run(scenario()) >= 5
+    assert socket.received[0]["type"] == "hello"
+
+
+def test_malformed_frames_get_error_replies(tmp_path, example_bundle) -> None:
+    draft_id = DraftStore(tmp_path).create(example_bundle)
+    client = TestClient(create_app(draft_dir=str(tmp_path)))
+    with client.websocket_connect(f"/api/drafts/{draft_id}/ws") as socket:
+        socket.receive_json()
+        frames = [
+            "not json",
+            json.dumps({"type": "event", "base_seq": "x"}),
+            json.dumps({"type": "event", "event": "oops"}),
+            json.dumps(
+                _event("op", 0, "task_updated", {"task_id": "task_01", "fields": ["title"]}, "a")
+            ),
+            json.dumps({"type": "event"}),
+        ]
+        for frame in frames:
+            socket.send_text(frame)
+            assert socket.receive_json()["type"] == "error"
+        socket.send_json(_status("op1", 0, "task_01", "done", "a"))
+        assert socket.receive_json()["type"] == "patch"
+
+
+def test_unknown_draft_closes_socket(tmp_path) -> None:
+    client = TestClient(create_app(draft_dir=str(tmp_path)))
+    with pytest.raises(WebSocketDisconnect) as exc_info:
+        with client.websocket_connect("/api/drafts/missing/ws") as socket:
+            socket.receive_json()
+    assert exc_info.value.code == 4404
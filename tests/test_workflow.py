@@ -79,5 +79,5 @@ def test_metrics_and_snapshot_flow() -> None:
     assert updated_days[0].total_count == 1
 
     snapshot = build_snapshot(updated_bundle, pdf_path="out.pdf", json_path="out.json")
-    assert snapshot["schema_version"] == "1.0"
+    assert snapshot["schema_version"] == "1.3"
     assert snapshot["next_week_days"][0]["planned_minutes"] == 90
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+# 重いエンドポイントの受付制御。
+# 接続元ごとのトークンバケットで呼び出し頻度を抑え、PDF生成は全体の同時実行数で抑える。
+# どちらも待たせ続けずに短時間で 429 と Retry-After を返し、クライアント側の再試行に任せる。
+RATE_PER_MINUTE = 30.0
+BURST = 10
+PDF_CONCURRENCY = 2
+PDF_QUEUE_SECONDS = 1.0
+MAX_TRACKED_USERS = 10_000
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+@dataclass
+class TokenBucket:
+    rate: float
+    capacity: float
+    tokens: float
+    updated: float
+
+    def take(self, now: float) -> float:
+        # 取れたら 0、取れなければ次のトークンまでの秒数を返す。
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        *,
+        rate_per_minute: float = RATE_PER_MINUTE,
+        burst: int = BURST,
+        pdf_concurrency: int = PDF_CONCURRENCY,
+        pdf_queue_seconds: float = PDF_QUEUE_SECONDS,
+        max_users: int = MAX_TRACKED_USERS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(burst, 1)
+        self.pdf_concurrency = max(pdf_concurrency, 1)
+        self.pdf_queue_seconds = pdf_queue_seconds
+        self.max_users = max_users
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self._pdf_slots = threading.BoundedSemaphore(self.pdf_concurrency)
+        self._pdf_seconds = 0.0
+        self._counters = {
+            "admitted": 0,
+            "rejected_rate": 0,
+            "pdf_started": 0,
+            "pdf_rejected": 0,
+            "pdf_in_flight": 0,
+            "pdf_queued": 0,
+            "pdf_queue_peak": 0,
+        }
+
+    def admit(self, client_key: str) -> None:
+        with self._lock:
+            now = self.clock()
+            bucket = self._buckets.get(client_key)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, float(self.burst), float(self.burst), now)
+                self._buckets[client_key] = bucket
+                # 長く来ていない接続元から忘れる（忘れても満タンのバケットから再開するだけ）。
+                while len(self._buckets) > self.max_users:
+                    self._buckets.popitem(last=False)
+            self._buckets.move_to_end(client_key)
+            wait = bucket.take(now)
+            if wait:
+                self._counters["rejected_rate"] += 1
+                raise AdmissionRejected("rate_limited", wait)
+            self._counters["admitted"] += 1
+
+    def _pdf_retry_after(self) -> float:
+        # 直近の平均生成時間から、枠が空くまでのおおよその時間を見積もる。
+        started = self._counters["pdf_started"]
+        average = self._pdf_seconds / started if started else 1.0
+        queued = self._counters["pdf_queued"] + self._counters["pdf_in_flight"]
+        return average * max(queued, 1) / self.pdf_concurrency
+
+    @contextmanager
+    def pdf_slot(self) -> Iterator[None]:
+        with self._lock:
+            self._counters["pdf_queued"] += 1
+            self._counters["pdf_queue_peak"] = max(
+                self._counters["pdf_queue_peak"], self._counters["pdf_queued"]
+            )
+        acquired = self._pdf_slots.acquire(timeout=self.pdf_queue_seconds)
+        with self._lock:
+            self._counters["pdf_queued"] -= 1
+            if not acquired:
+                self._counters["pdf_rejected"] += 1
+                raise AdmissionRejected("pdf_busy", self._pdf_retry_after())
+            self._counters["pdf_started"] += 1
+            self._counters["pdf_in_flight"] += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._counters["pdf_in_flight"] -= 1
+                self._pdf_seconds += elapsed
+            self._pdf_slots.release()
+
+    def stats(self) -> dict[str, float | int]:
+        with self._lock:
+            return {
+                **self._counters,
+                "tracked_users": len(self._buckets),
+                "rate_per_minute": self.rate * 60,
+                "burst": self.burst,
+                "pdf_concurrency": self.pdf_concurrency,
+                "pdf_queue_seconds": self.pdf_queue_seconds,
+            }
@@ -1,83 +1,345 @@
 from __future__ import annotations
 
-from dataclasses import replace
+from contextlib import nullcontext
+from dataclasses import asdict
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+from fastapi import (
+    FastAPI,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.encoders import jsonable_encoder
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 
-from weekly_reports.metrics import update_day_metrics
-from weekly_reports.models import WeekReportBundle, build_bundle, bundle_to_dict
-from weekly_reports.snapshot import build_snapshot
-from weekly_reports.workflow import init_week_report
+from weekly_reports.admission import AdmissionController, AdmissionRejected
+from weekly_reports.carryover import CarryOverIndex
+from weekly_reports.cohort import CohortDashboard
+from weekly_reports.drafts import DraftNotFound, DraftStore
+from weekly_reports.goals import GoalStore
+from weekly_reports.middleware import AdmissionMiddleware, GzipRequestMiddleware
+from weekly_reports.models import WeekReportBundle
+from weekly_reports.profiling import NullProfiler, StageProfiler, make_profiler
+from weekly_reports.render import MEDIA_TYPES, RENDERERS, iter_buffered
+from weekly_reports.rollups import iter_compiled_json, iter_rollups, write_compiled_pdf
+from weekly_reports.schemas import BundleSchema, FinalizeResponse, LenientBundle
+from weekly_reports.sync import SyncHub, SyncMessage
+from weekly_reports.workflow import finalize_week_report, init_week_report
 
 
 class InitWeekRequest(BaseModel):
     review_at: datetime = Field(..., description="Review datetime in ISO format")
-    prev_bundle: dict[str, Any] | None = None
+    prev_bundle: LenientBundle | None = None
+    carry_over: bool = True
 
 
 class FinalizeRequest(BaseModel):
-    bundle: dict[str, Any]
+    bundle: LenientBundle
     output_dir: str = "outputs"
     generate_pdf: bool = True
+    pdf_sessions: Literal["full", "summary"] = "full"
+    report_format: Literal["pdf", "html", "markdown"] = "pdf"
 
 
-def create_app() -> FastAPI:
+class RenderRequest(BaseModel):
+    bundle: LenientBundle
+    report_format: Literal["html", "markdown"] = "html"
+    sessions: Literal["full", "summary"] = "full"
+
+
+class CompileRequest(BaseModel):
+    from_week: str = Field(..., pattern=r"^\d{4}-W\d{2}$")
+    to_week: str = Field(..., pattern=r"^\d{4}-W\d{2}$")
+    output_dir: str = "outputs"
+    report_format: Literal["json", "pdf"] = "json"
+
+
+class DraftEventRequest(BaseModel):
+    type: str
+    data: dict[str, Any] = Field(default_factory=dict)
+
+
+class DraftResponse(BaseModel):
+    draft_id: str
+    seq: int
+    bundle: BundleSchema
+
+
+def _request_profiler(header: str | None) -> StageProfiler | NullProfiler:
+    # X-Profile: 1 でCPUプロファイル、X-Profile: memory でピークメモリも計測する。
+    value = (header or "").strip().lower()
+    enabled = value not in ("", "0", "false", "off")
+    return make_profiler(enabled, memory=value == "memory")
+
+
+# build_bundle 時代と同じく、バンドルの中身の不備は 400 で返す。
+_BUNDLE_FIELDS = ("bundle", "prev_bundle")
+
+
+def _in_bundle(error: dict[str, Any]) -> bool:
+    loc = error.get("loc", ())
+    return len(loc) > 1 and loc[0] == "body" and loc[1] in _BUNDLE_FIELDS
+
+
+def _rejected(exc: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=exc.reason,
+        headers={"Retry-After": exc.retry_after_header},
+    )
+
+
+def create_app(
+    profile_dir: str = "outputs/profiles",
+    draft_dir: str = "outputs/drafts",
+    cohort_dir: str = "outputs/cohort",
+    admission: AdmissionController | None = None,
+) -> FastAPI:
     app = FastAPI(title="Weekly Reports API")
+    admission = admission or AdmissionController()
+
+    # バンドルは大きくなりやすいので、リクエスト・レスポンスとも gzip を受け付ける。
+    app.add_middleware(GZipMiddleware, minimum_size=1024)
+    app.add_middleware(GzipRequestMiddleware)
+    # 最後に足したものが一番外側になる。断るリクエストはボディを読まずに返す。
+    app.add_middleware(AdmissionMiddleware, admission=admission)
+    drafts = DraftStore(Path(draft_dir))
+    cohort = CohortDashboard(Path(cohort_dir))
+    hub = SyncHub(drafts)
+
+    @app.exception_handler(RequestValidationError)
+    async def bundle_errors(request: Request, exc: RequestValidationError) -> Response:
+        errors = exc.errors()
+        if errors and all(_in_bundle(error) for error in errors):
+            return JSONResponse({"detail": jsonable_encoder(errors)}, status_code=400)
+        return await request_validation_exception_handler(request, exc)
 
     @app.get("/api/health")
     def health() -> dict[str, str]:
         return {"status": "ok"}
 
-    @app.post("/api/weeks/init")
-    def init_week(request: InitWeekRequest) -> dict[str, Any]:
+    @app.get("/api/admission/stats")
+    def admission_stats() -> dict[str, float | int]:
+        return admission.stats()
+
+    @app.post("/api/weeks/init", response_model=BundleSchema)
+    def init_week(
+        request: InitWeekRequest,
+        response: Response,
+        x_profile: str | None = Header(default=None),
+    ) -> BundleSchema:
+        profiler = _request_profiler(x_profile)
         prev_bundle: WeekReportBundle | None = None
         if request.prev_bundle:
-            prev_bundle = build_bundle(request.prev_bundle)
-        bundle = init_week_report(request.review_at, prev_bundle)
-        return bundle_to_dict(bundle)
+            try:
+                with profiler.stage("build_bundle"):
+                    prev_bundle = request.prev_bundle.to_bundle()
+            except ValueError as exc:
+                raise HTTPException(status_code=400, detail=str(exc)) from exc
+        with profiler.stage("init_week_report"):
+            bundle = init_week_report(
+                request.review_at, prev_bundle, carry_over=request.carry_over
+            )
+        if profiler.enabled:
+            report_path = profiler.write_reports(
+                Path(profile_dir), f"{bundle.report.week_id}_init"
+            )
+            response.headers["X-Profile-Report"] = str(report_path)
+        return BundleSchema.from_bundle(bundle)
 
-    @app.post("/api/weeks/finalize")
-    def finalize_week(request: FinalizeRequest) -> dict[str, Any]:
+    @app.post("/api/weeks/finalize", response_model=FinalizeResponse)
+    def finalize_week(
+        request: FinalizeRequest,
+        response: Response,
+        x_profile: str | None = Header(default=None),
+    ) -> FinalizeResponse:
+        profiler = _request_profiler(x_profile)
         try:
-            bundle = build_bundle(request.bundle)
+            with profiler.stage("build_bundle"):
+                bundle = request.bundle.to_bundle()
         except ValueError as exc:
             raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-        updated_days = update_day_metrics(bundle.days, bundle.tasks, bundle.task_sessions)
-        report = replace(bundle.report, status="final", updated_at=datetime.now())
-        updated_bundle = WeekReportBundle(
-            report=report,
-            days=updated_days,
-            tasks=bundle.tasks,
-            task_sessions=bundle.task_sessions,
-            last_week_tasks=bundle.last_week_tasks,
+        output_dir = Path(request.output_dir)
+        renders_pdf = request.generate_pdf and request.report_format == "pdf"
+        try:
+            slot = admission.pdf_slot() if renders_pdf else nullcontext()
+            with slot:
+                result = finalize_week_report(
+                    bundle,
+                    output_dir,
+                    generate_pdf=request.generate_pdf,
+                    session_mode=request.pdf_sessions,
+                    report_format=request.report_format,
+                    profiler=profiler,
+                )
+        except AdmissionRejected as exc:
+            raise _rejected(exc) from exc
+        if profiler.enabled:
+            # 解析用のレポートは成果物と同じディレクトリに置く。
+            report_path = profiler.write_reports(output_dir, f"{bundle.report.week_id}_finalize")
+            response.headers["X-Profile-Report"] = str(report_path)
+        return FinalizeResponse(
+            bundle=BundleSchema.from_bundle(result.bundle),
+            snapshot=result.snapshot,
+            report_path=str(result.report_path) if result.report_path else None,
+        )
+
+    @app.post("/api/weeks/render")
+    def render_week(request: RenderRequest) -> StreamingResponse:
+        # PDFを介さずにHTML/Markdownを逐次返す（ファイルには書かない）。
+        try:
+            bundle = request.bundle.to_bundle()
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        renderer = RENDERERS[request.report_format]
+        return StreamingResponse(
+            iter_buffered(renderer(bundle, session_mode=request.sessions)),
+            media_type=MEDIA_TYPES[request.report_format],
         )
+
+    @app.post("/api/compile", response_model=None)
+    def compile_weeks(request: CompileRequest) -> StreamingResponse | FileResponse:
+        if request.to_week < request.from_week:
+            raise HTTPException(status_code=400, detail="to_week must be on or after from_week.")
         output_dir = Path(request.output_dir)
+        if request.report_format == "json":
+            rollups = iter_rollups(output_dir, request.from_week, request.to_week)
+            return StreamingResponse(
+                iter_buffered(iter_compiled_json(rollups, request.from_week, request.to_week)),
+                media_type="application/json",
+            )
         output_dir.mkdir(parents=True, exist_ok=True)
-        pdf_path = output_dir / f"{bundle.report.week_id}_weekly_report.pdf"
-        json_path = output_dir / f"{bundle.report.week_id}_snapshot.json"
+        try:
+            with admission.pdf_slot():
+                pdf_path = write_compiled_pdf(
+                    output_dir,
+                    request.from_week,
+                    request.to_week,
+                    output_dir / f"compile_{request.from_week}_{request.to_week}.pdf",
+                )
+        except AdmissionRejected as exc:
+            raise _rejected(exc) from exc
+        return FileResponse(pdf_path, media_type="application/pdf", filename=pdf_path.name)
 
-        if request.generate_pdf:
-            # PDF生成が必要な時だけ reportlab を読み込み、テスト時の依存を軽くする。
-            from weekly_reports.pdf import generate_pdf
+    @app.post("/api/drafts", response_model=DraftResponse)
+    def create_draft(bundle: LenientBundle) -> DraftResponse:
+        try:
+            draft_id = drafts.create(bundle.to_bundle())
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return DraftResponse(draft_id=draft_id, seq=0, bundle=bundle)
 
-            generate_pdf(updated_bundle, str(pdf_path))
-        snapshot = build_snapshot(updated_bundle, pdf_path=str(pdf_path), json_path=str(json_path))
-        json_path.write_text(snapshot_json(snapshot), encoding="utf-8")
+    @app.get("/api/drafts/{draft_id}", response_model=DraftResponse)
+    def get_draft(draft_id: str) -> DraftResponse:
+        try:
+            seq, bundle = drafts.load(draft_id)
+        except DraftNotFound as exc:
+            raise HTTPException(status_code=404, detail="Draft not found") from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return DraftResponse(draft_id=draft_id, seq=seq, bundle=BundleSchema.from_bundle(bundle))
 
-        return {
-            "bundle": bundle_to_dict(updated_bundle),
-            "snapshot": snapshot,
-        }
+    @app.post("/api/drafts/{draft_id}/events")
+    async def append_draft_event(draft_id: str, request: DraftEventRequest) -> dict[str, Any]:
+        # 接続中のクライアントがいれば、WebSocket と同じ経路で配信される。
+        try:
+            return await hub.append(draft_id, request.type, request.data)
+        except DraftNotFound as exc:
+            raise HTTPException(status_code=404, detail="Draft not found") from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    return app
+    @app.get("/api/drafts/{draft_id}/events")
+    def draft_history(draft_id: str, since: int = Query(default=0, ge=0)) -> dict[str, Any]:
+        try:
+            events = [asdict(event) for event in drafts.history(draft_id, since)]
+        except DraftNotFound as exc:
+            raise HTTPException(status_code=404, detail="Draft not found") from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return {"draft_id": draft_id, "events": events}
+
+    @app.get("/api/sync/stats")
+    def sync_stats() -> dict[str, int]:
+        return hub.stats()
+
+    @app.websocket("/api/drafts/{draft_id}/ws")
+    async def draft_sync(websocket: WebSocket, draft_id: str) -> None:
+        # 同じ下書きを開いている全員に、確定した変更と変わった日の集計だけを配る。
+        await websocket.accept()
+        try:
+            channel = hub.join(draft_id, websocket)
+        except DraftNotFound:
+            await websocket.close(code=4404, reason="Draft not found")
+            return
+        try:
+            await channel.hello(websocket)
+            while True:
+                frame = await websocket.receive()
+                if frame["type"] == "websocket.disconnect":
+                    break
+                try:
+                    message = SyncMessage.model_validate_json(
+                        frame.get("text") or frame.get("bytes") or ""
+                    )
+                except ValidationError as exc:
+                    errors = exc.errors(
+                        include_url=False, include_context=False, include_input=False
+                    )
+                    await channel.reply(
+                        websocket, {"type": "error", "op_id": None, "detail": errors}
+                    )
+                    continue
+                if message.type == "resync":
+                    await channel.hello(websocket)
+                else:
+                    await channel.submit(message, websocket)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            hub.leave(channel, websocket)
+
+    @app.get("/api/cohort/{week_id}")
+    def cohort_week(week_id: str) -> dict[str, Any]:
+        # 生徒ごとの rollups.jsonl から、指定週の完了率・見積/実績時間・課題タグを横断集計する。
+        try:
+            return cohort.week(week_id)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
 
+    @app.get("/api/goals/{goal_id}")
+    def goal_weeks(goal_id: str, output_dir: str = "outputs") -> dict[str, Any]:
+        # goals.json の索引から、目標に関わった週と週ごとの進捗を返す。
+        store = GoalStore(Path(output_dir))
+        goal = store.get(goal_id)
+        if goal is None:
+            raise HTTPException(status_code=404, detail="Goal not found")
+        return {
+            "goal": goal,
+            "weeks": store.weeks_for_goal(goal_id),
+            "history": store.history(goal_id),
+        }
 
-def snapshot_json(snapshot: dict[str, Any]) -> str:
-    import json
+    @app.get("/api/tasks/{task_id}/carryover")
+    def task_carryover(task_id: str, output_dir: str = "outputs") -> dict[str, Any]:
+        index = CarryOverIndex(Path(output_dir))
+        return {
+            "task_id": task_id,
+            "root_task_id": index.root(task_id),
+            "depth": index.depth(task_id),
+            "chain": index.chain(task_id),
+        }
 
-    return json.dumps(snapshot, ensure_ascii=False, indent=2)
+    return app
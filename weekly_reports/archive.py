@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import re
+import threading
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from weekly_reports.jsonstore import file_lock
+from weekly_reports.migrations import UpgradeCache
+
+# 1ユーザー1組の追記専用ログとインデックスで構成する。
+#   {user_id}.wrlog : zlib圧縮したレコードを追記していくだけのログ
+#   {user_id}.wridx : "kind\tweek_id\toffset\tlength" の1行1レコード
+# 同じ (kind, week_id) が再度追記された場合は後勝ちとする。
+LOG_SUFFIX = ".wrlog"
+INDEX_SUFFIX = ".wridx"
+KIND_SNAPSHOT = "snapshot"
+KIND_PDF = "pdf"
+
+SNAPSHOT_SUFFIX = "_snapshot.json"
+PDF_SUFFIX = "_weekly_report.pdf"
+_WEEK_ID_PATTERN = re.compile(r"^\d{4}-W\d{2}$")
+_USER_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+@dataclass(frozen=True)
+class ArchiveEntry:
+    kind: str
+    week_id: str
+    offset: int
+    length: int
+
+
+class SnapshotArchive:
+    def __init__(self, archive_dir: Path, user_id: str = "default") -> None:
+        if not _USER_ID_PATTERN.match(user_id):
+            raise ValueError(f"Invalid user_id: {user_id}")
+        self.archive_dir = Path(archive_dir)
+        self.user_id = user_id
+        self.log_path = self.archive_dir / f"{user_id}{LOG_SUFFIX}"
+        self.index_path = self.archive_dir / f"{user_id}{INDEX_SUFFIX}"
+        self._index: dict[tuple[str, str], ArchiveEntry] | None = None
+        self._index_size = 0
+        self._upgraded = UpgradeCache()
+        self._append_lock = threading.Lock()
+        self._index_lock = threading.Lock()
+
+    def _load_index(self) -> dict[tuple[str, str], ArchiveEntry]:
+        with self._index_lock:
+            return self._read_index()
+
+    def _read_index(self) -> dict[tuple[str, str], ArchiveEntry]:
+        # インデックスは追記のみなので、前回読んだ位置以降だけを読み足す。
+        if self._index is None:
+            self._index = {}
+            self._index_size = 0
+        if not self.index_path.exists():
+            return self._index
+        size = self.index_path.stat().st_size
+        if size == self._index_size:
+            return self._index
+        with self.index_path.open("rb") as handle:
+            handle.seek(self._index_size)
+            chunk = handle.read()
+        # 書き込み途中の行は次回に回す。
+        consumed = chunk.rfind(b"\n") + 1
+        for line in chunk[:consumed].decode("utf-8").splitlines():
+            kind, week_id, offset, length = line.split("\t")
+            self._index[(kind, week_id)] = ArchiveEntry(kind, week_id, int(offset), int(length))
+        self._index_size += consumed
+        return self._index
+
+    def entries(self, kind: str | None = None) -> list[ArchiveEntry]:
+        index = self._load_index()
+        return sorted(
+            (entry for entry in index.values() if kind is None or entry.kind == kind),
+            key=lambda entry: (entry.week_id, entry.kind),
+        )
+
+    def week_ids(self, kind: str = KIND_SNAPSHOT) -> list[str]:
+        return [entry.week_id for entry in self.entries(kind)]
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        return key in self._load_index()
+
+    def append(self, kind: str, week_id: str, payload: bytes) -> ArchiveEntry:
+        if "\t" in kind or "\n" in kind or not _WEEK_ID_PATTERN.match(week_id):
+            raise ValueError(f"Invalid archive key: {kind}/{week_id}")
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        compressed = zlib.compress(payload, 6)
+        # 位置は書いた後の末尾から求める。他の書き手が割り込まないようロックの中で行う。
+        with self._append_lock, self.log_path.open("ab") as log, file_lock(self.log_path):
+            log.write(compressed)
+            log.flush()
+            os.fsync(log.fileno())
+            offset = log.tell() - len(compressed)
+            entry = ArchiveEntry(kind, week_id, offset, len(compressed))
+            # ログ本体を書き終えてからインデックスに追記する（途中で落ちても不整合にならない）。
+            with self.index_path.open("a", encoding="utf-8") as index:
+                index.write(f"{kind}\t{week_id}\t{offset}\t{len(compressed)}\n")
+        self._load_index()
+        return entry
+
+    def append_snapshot(self, snapshot: dict[str, Any]) -> ArchiveEntry:
+        payload = json.dumps(snapshot, ensure_ascii=False, separators=(",", ":"))
+        return self.append(KIND_SNAPSHOT, snapshot["week_id"], payload.encode("utf-8"))
+
+    def read(self, kind: str, week_id: str) -> bytes:
+        entry = self._load_index().get((kind, week_id))
+        if entry is None:
+            raise KeyError(f"{kind} not archived: {week_id}")
+        # 対象レコードの範囲だけをmmap経由で読むので、ログ全体は走査しない。
+        with self.log_path.open("rb") as log:
+            # 空のファイルは mmap できないので、範囲が収まらない場合と合わせて先に弾く。
+            if entry.offset + entry.length > os.fstat(log.fileno()).st_size or not entry.length:
+                raise ValueError(f"Archive log is truncated: {kind}/{week_id}")
+            with mmap.mmap(log.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                compressed = mapped[entry.offset : entry.offset + entry.length]
+        return zlib.decompress(compressed)
+
+    def read_raw_snapshot(self, week_id: str) -> bytes:
+        return self.read(KIND_SNAPSHOT, week_id)
+
+    def read_snapshot(self, week_id: str) -> dict[str, Any]:
+        # 古いスキーマは読み込み時に現行版へ上げる。レコードの位置をキーに変換結果をキャッシュする。
+        entry = self._load_index().get((KIND_SNAPSHOT, week_id))
+        if entry is None:
+            raise KeyError(f"{KIND_SNAPSHOT} not archived: {week_id}")
+        return self._upgraded.get_or_upgrade(
+            (entry.offset, entry.length),
+            lambda: json.loads(self.read_raw_snapshot(week_id)),
+        )
+
+    def read_pdf(self, week_id: str) -> bytes:
+        return self.read(KIND_PDF, week_id)
+
+
+@dataclass(frozen=True)
+class CompactionResult:
+    archived_snapshots: tuple[str, ...] = ()
+    archived_pdfs: tuple[str, ...] = ()
+    kept_weeks: tuple[str, ...] = ()
+
+
+def _loose_artifacts(output_dir: Path) -> dict[str, dict[str, Path]]:
+    artifacts: dict[str, dict[str, Path]] = {}
+    for path in output_dir.iterdir():
+        if not path.is_file():
+            continue
+        for suffix, kind in ((SNAPSHOT_SUFFIX, KIND_SNAPSHOT), (PDF_SUFFIX, KIND_PDF)):
+            if path.name.endswith(suffix):
+                week_id = path.name[: -len(suffix)]
+                if _WEEK_ID_PATTERN.match(week_id):
+                    artifacts.setdefault(week_id, {})[kind] = path
+    return artifacts
+
+
+def compact_outputs(
+    output_dir: Path,
+    archive: SnapshotArchive,
+    *,
+    keep_weeks: int = 4,
+) -> CompactionResult:
+    # 直近 keep_weeks 週分はそのまま残し、それより古い成果物をアーカイブへ移す。
+    if keep_weeks < 0:
+        raise ValueError("keep_weeks must be zero or positive.")
+    output_dir = Path(output_dir)
+    if not output_dir.exists():
+        return CompactionResult()
+    artifacts = _loose_artifacts(output_dir)
+    week_ids = sorted(artifacts)
+    split = max(len(week_ids) - keep_weeks, 0)
+    old_weeks, kept = week_ids[:split], week_ids[split:]
+
+    archived_snapshots: list[str] = []
+    archived_pdfs: list[str] = []
+    for week_id in old_weeks:
+        files = artifacts[week_id]
+        snapshot_path = files.get(KIND_SNAPSHOT)
+        if snapshot_path is not None:
+            # 整形済みJSONは詰めて保存し直す。
+            snapshot = json.loads(snapshot_path.read_text(encoding="utf-8"))
+            archive.append_snapshot({**snapshot, "week_id": week_id})
+            snapshot_path.unlink()
+            archived_snapshots.append(week_id)
+        pdf_path = files.get(KIND_PDF)
+        if pdf_path is not None:
+            archive.append(KIND_PDF, week_id, pdf_path.read_bytes())
+            pdf_path.unlink()
+            archived_pdfs.append(week_id)
+    return CompactionResult(
+        archived_snapshots=tuple(archived_snapshots),
+        archived_pdfs=tuple(archived_pdfs),
+        kept_weeks=tuple(kept),
+    )
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable
+from uuid import uuid4
+
+from weekly_reports.jsonstore import JsonFile
+from weekly_reports.models import Day, Task, WeekReportBundle
+
+# 前週の未完了（todo）タスクを新しい週へ繰り越す。
+# 繰り越したタスクは origin_task_id で繰り越し元を指し、確定時に carryover.json の索引へ載せる。
+#   tasks  : task_id -> {"root": 最初のタスクID, "depth": 繰り越し回数, "week_id"}
+#   chains : root -> [root, 1回目の繰り越し, 2回目, ...]
+CARRYOVER_FILE = "carryover.json"
+
+
+def _carried_day_id(task: Task, prev_bundle: WeekReportBundle, days: tuple[Day, ...]) -> str:
+    # 前週と同じ曜日（サイクル開始からの日数が同じ日）に置く。見つからなければ初日。
+    prev_dates = {day.id: day.date for day in prev_bundle.days}
+    prev_date = prev_dates.get(task.day_id)
+    if prev_date is not None:
+        offset = (prev_date - prev_bundle.report.cycle_start).days
+        if 0 <= offset < len(days):
+            return days[offset].id
+    return days[0].id
+
+
+def carry_over_tasks(
+    prev_bundle: WeekReportBundle,
+    report_id: str,
+    days: tuple[Day, ...],
+    now: datetime,
+) -> tuple[tuple[Task, ...], tuple[Task, ...]]:
+    # (新しい週のタスク, 先週の宿題) を返す。先週の宿題では繰り越した分を carried_over にする。
+    carried: list[Task] = []
+    last_week: list[Task] = []
+    for task in prev_bundle.tasks:
+        if task.status != "todo":
+            last_week.append(task)
+            continue
+        last_week.append(replace(task, status="carried_over"))
+        carried.append(
+            replace(
+                task,
+                id=f"task_{uuid4().hex[:8]}",
+                week_report_id=report_id,
+                day_id=_carried_day_id(task, prev_bundle, days),
+                origin_task_id=task.id,
+                created_at=now,
+                updated_at=now,
+            )
+        )
+    return tuple(carried), tuple(last_week)
+
+
+def _empty() -> dict[str, Any]:
+    return {"tasks": {}, "chains": {}}
+
+
+class CarryOverIndex:
+    def __init__(self, output_dir: Path) -> None:
+        self.path = Path(output_dir) / CARRYOVER_FILE
+        self._file = JsonFile.shared(self.path, _empty)
+
+    def depth(self, task_id: str) -> int:
+        # 何週繰り越されてきたか。繰り越しでないタスクは 0。
+        with self._file.read() as data:
+            entry = data["tasks"].get(task_id)
+            return entry["depth"] if entry else 0
+
+    def root(self, task_id: str) -> str:
+        with self._file.read() as data:
+            entry = data["tasks"].get(task_id)
+            return entry["root"] if entry else task_id
+
+    def chain(self, task_id: str) -> list[str]:
+        with self._file.read() as data:
+            entry = data["tasks"].get(task_id)
+            root = entry["root"] if entry else task_id
+            return list(data["chains"].get(root, [task_id]))
+
+    def record(self, week_id: str, tasks: Iterable[Task]) -> int:
+        carried = [task for task in tasks if task.origin_task_id]
+        if not carried:
+            return 0
+        with self._file.update() as data:
+            for task in carried:
+                # 繰り越し元の情報だけを見て根と深さを決めるので、過去の週を辿らない。
+                parent = data["tasks"].get(task.origin_task_id)
+                root = parent["root"] if parent else task.origin_task_id
+                depth = parent["depth"] + 1 if parent else 1
+                data["tasks"][task.id] = {"root": root, "depth": depth, "week_id": week_id}
+                chain = data["chains"].setdefault(root, [root])
+                if task.id not in chain:
+                    chain.append(task.id)
+        return len(carried)
@@ -2,19 +2,30 @@ from __future__ import annotations
 
 import argparse
 import json
-from dataclasses import replace
+import sys
 from datetime import datetime
+from itertools import chain
 from pathlib import Path
+from typing import Any, Iterable
 
-from weekly_reports.metrics import update_day_metrics
-from weekly_reports.models import (
-    WeekReportBundle,
-    build_bundle,
-    bundle_to_dict,
+from weekly_reports.archive import SNAPSHOT_SUFFIX, SnapshotArchive, compact_outputs
+from weekly_reports.carryover import CarryOverIndex
+from weekly_reports.cohort import MAX_WORKERS, CohortDashboard
+from weekly_reports.goals import GoalStore
+from weekly_reports.importer import (
+    CHUNK_ROWS,
+    SessionImporter,
+    iter_entries,
+    load_rules,
+    write_rejects,
 )
-from weekly_reports.pdf import generate_pdf
-from weekly_reports.snapshot import build_snapshot
-from weekly_reports.workflow import init_week_report
+from weekly_reports.migrations import BulkMigrator, MigrationProgress, read_snapshot_file
+from weekly_reports.models import WeekReportBundle, bundle_to_dict
+from weekly_reports.profiling import make_profiler
+from weekly_reports.render import RENDERERS, REPORT_FORMATS, SESSION_MODES, write_report
+from weekly_reports.rollups import backfill_rollups, write_compiled_json, write_compiled_pdf
+from weekly_reports.schemas import parse_bundle_json
+from weekly_reports.workflow import finalize_week_report, init_week_report
 
 
 def _parse_datetime(raw: str) -> datetime:
@@ -22,8 +33,7 @@ def _parse_datetime(raw: str) -> datetime:
 
 
 def load_bundle(path: Path) -> WeekReportBundle:
-    payload = json.loads(path.read_text(encoding="utf-8"))
-    return build_bundle(payload)
+    return parse_bundle_json(path.read_bytes())
 
 
 def save_bundle(bundle: WeekReportBundle, output: Path) -> None:
@@ -33,36 +43,177 @@ def save_bundle(bundle: WeekReportBundle, output: Path) -> None:
 
 
 def command_init(args: argparse.Namespace) -> None:
-    prev_bundle = load_bundle(args.prev) if args.prev else None
+    profiler = make_profiler(args.profile, memory=args.profile_memory)
+    with profiler.stage("build_bundle"):
+        prev_bundle = load_bundle(args.prev) if args.prev else None
     review_at = _parse_datetime(args.review_at)
-    bundle = init_week_report(review_at, prev_bundle)
+    with profiler.stage("init_week_report"):
+        bundle = init_week_report(review_at, prev_bundle, carry_over=not args.no_carry_over)
     save_bundle(bundle, args.output)
     print(f"Initialized week report: {args.output}")
+    if profiler.enabled:
+        report_path = profiler.write_reports(args.output.parent, f"{bundle.report.week_id}_init")
+        print(f"Profile report: {report_path}")
 
 
 def command_finalize(args: argparse.Namespace) -> None:
+    profiler = make_profiler(args.profile, memory=args.profile_memory)
+    with profiler.stage("build_bundle"):
+        bundle = load_bundle(args.input)
+    result = finalize_week_report(
+        bundle,
+        args.output_dir,
+        session_mode=args.pdf_sessions,
+        report_format=args.format,
+        profiler=profiler,
+    )
+    save_bundle(result.bundle, args.bundle_output)
+    print(f"Generated snapshot: {result.json_path}")
+    print(f"Generated {args.format}: {result.report_path}")
+    if profiler.enabled:
+        report_path = profiler.write_reports(
+            args.output_dir, f"{result.bundle.report.week_id}_finalize"
+        )
+        print(f"Profile report: {report_path}")
+
+
+def command_render(args: argparse.Namespace) -> None:
     bundle = load_bundle(args.input)
-    updated_days = update_day_metrics(bundle.days, bundle.tasks, bundle.task_sessions)
-    report = replace(bundle.report, status="final", updated_at=datetime.now())
-    updated_bundle = WeekReportBundle(
-        report=report,
-        days=updated_days,
-        tasks=bundle.tasks,
-        task_sessions=bundle.task_sessions,
-        last_week_tasks=bundle.last_week_tasks,
+    if args.output:
+        write_report(bundle, str(args.output), args.format, session_mode=args.sessions)
+        print(f"Generated {args.format}: {args.output}")
+        return
+    sys.stdout.writelines(RENDERERS[args.format](bundle, session_mode=args.sessions))
+
+
+def command_compile(args: argparse.Namespace) -> None:
+    if args.backfill:
+        # 1週ずつ読んでは捨てるので、期間が長くても全スナップショットを同時に持たない。
+        snapshots: Iterable[dict[str, Any]] = (
+            read_snapshot_file(path)
+            for path in sorted(args.output_dir.glob(f"*{SNAPSHOT_SUFFIX}"))
+        )
+        if args.archive_dir:
+            archive = SnapshotArchive(args.archive_dir, args.user)
+            snapshots = chain(
+                snapshots, (archive.read_snapshot(week_id) for week_id in archive.week_ids())
+            )
+        added = backfill_rollups(
+            args.output_dir, snapshots, GoalStore(args.output_dir).definitions()
+        )
+        print(f"Backfilled rollups: {added}")
+    suffix = "json" if args.format == "json" else "pdf"
+    output = args.output or args.output_dir / f"compile_{args.from_week}_{args.to_week}.{suffix}"
+    if args.format == "json":
+        write_compiled_json(args.output_dir, args.from_week, args.to_week, output)
+    else:
+        write_compiled_pdf(args.output_dir, args.from_week, args.to_week, output)
+    print(f"Generated compilation: {output}")
+
+
+def command_cohort(args: argparse.Namespace) -> None:
+    summary = CohortDashboard(args.cohort_dir, max_workers=args.workers).week(args.week)
+    output = json.dumps(summary, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(output, encoding="utf-8")
+        print(f"Generated cohort summary: {args.output}")
+        return
+    print(output)
+
+
+def command_goals(args: argparse.Namespace) -> None:
+    store = GoalStore(args.output_dir)
+    if args.goal:
+        goal = store.get(args.goal)
+        if goal is None:
+            raise SystemExit(f"Goal not found: {args.goal}")
+        print(f"{goal['id']} [{goal['scope']}] {goal['text']}")
+        for entry in store.history(args.goal):
+            print(
+                f"  {entry['week_id']}: done {entry['done_count']}/{entry['total_count']}, "
+                f"planned {entry['planned_minutes']}m, scheduled {entry['scheduled_minutes']}m"
+            )
+        return
+    for goal in store.definitions().values():
+        weeks = store.weeks_for_goal(goal.id)
+        span = f"{weeks[0]} ~ {weeks[-1]}, {len(weeks)} weeks" if weeks else "no weeks"
+        print(f"{goal.id} [{goal.scope}] {goal.text} ({span})")
+
+
+def command_carryover(args: argparse.Namespace) -> None:
+    index = CarryOverIndex(args.output_dir)
+    print(f"Task: {args.task_id}")
+    print(f"Carried weeks: {index.depth(args.task_id)}")
+    print(f"Chain: {' -> '.join(index.chain(args.task_id))}")
+
+
+def command_import_sessions(args: argparse.Namespace) -> None:
+    bundle_paths = sorted(
+        path
+        for path in args.bundles_dir.glob("*.json")
+        if not path.name.endswith(SNAPSHOT_SUFFIX)
+    )
+    rules = load_rules(args.rules) if args.rules else []
+    importer = SessionImporter(bundle_paths, rules)
+    report = importer.run(
+        iter_entries(args.source, args.format), chunk_rows=args.chunk_rows, dry_run=args.dry_run
+    )
+    print(
+        f"Read {report.rows_read} rows in {report.elapsed_seconds:.2f}s "
+        f"({report.rows_per_second:.0f} rows/s)"
+    )
+    print(f"Imported sessions: {report.imported}")
+    print(f"Duplicates skipped: {report.duplicates}")
+    print(f"Rejected rows: {len(report.rejected)}")
+    for path, reason in report.skipped_bundles:
+        print(f"Skipped (not a bundle): {path}: {reason}")
+    for path in report.updated_bundles:
+        print(f"Updated: {path}")
+    if args.rejects:
+        write_rejects(args.rejects, report.rejected)
+        print(f"Rejected rows written: {args.rejects}")
+
+
+def command_compact(args: argparse.Namespace) -> None:
+    archive = SnapshotArchive(args.archive_dir, args.user)
+    result = compact_outputs(args.output_dir, archive, keep_weeks=args.keep_weeks)
+    print(f"Archived snapshots: {len(result.archived_snapshots)}")
+    print(f"Archived PDFs: {len(result.archived_pdfs)}")
+    print(f"Archive: {archive.log_path}")
+
+
+def command_migrate(args: argparse.Namespace) -> None:
+    def report(progress: MigrationProgress) -> None:
+        print(
+            f"Migrated {progress.processed}/{progress.total} "
+            f"(upgraded {progress.upgraded}, failed {progress.failed}, "
+            f"{progress.records_per_second:.1f} records/s)"
+        )
+
+    archive = SnapshotArchive(args.archive_dir, args.user) if args.archive_dir else None
+    migrator = BulkMigrator(
+        archive=archive,
+        output_dir=args.output_dir,
+        on_progress=report,
+        report_every=args.report_every,
     )
+    progress = migrator.start().join()
+    for error in migrator.errors:
+        print(f"Failed: {error}")
+    print(f"Done in {progress.elapsed_seconds:.2f}s")
 
-    output_dir = args.output_dir
-    output_dir.mkdir(parents=True, exist_ok=True)
-    pdf_path = output_dir / f"{report.week_id}_weekly_report.pdf"
-    json_path = output_dir / f"{report.week_id}_snapshot.json"
 
-    generate_pdf(updated_bundle, str(pdf_path))
-    snapshot = build_snapshot(updated_bundle, pdf_path=str(pdf_path), json_path=str(json_path))
-    json_path.write_text(json.dumps(snapshot, ensure_ascii=False, indent=2), encoding="utf-8")
-    save_bundle(updated_bundle, args.bundle_output)
-    print(f"Generated snapshot: {json_path}")
-    print(f"Generated PDF: {pdf_path}")
+def _add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write cProfile reports for each pipeline stage next to the outputs",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="Also record tracemalloc peak memory per stage (implies --profile)",
+    )
 
 
 def main() -> None:
@@ -73,6 +224,12 @@ def main() -> None:
     init_parser.add_argument("--review-at", required=True, help="Review datetime (ISO format)")
     init_parser.add_argument("--prev", type=Path, help="Previous week report JSON")
     init_parser.add_argument("--output", type=Path, default=Path("week_report.json"))
+    init_parser.add_argument(
+        "--no-carry-over",
+        action="store_true",
+        help="Do not carry unfinished tasks of --prev into the new week",
+    )
+    _add_profile_arguments(init_parser)
     init_parser.set_defaults(func=command_init)
 
     finalize_parser = subparsers.add_parser("finalize", help="Finalize a weekly report")
@@ -81,9 +238,112 @@ def main() -> None:
     finalize_parser.add_argument(
         "--bundle-output", type=Path, default=Path("week_report_final.json")
     )
+    finalize_parser.add_argument(
+        "--pdf-sessions",
+        choices=list(SESSION_MODES),
+        default="full",
+        help="List every session, or aggregate sessions per task and day",
+    )
+    finalize_parser.add_argument(
+        "--format",
+        choices=list(REPORT_FORMATS),
+        default="pdf",
+        help="Report format written next to the snapshot",
+    )
+    _add_profile_arguments(finalize_parser)
     finalize_parser.set_defaults(func=command_finalize)
 
+    render_parser = subparsers.add_parser(
+        "render", help="Render a week report as HTML or Markdown without finalizing"
+    )
+    render_parser.add_argument("input", type=Path, help="Week report JSON")
+    render_parser.add_argument("--format", choices=list(RENDERERS), default="markdown")
+    render_parser.add_argument("--sessions", choices=list(SESSION_MODES), default="full")
+    render_parser.add_argument("--output", type=Path, help="Output file (default: stdout)")
+    render_parser.set_defaults(func=command_render)
+
+    compile_parser = subparsers.add_parser(
+        "compile", help="Summarize finalized weeks in a range from stored weekly rollups"
+    )
+    compile_parser.add_argument("--from", dest="from_week", required=True, help="e.g. 2026-W01")
+    compile_parser.add_argument("--to", dest="to_week", required=True, help="e.g. 2026-W13")
+    compile_parser.add_argument("--output-dir", type=Path, default=Path("outputs"))
+    compile_parser.add_argument("--format", choices=["pdf", "json"], default="pdf")
+    compile_parser.add_argument("--output", type=Path, help="Output file")
+    compile_parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="Create missing rollups from loose (and --archive-dir) snapshots first",
+    )
+    compile_parser.add_argument("--archive-dir", type=Path, help="Snapshot archive directory")
+    compile_parser.add_argument("--user", default="default", help="Archive owner id")
+    compile_parser.set_defaults(func=command_compile)
+
+    cohort_parser = subparsers.add_parser(
+        "cohort", help="Aggregate one week across every student directory in a cohort"
+    )
+    cohort_parser.add_argument("--week", required=True, help="e.g. 2026-W03")
+    cohort_parser.add_argument(
+        "--cohort-dir",
+        type=Path,
+        default=Path("outputs/cohort"),
+        help="Directory containing one output directory per student",
+    )
+    cohort_parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    cohort_parser.add_argument("--output", type=Path, help="Output JSON (default: stdout)")
+    cohort_parser.set_defaults(func=command_cohort)
+
+    goals_parser = subparsers.add_parser(
+        "goals", help="List goals shared across finalized weeks, or one goal's weekly progress"
+    )
+    goals_parser.add_argument("--output-dir", type=Path, default=Path("outputs"))
+    goals_parser.add_argument("--goal", help="Goal id to show per-week progress for")
+    goals_parser.set_defaults(func=command_goals)
+
+    carryover_parser = subparsers.add_parser(
+        "carryover", help="Show how many weeks a task has been carried over"
+    )
+    carryover_parser.add_argument("task_id")
+    carryover_parser.add_argument("--output-dir", type=Path, default=Path("outputs"))
+    carryover_parser.set_defaults(func=command_carryover)
+
+    import_parser = subparsers.add_parser(
+        "import-sessions", help="Bulk import task sessions from a time-tracker CSV or ICS export"
+    )
+    import_parser.add_argument("source", type=Path, help="CSV or ICS file")
+    import_parser.add_argument(
+        "--bundles-dir", type=Path, required=True, help="Directory of week report JSON files"
+    )
+    import_parser.add_argument("--rules", type=Path, help="JSON rules mapping entries to task ids")
+    import_parser.add_argument("--format", choices=["csv", "ics"], help="Default: file suffix")
+    import_parser.add_argument("--rejects", type=Path, help="Write rejected rows to this CSV")
+    import_parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    import_parser.add_argument("--dry-run", action="store_true", help="Do not write bundles")
+    import_parser.set_defaults(func=command_import_sessions)
+
+    compact_parser = subparsers.add_parser(
+        "compact", help="Move old snapshots and PDFs into the per-user archive"
+    )
+    compact_parser.add_argument("--output-dir", type=Path, default=Path("outputs"))
+    compact_parser.add_argument("--archive-dir", type=Path, default=Path("outputs/archive"))
+    compact_parser.add_argument("--user", default="default", help="Archive owner id")
+    compact_parser.add_argument(
+        "--keep-weeks", type=int, default=4, help="Number of recent weeks to keep as loose files"
+    )
+    compact_parser.set_defaults(func=command_compact)
+
+    migrate_parser = subparsers.add_parser(
+        "migrate", help="Upgrade stored snapshots to the current schema in bulk"
+    )
+    migrate_parser.add_argument("--output-dir", type=Path, help="Directory of loose snapshots")
+    migrate_parser.add_argument("--archive-dir", type=Path, help="Snapshot archive directory")
+    migrate_parser.add_argument("--user", default="default", help="Archive owner id")
+    migrate_parser.add_argument("--report-every", type=int, default=100)
+    migrate_parser.set_defaults(func=command_migrate)
+
     args = parser.parse_args()
+    if getattr(args, "profile_memory", False):
+        args.profile = True
     args.func(args)
 
 
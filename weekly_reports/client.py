@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import random
+from datetime import datetime
+from typing import Any, Iterable
+
+import httpx
+
+from weekly_reports.models import WeekReportBundle, bundle_to_dict
+
+# APIを大量に呼ぶスクリプト向けの非同期クライアント。
+# 1つの AsyncClient の接続プールを使い回し、同時実行数をセマフォで抑える。
+# httpx は HTTP/1.1 パイプライン送信をしないので、まとめて送る処理はプール内の
+# keep-alive 接続に並行して流す。
+DEFAULT_CONCURRENCY = 8
+RETRY_STATUSES = {429, 502, 503, 504}
+# 副作用のある呼び出し（確定・下書きへの追記等）は、サーバが処理していないと分かる失敗だけ再送する。
+# 接続前の失敗と、受付制御の 429、Retry-After 付きの 503 がそれにあたる。
+NOT_PROCESSED_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+COMPRESS_MIN_BYTES = 1024
+MAX_RETRY_AFTER_SECONDS = 30.0
+
+
+class APIError(RuntimeError):
+    def __init__(self, status_code: int, detail: Any) -> None:
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _bundle_payload(bundle: WeekReportBundle | dict[str, Any]) -> dict[str, Any]:
+    if isinstance(bundle, WeekReportBundle):
+        return bundle_to_dict(bundle)
+    return bundle
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    value = response.headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return min(max(float(value), 0.0), MAX_RETRY_AFTER_SECONDS)
+    except ValueError:
+        return None
+
+
+class WeeklyReportsClient:
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        *,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_connections: int | None = None,
+        retries: int = 3,
+        backoff: float = 0.2,
+        max_backoff: float = 5.0,
+        timeout: float = 60.0,
+        compress: bool = False,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.concurrency = max(concurrency, 1)
+        self.retries = max(retries, 0)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.compress = compress
+        connections = max_connections or self.concurrency
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=connections, max_keepalive_connections=connections
+            ),
+            transport=transport,
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def __aenter__(self) -> "WeeklyReportsClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def _encode(self, payload: Any) -> tuple[bytes, dict[str, str]]:
+        # インデント無し・非ASCIIをそのまま送ると、日本語の多いバンドルは大きく縮む。
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.compress and len(body) >= COMPRESS_MIN_BYTES:
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        return body, headers
+
+    @staticmethod
+    def _retryable(
+        idempotent: bool, response: httpx.Response | None, error: httpx.TransportError | None
+    ) -> bool:
+        if error is not None:
+            return idempotent or isinstance(error, NOT_PROCESSED_ERRORS)
+        if response.status_code not in RETRY_STATUSES:
+            return False
+        if idempotent or response.status_code == 429:
+            return True
+        return response.status_code == 503 and "retry-after" in response.headers
+
+    def _delay(self, attempt: int, response: httpx.Response | None) -> float:
+        if response is not None:
+            retry_after = _retry_after(response)
+            if retry_after is not None:
+                return retry_after
+        # 指数バックオフ＋ジッタ。多数のリクエストが同じ時刻に再送されないようにする。
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        payload: Any = None,
+        params: dict[str, Any] | None = None,
+        idempotent: bool | None = None,
+    ) -> httpx.Response:
+        if idempotent is None:
+            idempotent = method.upper() in ("GET", "HEAD", "OPTIONS")
+        content, headers = self._encode(payload) if payload is not None else (None, {})
+        attempt = 0
+        while True:
+            response: httpx.Response | None = None
+            error: httpx.TransportError | None = None
+            async with self._semaphore:
+                try:
+                    response = await self._client.request(
+                        method, path, content=content, headers=headers, params=params
+                    )
+                except httpx.TransportError as exc:
+                    error = exc
+            if attempt >= self.retries or not self._retryable(idempotent, response, error):
+                if error is not None:
+                    raise error
+                if response.is_error:
+                    try:
+                        detail = response.json().get("detail")
+                    except ValueError:
+                        detail = response.text
+                    raise APIError(response.status_code, detail)
+                return response
+            # 待っている間はセマフォを手放し、他のリクエストを先に流す。
+            await asyncio.sleep(self._delay(attempt, response))
+            attempt += 1
+
+    async def health(self) -> dict[str, Any]:
+        return (await self.request("GET", "/api/health")).json()
+
+    async def init_week(
+        self,
+        review_at: datetime | str,
+        prev_bundle: WeekReportBundle | dict[str, Any] | None = None,
+        *,
+        carry_over: bool = True,
+    ) -> dict[str, Any]:
+        payload: dict[str, Any] = {
+            "review_at": review_at.isoformat() if isinstance(review_at, datetime) else review_at,
+            "carry_over": carry_over,
+        }
+        if prev_bundle is not None:
+            payload["prev_bundle"] = _bundle_payload(prev_bundle)
+        # 週の雛形を返すだけでサーバには何も残らないので、再送してよい。
+        response = await self.request("POST", "/api/weeks/init", payload=payload, idempotent=True)
+        return response.json()
+
+    async def finalize(
+        self,
+        bundle: WeekReportBundle | dict[str, Any],
+        *,
+        output_dir: str = "outputs",
+        generate_pdf: bool = True,
+        pdf_sessions: str = "full",
+        report_format: str = "pdf",
+    ) -> dict[str, Any]:
+        payload = {
+            "bundle": _bundle_payload(bundle),
+            "output_dir": output_dir,
+            "generate_pdf": generate_pdf,
+            "pdf_sessions": pdf_sessions,
+            "report_format": report_format,
+        }
+        return (await self.request("POST", "/api/weeks/finalize", payload=payload)).json()
+
+    async def render(
+        self,
+        bundle: WeekReportBundle | dict[str, Any],
+        *,
+        report_format: str = "html",
+        sessions: str = "full",
+    ) -> str:
+        payload = {
+            "bundle": _bundle_payload(bundle),
+            "report_format": report_format,
+            "sessions": sessions,
+        }
+        response = await self.request(
+            "POST", "/api/weeks/render", payload=payload, idempotent=True
+        )
+        return response.text
+
+    async def create_draft(self, bundle: WeekReportBundle | dict[str, Any]) -> dict[str, Any]:
+        return (await self.request("POST", "/api/drafts", payload=_bundle_payload(bundle))).json()
+
+    async def append_draft_event(
+        self, draft_id: str, event_type: str, data: dict[str, Any]
+    ) -> dict[str, Any]:
+        # バンドル全体を送り直さず、変更点だけをイベントとして送る。
+        payload = {"type": event_type, "data": data}
+        response = await self.request("POST", f"/api/drafts/{draft_id}/events", payload=payload)
+        return response.json()
+
+    async def get_draft(self, draft_id: str) -> dict[str, Any]:
+        return (await self.request("GET", f"/api/drafts/{draft_id}")).json()
+
+    async def init_many(
+        self, review_ats: Iterable[datetime | str], **kwargs: Any
+    ) -> list[dict[str, Any] | BaseException]:
+        return await asyncio.gather(
+            *(self.init_week(review_at, **kwargs) for review_at in review_ats),
+            return_exceptions=True,
+        )
+
+    async def finalize_many(
+        self, bundles: Iterable[WeekReportBundle | dict[str, Any]], **kwargs: Any
+    ) -> list[dict[str, Any] | BaseException]:
+        # 結果は入力順。失敗したものは例外オブジェクトとして返す。
+        return await asyncio.gather(
+            *(self.finalize(bundle, **kwargs) for bundle in bundles),
+            return_exceptions=True,
+        )
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from weekly_reports.rollups import ROLLUP_FILE, check_week_id, iter_rollups
+
+# 講師が担当する生徒の週を横断して集計する。
+#   {cohort_dir}/{student_id}/rollups.jsonl : 生徒ごとの出力ディレクトリ（finalize の output_dir）
+# 生徒ごとの読み込みはスレッドプールで並列に行い、結果は週ごとにキャッシュする。
+# キャッシュは各生徒の rollups.jsonl の (mtime, サイズ) が変わらない限り使い回す。
+MAX_WORKERS = 8
+_STUDENT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+@dataclass(frozen=True)
+class StudentWeek:
+    student_id: str
+    planned_minutes: int
+    scheduled_minutes: int
+    done_count: int
+    total_count: int
+    issue_tags: dict[str, int]
+
+    @property
+    def completion_rate(self) -> float | None:
+        if not self.total_count:
+            return None
+        return round(self.done_count / self.total_count, 4)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "student_id": self.student_id,
+            "planned_minutes": self.planned_minutes,
+            "scheduled_minutes": self.scheduled_minutes,
+            "done_count": self.done_count,
+            "total_count": self.total_count,
+            "completion_rate": self.completion_rate,
+            "issue_tags": self.issue_tags,
+        }
+
+
+def _student_week(student_dir: Path, week_id: str) -> StudentWeek | None:
+    for rollup in iter_rollups(student_dir, week_id, week_id):
+        return StudentWeek(
+            student_id=student_dir.name,
+            planned_minutes=rollup["planned_minutes"],
+            scheduled_minutes=rollup["scheduled_minutes"],
+            done_count=rollup["done_count"],
+            total_count=rollup["total_count"],
+            issue_tags=rollup["issue_tags"],
+        )
+    return None
+
+
+def summarize_cohort(
+    week_id: str, students: list[StudentWeek], missing: list[str]
+) -> dict[str, Any]:
+    done = sum(student.done_count for student in students)
+    total = sum(student.total_count for student in students)
+    tag_counts: Counter[str] = Counter()
+    tag_students: Counter[str] = Counter()
+    for student in students:
+        tag_counts.update(student.issue_tags)
+        tag_students.update(student.issue_tags.keys())
+    return {
+        "week_id": week_id,
+        "student_count": len(students),
+        "missing_students": missing,
+        "totals": {
+            "planned_minutes": sum(student.planned_minutes for student in students),
+            "scheduled_minutes": sum(student.scheduled_minutes for student in students),
+            "done_count": done,
+            "total_count": total,
+            "completion_rate": round(done / total, 4) if total else None,
+        },
+        "issue_tags": [
+            {"tag": tag, "count": count, "students": tag_students[tag]}
+            for tag, count in tag_counts.most_common()
+        ],
+        # 完了率の低い生徒から並べる（未入力の生徒は末尾）。
+        "students": [
+            student.to_dict()
+            for student in sorted(
+                students,
+                key=lambda student: (
+                    student.completion_rate is None,
+                    student.completion_rate or 0.0,
+                    student.student_id,
+                ),
+            )
+        ],
+    }
+
+
+class CohortDashboard:
+    def __init__(self, cohort_dir: Path, *, max_workers: int = MAX_WORKERS) -> None:
+        self.cohort_dir = Path(cohort_dir)
+        self.max_workers = max(max_workers, 1)
+        self._lock = threading.Lock()
+        # week_id -> (生徒ごとの rollups.jsonl の状態, 集計結果)
+        self._cache: dict[str, tuple[tuple, dict[str, Any]]] = {}
+
+    def student_dirs(self) -> list[Path]:
+        if not self.cohort_dir.exists():
+            return []
+        return sorted(
+            path
+            for path in self.cohort_dir.iterdir()
+            if path.is_dir() and _STUDENT_ID_PATTERN.match(path.name)
+        )
+
+    def _fingerprint(self, student_dirs: list[Path]) -> tuple:
+        states = []
+        for student_dir in student_dirs:
+            try:
+                stat = (student_dir / ROLLUP_FILE).stat()
+            except FileNotFoundError:
+                states.append((student_dir.name, None))
+                continue
+            states.append((student_dir.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(states)
+
+    def week(self, week_id: str) -> dict[str, Any]:
+        check_week_id(week_id)
+        student_dirs = self.student_dirs()
+        fingerprint = self._fingerprint(student_dirs)
+        with self._lock:
+            cached = self._cache.get(week_id)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(
+                executor.map(lambda path: _student_week(path, week_id), student_dirs)
+            )
+        students = [result for result in results if result is not None]
+        missing = [
+            student_dir.name
+            for student_dir, result in zip(student_dirs, results)
+            if result is None
+        ]
+        summary = summarize_cohort(week_id, students, missing)
+        with self._lock:
+            self._cache[week_id] = (fingerprint, summary)
+        return summary
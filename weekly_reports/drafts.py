@@ -0,0 +1,366 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from pydantic import TypeAdapter
+
+from weekly_reports.jsonstore import file_lock
+from weekly_reports.models import (
+    Issue,
+    Task,
+    TaskSession,
+    WeekReportBundle,
+    validate_task,
+    validate_task_session,
+)
+from weekly_reports.schemas import BundleSchema, parse_bundle_json
+
+# 下書きの変更をイベントとして追記し、一定件数ごとにスナップショットへ畳み込む。
+#   {draft_id}/snapshot.json        : {"seq": n, "bundle": {...}}（seq n までを反映済み）
+#   {draft_id}/events.jsonl         : seq n+1 以降のイベント（読み込み時に再生する）
+#   {draft_id}/events.{from}-{to}.jsonl : 畳み込み済みのイベント（監査用に残す）
+# seq の採番は下書きごとのファイルロック（.lock）の中で行うので、複数ワーカーから
+# 同じ下書きへ書いても seq は重ならない。fcntl の無い環境では1プロセスでのみ使う。
+SNAPSHOT_FILE = "snapshot.json"
+EVENTS_FILE = "events.jsonl"
+LOCK_FILE = ".lock"
+COMPACT_EVERY = 200
+# メモリに置く下書きの数と、下書きごとのロックの本数（ロックは draft_id のハッシュで共有する）。
+MAX_CACHED_DRAFTS = 64
+LOCK_STRIPES = 64
+_DRAFT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+_SEGMENT_PATTERN = re.compile(r"^events\.(\d+)-(\d+)\.jsonl$")
+
+_TASK = TypeAdapter(Task)
+_SESSION = TypeAdapter(TaskSession)
+_ISSUES = TypeAdapter(tuple[Issue, ...])
+_TEXTS = TypeAdapter(tuple[str, ...])
+
+TASK_FIELDS = {"title", "estimated_minutes", "priority", "note", "reason_tags", "day_id"}
+REPORT_TEXT_FIELDS = {"goals_week", "goals_month", "goals_long", "good_points"}
+
+
+class DraftNotFound(KeyError):
+    pass
+
+
+@dataclass(frozen=True)
+class DraftEvent:
+    seq: int
+    type: str
+    data: dict[str, Any]
+    at: str
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {"seq": self.seq, "type": self.type, "data": self.data, "at": self.at},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+
+
+def _fields(data: dict[str, Any]) -> dict[str, Any]:
+    fields = data.get("fields", {})
+    if not isinstance(fields, dict):
+        raise ValueError("Event fields must be an object.")
+    return fields
+
+
+def _stamp(directory: Path) -> tuple[int, int, int]:
+    # 他のプロセスが追記・畳み込みをしたかどうかを、ファイルの状態だけで判定する。
+    snapshot = (directory / SNAPSHOT_FILE).stat()
+    try:
+        events = (directory / EVENTS_FILE).stat()
+    except FileNotFoundError:
+        return snapshot.st_mtime_ns, 0, 0
+    return snapshot.st_mtime_ns, events.st_ino, events.st_size
+
+
+def _find_task(bundle: WeekReportBundle, task_id: str) -> int:
+    for index, task in enumerate(bundle.tasks):
+        if task.id == task_id:
+            return index
+    raise ValueError(f"Task not found: {task_id}")
+
+
+def _day_ids(bundle: WeekReportBundle) -> set[str]:
+    return {day.id for day in bundle.days}
+
+
+def _replace_task(bundle: WeekReportBundle, index: int, task: Task) -> WeekReportBundle:
+    validate_task(task, _day_ids(bundle))
+    return replace(bundle, tasks=bundle.tasks[:index] + (task,) + bundle.tasks[index + 1 :])
+
+
+def _task_added(bundle: WeekReportBundle, data: dict[str, Any]) -> WeekReportBundle:
+    task = _TASK.validate_python(data["task"])
+    if any(existing.id == task.id for existing in bundle.tasks):
+        raise ValueError(f"Task already exists: {task.id}")
+    validate_task(task, _day_ids(bundle))
+    return replace(bundle, tasks=bundle.tasks + (task,))
+
+
+def _task_updated(bundle: WeekReportBundle, data: dict[str, Any]) -> WeekReportBundle:
+    fields = _fields(data)
+    unknown = set(fields) - TASK_FIELDS
+    if unknown:
+        raise ValueError(f"Task fields cannot be updated: {', '.join(sorted(unknown))}")
+    index = _find_task(bundle, data["task_id"])
+    current = _TASK.dump_python(bundle.tasks[index])
+    task = _TASK.validate_python({**current, **fields})
+    return _replace_task(bundle, index, task)
+
+
+def _task_status_changed(bundle: WeekReportBundle, data: dict[str, Any]) -> WeekReportBundle:
+    index = _find_task(bundle, data["task_id"])
+    task = replace(bundle.tasks[index], status=str(data["status"]))
+    return _replace_task(bundle, index, task)
+
+
+def _task_removed(bundle: WeekReportBundle, data: dict[str, Any]) -> WeekReportBundle:
+    index = _find_task(bundle, data["task_id"])
+    task_id = bundle.tasks[index].id
+    return replace(
+        bundle,
+        tasks=bundle.tasks[:index] + bundle.tasks[index + 1 :],
+        task_sessions=tuple(
+            session for session in bundle.task_sessions if session.task_id != task_id
+        ),
+    )
+
+
+def _session_logged(bundle: WeekReportBundle, data: dict[str, Any]) -> WeekReportBundle:
+    session = _SESSION.validate_python(data["session"])
+    if any(existing.id == session.id for existing in bundle.task_sessions):
+        raise ValueError(f"TaskSession already exists: {session.id}")
+    validate_task_session(session, {task.id for task in bundle.tasks})
+    return replace(bundle, task_sessions=bundle.task_sessions + (session,))
+
+
+def _session_removed(bundle: WeekReportBundle, data: dict[str, Any]) -> WeekReportBundle:
+    session_id = data["session_id"]
+    sessions = tuple(session for session in bundle.task_sessions if session.id != session_id)
+    if len(sessions) == len(bundle.task_sessions):
+        raise ValueError(f"TaskSession not found: {session_id}")
+    return replace(bundle, task_sessions=sessions)
+
+
+def _report_updated(bundle: WeekReportBundle, data: dict[str, Any]) -> WeekReportBundle:
+    fields = _fields(data)
+    unknown = set(fields) - REPORT_TEXT_FIELDS - {"issues"}
+    if unknown:
+        raise ValueError(f"Report fields cannot be updated: {', '.join(sorted(unknown))}")
+    changes: dict[str, Any] = {
+        name: _TEXTS.validate_python(value)
+        for name, value in fields.items()
+        if name in REPORT_TEXT_FIELDS
+    }
+    if "issues" in fields:
+        changes["issues"] = _ISSUES.validate_python(fields["issues"])
+    return replace(bundle, report=replace(bundle.report, **changes))
+
+
+REDUCERS: dict[str, Callable[[WeekReportBundle, dict[str, Any]], WeekReportBundle]] = {
+    "task_added": _task_added,
+    "task_updated": _task_updated,
+    "task_status_changed": _task_status_changed,
+    "task_removed": _task_removed,
+    "session_logged": _session_logged,
+    "session_removed": _session_removed,
+    "report_updated": _report_updated,
+}
+
+
+def apply_event(
+    bundle: WeekReportBundle, event_type: str, data: dict[str, Any]
+) -> WeekReportBundle:
+    reducer = REDUCERS.get(event_type)
+    if reducer is None:
+        raise ValueError(f"Unknown draft event: {event_type}")
+    try:
+        return reducer(bundle, data)
+    except KeyError as exc:
+        raise ValueError(f"Missing event field: {exc.args[0]}") from exc
+
+
+class DraftStore:
+    def __init__(
+        self,
+        root: Path,
+        *,
+        compact_every: int = COMPACT_EVERY,
+        max_cached: int = MAX_CACHED_DRAFTS,
+    ) -> None:
+        self.root = Path(root)
+        self.compact_every = max(compact_every, 1)
+        self.max_cached = max(max_cached, 1)
+        self._lock = threading.Lock()
+        self._draft_locks = tuple(threading.Lock() for _ in range(LOCK_STRIPES))
+        # draft_id -> (seq, バンドル, スナップショット以降のイベント数, ファイルの状態)
+        # 最近使った順に持ち、溢れたものはディスクから読み直す。
+        self._states: OrderedDict[str, tuple[int, WeekReportBundle, int, tuple]] = (
+            OrderedDict()
+        )
+
+    def _draft_dir(self, draft_id: str) -> Path:
+        if not _DRAFT_ID_PATTERN.match(draft_id):
+            raise ValueError(f"Invalid draft id: {draft_id}")
+        return self.root / draft_id
+
+    def _draft_lock(self, draft_id: str) -> threading.Lock:
+        return self._draft_locks[hash(draft_id) % LOCK_STRIPES]
+
+    @contextmanager
+    def _locked(self, draft_id: str) -> Iterator[Path]:
+        directory = self._draft_dir(draft_id)
+        with self._draft_lock(draft_id):
+            if not (directory / SNAPSHOT_FILE).exists():
+                raise DraftNotFound(draft_id)
+            with file_lock(directory / LOCK_FILE):
+                yield directory
+
+    def _remember(
+        self, draft_id: str, seq: int, bundle: WeekReportBundle, pending: int, directory: Path
+    ) -> None:
+        with self._lock:
+            self._states[draft_id] = (seq, bundle, pending, _stamp(directory))
+            self._states.move_to_end(draft_id)
+            while len(self._states) > self.max_cached:
+                self._states.popitem(last=False)
+
+    def _current(self, draft_id: str, directory: Path) -> tuple[int, WeekReportBundle, int]:
+        # ファイルロックを持った状態で呼ぶ。別プロセスが書いていればディスクから読み直す。
+        with self._lock:
+            state = self._states.get(draft_id)
+        if state is None or state[3] != _stamp(directory):
+            seq, bundle, pending = self._read(draft_id)
+            self._remember(draft_id, seq, bundle, pending, directory)
+            return seq, bundle, pending
+        return state[:3]
+
+    def exists(self, draft_id: str) -> bool:
+        return (self._draft_dir(draft_id) / SNAPSHOT_FILE).exists()
+
+    def create(self, bundle: WeekReportBundle) -> str:
+        draft_id = bundle.report.id
+        directory = self._draft_dir(draft_id)
+        with self._draft_lock(draft_id):
+            directory.mkdir(parents=True, exist_ok=True)
+            with file_lock(directory / LOCK_FILE):
+                if (directory / SNAPSHOT_FILE).exists():
+                    raise ValueError(f"Draft already exists: {draft_id}")
+                self._write_snapshot(directory, 0, bundle)
+                (directory / EVENTS_FILE).touch()
+                self._remember(draft_id, 0, bundle, 0, directory)
+        return draft_id
+
+    def _write_snapshot(self, directory: Path, seq: int, bundle: WeekReportBundle) -> None:
+        payload = BundleSchema.from_bundle(bundle).model_dump_json()
+        tmp_path = directory / (SNAPSHOT_FILE + ".tmp")
+        tmp_path.write_text(f'{{"seq":{seq},"bundle":{payload}}}', encoding="utf-8")
+        tmp_path.replace(directory / SNAPSHOT_FILE)
+
+    def _read(self, draft_id: str) -> tuple[int, WeekReportBundle, int]:
+        # スナップショット1回の読み込みと、それ以降の短いイベント列の再生で現在の状態を作る。
+        # ファイルロックを持った状態で呼ぶ（書き込み途中の末尾行をここで切り詰める）。
+        directory = self._draft_dir(draft_id)
+        snapshot_path = directory / SNAPSHOT_FILE
+        if not snapshot_path.exists():
+            raise DraftNotFound(draft_id)
+        snapshot = json.loads(snapshot_path.read_text(encoding="utf-8"))
+        seq = snapshot["seq"]
+        bundle = parse_bundle_json(json.dumps(snapshot["bundle"]))
+        pending = 0
+        events_path = directory / EVENTS_FILE
+        if events_path.exists():
+            offset = 0
+            with events_path.open("r+b") as handle:
+                for line in handle:
+                    if not line.endswith(b"\n"):
+                        # 書き込み途中で止まった末尾行は捨てる。残すと次の追記と1行に混ざる。
+                        handle.truncate(offset)
+                        break
+                    offset += len(line)
+                    event = json.loads(line)
+                    if event["seq"] <= seq:
+                        continue
+                    bundle = apply_event(bundle, event["type"], event["data"])
+                    seq = event["seq"]
+                    pending += 1
+        return seq, bundle, pending
+
+    def load(self, draft_id: str) -> tuple[int, WeekReportBundle]:
+        with self._locked(draft_id) as directory:
+            seq, bundle, _ = self._current(draft_id, directory)
+        return seq, bundle
+
+    def append(self, draft_id: str, event_type: str, data: dict[str, Any]) -> DraftEvent:
+        return self.append_and_load(draft_id, event_type, data)[0]
+
+    def append_and_load(
+        self, draft_id: str, event_type: str, data: dict[str, Any]
+    ) -> tuple[DraftEvent, WeekReportBundle]:
+        # 追記後のバンドルも返す（呼び出し側が続けて load し直さなくて済む）。
+        with self._locked(draft_id) as directory:
+            seq, bundle, pending = self._current(draft_id, directory)
+            # 適用できないイベントはログに残さない。
+            bundle = apply_event(bundle, event_type, data)
+            event = DraftEvent(seq + 1, event_type, data, datetime.now().isoformat())
+            with (directory / EVENTS_FILE).open("a", encoding="utf-8") as handle:
+                handle.write(event.to_json() + "\n")
+            pending += 1
+            if pending >= self.compact_every:
+                self._compact(directory, event.seq, bundle, pending)
+                pending = 0
+            self._remember(draft_id, event.seq, bundle, pending, directory)
+        return event, bundle
+
+    def _compact(
+        self, directory: Path, seq: int, bundle: WeekReportBundle, pending: int
+    ) -> None:
+        # 先にスナップショットを書き、その後で現在のログを監査用セグメントへ退避する。
+        self._write_snapshot(directory, seq, bundle)
+        segment = directory / f"events.{seq - pending + 1:010d}-{seq:010d}.jsonl"
+        (directory / EVENTS_FILE).replace(segment)
+        (directory / EVENTS_FILE).touch()
+
+    def compact(self, draft_id: str) -> None:
+        with self._locked(draft_id) as directory:
+            seq, bundle, pending = self._current(draft_id, directory)
+            if pending:
+                self._compact(directory, seq, bundle, pending)
+                self._remember(draft_id, seq, bundle, 0, directory)
+
+    def history(self, draft_id: str, since: int = 0) -> Iterator[DraftEvent]:
+        directory = self._draft_dir(draft_id)
+        if not (directory / SNAPSHOT_FILE).exists():
+            raise DraftNotFound(draft_id)
+        segments = []
+        for path in directory.iterdir():
+            match = _SEGMENT_PATTERN.match(path.name)
+            if match and int(match.group(2)) > since:
+                segments.append((int(match.group(1)), path))
+        paths = [path for _, path in sorted(segments)] + [directory / EVENTS_FILE]
+        for path in paths:
+            if not path.exists():
+                continue
+            with path.open(encoding="utf-8") as handle:
+                for line in handle:
+                    if not line.endswith("\n"):
+                        break
+                    raw = json.loads(line)
+                    if raw["seq"] > since:
+                        yield DraftEvent(raw["seq"], raw["type"], raw["data"], raw["at"])
+
+    def forget(self, draft_id: str) -> None:
+        # メモリ上の状態だけを捨てる（次回はディスクから読み直す）。
+        with self._lock:
+            self._states.pop(draft_id, None)
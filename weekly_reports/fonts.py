@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from reportlab.lib.fonts import addMapping
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfbase.ttfonts import TTFont
+
+# 埋め込み用のTTFを指定する環境変数。未指定なら既知のパスを順に探す。
+FONT_ENV = "WEEKLY_REPORTS_FONT"
+# TTFが見つからない場合は reportlab 同梱のCIDフォント（埋め込みなし、閲覧側のフォントで表示）を使う。
+CID_FALLBACK_FONT = "HeiseiKakuGo-W5"
+TTF_FONT_NAME = "WeeklyReportsJP"
+
+_CANDIDATES = (
+    "/usr/share/fonts/opentype/ipaexfont-gothic/ipaexg.ttf",
+    "/usr/share/fonts/truetype/ipaexfont-gothic/ipaexg.ttf",
+    "/usr/share/fonts/truetype/fonts-japanese-gothic.ttf",
+    "/usr/share/fonts/opentype/ipafont-gothic/ipag.ttf",
+    "/usr/share/fonts/truetype/takao-gothic/TakaoGothic.ttf",
+    "/Library/Fonts/ipaexg.ttf",
+    "C:/Windows/Fonts/msgothic.ttc",
+)
+
+
+@dataclass(frozen=True)
+class RegisteredFont:
+    name: str
+    source: str
+    embedded: bool
+
+
+_lock = threading.Lock()
+_registered: dict[str | None, RegisteredFont] = {}
+
+
+def _find_font_file() -> str | None:
+    configured = os.environ.get(FONT_ENV)
+    if configured:
+        if not Path(configured).is_file():
+            raise ValueError(f"{FONT_ENV} does not point to a font file: {configured}")
+        return configured
+    for candidate in _CANDIDATES:
+        if Path(candidate).is_file():
+            return candidate
+    return None
+
+
+def _register_family(name: str) -> None:
+    # 太字・斜体の書体は持たないので、<b> などは同じフォントに割り当てる。
+    for bold in (0, 1):
+        for italic in (0, 1):
+            addMapping(name, bold, italic, name)
+
+
+def register_japanese_font(font_path: str | None = None) -> RegisteredFont:
+    # フォントの解析はプロセスで1回だけ行い、以降の描画では登録済みのメトリクスを使い回す。
+    # TTFは文書ごとに使ったグリフだけがサブセットとして埋め込まれる。
+    with _lock:
+        if font_path in _registered:
+            return _registered[font_path]
+        path = font_path or _find_font_file()
+        if path:
+            name = TTF_FONT_NAME if font_path is None else f"{TTF_FONT_NAME}-{Path(path).stem}"
+            subfont_index = 0 if path.lower().endswith(".ttc") else None
+            if subfont_index is None:
+                font = TTFont(name, path)
+            else:
+                font = TTFont(name, path, subfontIndex=subfont_index)
+            registered = RegisteredFont(name=name, source=path, embedded=True)
+        else:
+            font = UnicodeCIDFont(CID_FALLBACK_FONT)
+            registered = RegisteredFont(name=font.fontName, source="cid", embedded=False)
+        pdfmetrics.registerFont(font)
+        _register_family(registered.name)
+        _registered[font_path] = registered
+        return registered
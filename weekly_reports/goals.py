@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Iterable
+
+from weekly_reports.jsonstore import JsonFile
+from weekly_reports.models import Goal
+
+# 週をまたいで共有する目標の定義と、目標ごとの週の索引・進捗履歴を1ファイルに持つ。
+#   goals      : goal_id -> {"scope", "text", "first_week", "last_week"}
+#   weeks      : goal_id -> その目標を掲げた週IDの昇順リスト（「目標Xに関わった週」の索引）
+#   week_goals : week_id -> その週の goal_id（同じ週を確定し直した時に索引から外すため）
+#   progress   : goal_id -> {week_id: その週全体の集計値}
+#                目標ごとにタスクを分けて数えてはいないので、同じ週の目標はどれも同じ値になる。
+GOAL_FILE = "goals.json"
+_PROGRESS_KEYS = ("planned_minutes", "scheduled_minutes", "done_count", "total_count")
+
+
+def _empty() -> dict[str, Any]:
+    return {"goals": {}, "weeks": {}, "week_goals": {}, "progress": {}}
+
+
+class GoalStore:
+    def __init__(self, output_dir: Path) -> None:
+        self.path = Path(output_dir) / GOAL_FILE
+        self._file = JsonFile.shared(self.path, _empty)
+
+    def definitions(self) -> dict[str, Goal]:
+        with self._file.read() as data:
+            return {
+                goal_id: Goal(id=goal_id, scope=raw["scope"], text=raw["text"])
+                for goal_id, raw in data["goals"].items()
+            }
+
+    def get(self, goal_id: str) -> dict[str, Any] | None:
+        with self._file.read() as data:
+            raw = data["goals"].get(goal_id)
+            return {"id": goal_id, **raw} if raw else None
+
+    def weeks_for_goal(self, goal_id: str) -> list[str]:
+        with self._file.read() as data:
+            return list(data["weeks"].get(goal_id, []))
+
+    def defined_before(self, week_id: str) -> set[str]:
+        # week_id より前の週で掲げられた目標。その週のスナップショットに定義が書かれている。
+        with self._file.read() as data:
+            return {
+                goal_id
+                for goal_id, weeks in data["weeks"].items()
+                if weeks and weeks[0] < week_id
+            }
+
+    def history(self, goal_id: str) -> list[dict[str, Any]]:
+        with self._file.read() as data:
+            progress = data["progress"].get(goal_id, {})
+            return [{"week_id": week_id, **progress[week_id]} for week_id in sorted(progress)]
+
+    def record_week(self, week_id: str, goals: Iterable[Goal], rollup: dict[str, Any]) -> None:
+        goals = list(goals)
+        progress = {key: rollup.get(key, 0) for key in _PROGRESS_KEYS}
+        with self._file.update() as data:
+            current = {goal.id for goal in goals}
+            # 確定し直した週で外された目標は、その週の索引と進捗から消す。
+            for stale in set(data["week_goals"].get(week_id, [])) - current:
+                weeks = data["weeks"].get(stale, [])
+                if week_id in weeks:
+                    weeks.remove(week_id)
+                data["progress"].get(stale, {}).pop(week_id, None)
+                self._refresh_span(data, stale)
+            for goal in goals:
+                data["goals"].setdefault(
+                    goal.id,
+                    {
+                        "scope": goal.scope,
+                        "text": goal.text,
+                        "first_week": week_id,
+                        "last_week": week_id,
+                    },
+                )
+                weeks = data["weeks"].setdefault(goal.id, [])
+                if week_id not in weeks:
+                    weeks.append(week_id)
+                    weeks.sort()
+                data["progress"].setdefault(goal.id, {})[week_id] = progress
+                self._refresh_span(data, goal.id)
+            data["week_goals"][week_id] = sorted(current)
+
+    @staticmethod
+    def _refresh_span(data: dict[str, Any], goal_id: str) -> None:
+        weeks = data["weeks"].get(goal_id)
+        if weeks:
+            data["goals"][goal_id]["first_week"] = weeks[0]
+            data["goals"][goal_id]["last_week"] = weeks[-1]
@@ -0,0 +1,354 @@
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from weekly_reports.models import TaskSession, bundle_to_dict
+from weekly_reports.schemas import parse_bundle_json
+
+# タイムトラッカーの書き出し（CSV / ICS）を少しずつ読み、ルールでタスクIDに割り当てて
+# 該当する週のバンドルへ TaskSession として追加する。
+CHUNK_ROWS = 5_000
+
+_START_COLUMNS = ("start_at", "start", "Start", "開始")
+_END_COLUMNS = ("end_at", "end", "End", "終了")
+_DATE_TIME_COLUMNS = (("Start date", "Start time"), ("End date", "End time"))
+_TITLE_COLUMNS = ("title", "description", "Description", "summary", "Summary", "タスク")
+_PROJECT_COLUMNS = ("project", "Project", "プロジェクト")
+_NOTE_COLUMNS = ("note", "Note", "メモ")
+_TASK_ID_COLUMNS = ("task_id",)
+
+
+@dataclass(frozen=True)
+class TimeEntry:
+    line: int
+    title: str
+    start_at: datetime
+    end_at: datetime
+    project: str = ""
+    note: str | None = None
+    task_id: str | None = None
+
+
+@dataclass(frozen=True)
+class RejectedRow:
+    line: int
+    reason: str
+    raw: str = ""
+
+
+@dataclass(frozen=True)
+class MappingRule:
+    task_id: str
+    pattern: re.Pattern
+    field: str = "title"
+
+    def matches(self, entry: TimeEntry) -> bool:
+        if self.field == "project":
+            return bool(self.pattern.search(entry.project))
+        if self.field == "any":
+            return bool(self.pattern.search(entry.title) or self.pattern.search(entry.project))
+        return bool(self.pattern.search(entry.title))
+
+
+@dataclass
+class ImportReport:
+    rows_read: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    rejected: list[RejectedRow] = field(default_factory=list)
+    updated_bundles: list[str] = field(default_factory=list)
+    # バンドルとして読めずに取り込み先から外したファイル（パス, 理由）
+    skipped_bundles: list[tuple[str, str]] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.rows_read / self.elapsed_seconds
+
+
+def load_rules(path: Path) -> list[MappingRule]:
+    # [{"task_id": "task_01", "match": "化学", "field": "title"}, ...] の形式。先に一致したものを使う。
+    rules = []
+    for raw in json.loads(Path(path).read_text(encoding="utf-8")):
+        field_name = raw.get("field", "title")
+        if field_name not in ("title", "project", "any"):
+            raise ValueError(f"Invalid rule field: {field_name}")
+        rules.append(
+            MappingRule(
+                task_id=str(raw["task_id"]), pattern=re.compile(raw["match"]), field=field_name
+            )
+        )
+    return rules
+
+
+def _parse_datetime(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        # 週報のデータはタイムゾーンを持たないので、ローカル時刻に揃える。
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def _first(row: dict, columns: Iterable[str]) -> str | None:
+    for column in columns:
+        value = row.get(column)
+        if value:
+            return value
+    return None
+
+
+def _csv_entry(line: int, row: dict) -> TimeEntry:
+    start = _first(row, _START_COLUMNS)
+    end = _first(row, _END_COLUMNS)
+    if start is None or end is None:
+        (start_date, start_time), (end_date, end_time) = _DATE_TIME_COLUMNS
+        if row.get(start_date) and row.get(end_date):
+            start = f"{row[start_date]}T{row.get(start_time) or '00:00:00'}"
+            end = f"{row[end_date]}T{row.get(end_time) or '00:00:00'}"
+    if start is None or end is None:
+        raise ValueError("start/end columns not found")
+    return TimeEntry(
+        line=line,
+        title=_first(row, _TITLE_COLUMNS) or "",
+        start_at=_parse_datetime(start),
+        end_at=_parse_datetime(end),
+        project=_first(row, _PROJECT_COLUMNS) or "",
+        note=_first(row, _NOTE_COLUMNS),
+        task_id=_first(row, _TASK_ID_COLUMNS),
+    )
+
+
+def iter_csv_entries(path: Path) -> Iterator[TimeEntry | RejectedRow]:
+    with Path(path).open(newline="", encoding="utf-8-sig") as handle:
+        reader = csv.DictReader(handle)
+        for row in reader:
+            line = reader.line_num
+            try:
+                yield _csv_entry(line, row)
+            except ValueError as exc:
+                yield RejectedRow(line, str(exc), json.dumps(row, ensure_ascii=False))
+
+
+def _iter_unfolded_lines(handle) -> Iterator[tuple[int, str]]:
+    # ICSは75オクテットで折り返され、継続行は空白で始まる。
+    pending: str | None = None
+    pending_line = 0
+    for number, raw in enumerate(handle, start=1):
+        raw = raw.rstrip("\r\n")
+        if raw[:1] in (" ", "\t") and pending is not None:
+            pending += raw[1:]
+            continue
+        if pending is not None:
+            yield pending_line, pending
+        pending, pending_line = raw, number
+    if pending is not None:
+        yield pending_line, pending
+
+
+def _ics_unescape(value: str) -> str:
+    return (
+        value.replace("\\n", "\n")
+        .replace("\\N", "\n")
+        .replace("\\,", ",")
+        .replace("\\;", ";")
+        .replace("\\\\", "\\")
+    )
+
+
+def _ics_datetime(name: str, value: str) -> datetime:
+    params = name.split(";")[1:]
+    if "VALUE=DATE" in params or len(value) == 8:
+        raise ValueError("all-day events are not supported")
+    utc = value.endswith("Z")
+    parsed = datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S")
+    if utc:
+        return _parse_datetime(parsed.isoformat() + "+00:00")
+    # TZID 付きはその地域時刻のまま扱う。
+    return parsed
+
+
+def iter_ics_entries(path: Path) -> Iterator[TimeEntry | RejectedRow]:
+    with Path(path).open(encoding="utf-8-sig") as handle:
+        event: dict[str, tuple[str, str]] | None = None
+        start_line = 0
+        for number, line in _iter_unfolded_lines(handle):
+            if line == "BEGIN:VEVENT":
+                event, start_line = {}, number
+                continue
+            if event is None:
+                continue
+            if line == "END:VEVENT":
+                try:
+                    if "DTSTART" not in event or "DTEND" not in event:
+                        raise ValueError("DTSTART/DTEND not found")
+                    yield TimeEntry(
+                        line=start_line,
+                        title=_ics_unescape(event.get("SUMMARY", ("", ""))[1]),
+                        start_at=_ics_datetime(*event["DTSTART"]),
+                        end_at=_ics_datetime(*event["DTEND"]),
+                        project=_ics_unescape(event.get("CATEGORIES", ("", ""))[1]),
+                        note=_ics_unescape(event["DESCRIPTION"][1])
+                        if "DESCRIPTION" in event
+                        else None,
+                    )
+                except ValueError as exc:
+                    yield RejectedRow(start_line, str(exc), json.dumps(event, ensure_ascii=False))
+                event = None
+                continue
+            name, _, value = line.partition(":")
+            event[name.split(";")[0].upper()] = (name, value)
+
+
+def iter_entries(path: Path, source_format: str | None = None) -> Iterator[TimeEntry | RejectedRow]:
+    source_format = source_format or Path(path).suffix.lstrip(".").lower()
+    if source_format == "csv":
+        return iter_csv_entries(path)
+    if source_format == "ics":
+        return iter_ics_entries(path)
+    raise ValueError(f"Unsupported import format: {source_format}")
+
+
+def _chunks(items: Iterator, size: int) -> Iterator[list]:
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _session_id(task_id: str, start_at: datetime, end_at: datetime) -> str:
+    digest = hashlib.sha1(f"{task_id}|{start_at.isoformat()}|{end_at.isoformat()}".encode())
+    return f"imp_{digest.hexdigest()[:12]}"
+
+
+class SessionImporter:
+    def __init__(self, bundle_paths: Iterable[Path], rules: list[MappingRule]) -> None:
+        self.rules = rules
+        # バンドル本体は持たず、週の範囲・タスクの索引・既存セッションのキーだけを覚える。
+        self.cycles: dict[Path, tuple[date, date]] = {}
+        # task_id -> そのタスクを持つバンドルのパス（通常は1つ）
+        self.task_index: dict[str, list[Path]] = {}
+        self.seen: set[tuple[str, datetime, datetime]] = set()
+        self.pending: dict[Path, list[TaskSession]] = {}
+        self.skipped: list[tuple[str, str]] = []
+        for path in bundle_paths:
+            try:
+                bundle = parse_bundle_json(Path(path).read_bytes())
+            except ValueError as exc:
+                # 同じディレクトリにある goals.json などの出力ファイルは読み飛ばす。
+                self.skipped.append((str(path), str(exc).splitlines()[0]))
+                continue
+            self.cycles[Path(path)] = (bundle.report.cycle_start, bundle.report.cycle_end)
+            for task in bundle.tasks:
+                self.task_index.setdefault(task.id, []).append(Path(path))
+            self.seen.update(
+                (session.task_id, session.start_at, session.end_at)
+                for session in bundle.task_sessions
+            )
+
+    def _task_id_for(self, entry: TimeEntry) -> str | None:
+        if entry.task_id:
+            return entry.task_id
+        for rule in self.rules:
+            if rule.matches(entry):
+                return rule.task_id
+        return None
+
+    def _bundle_for(self, task_id: str, entry: TimeEntry) -> Path | None:
+        session_date = entry.start_at.date()
+        for path in self.task_index.get(task_id, ()):
+            cycle_start, cycle_end = self.cycles[path]
+            if cycle_start <= session_date <= cycle_end:
+                return path
+        return None
+
+    def _accept(self, entry: TimeEntry, report: ImportReport) -> None:
+        if entry.end_at <= entry.start_at:
+            report.rejected.append(RejectedRow(entry.line, "end must be after start", entry.title))
+            return
+        task_id = self._task_id_for(entry)
+        if task_id is None:
+            report.rejected.append(RejectedRow(entry.line, "no rule matched", entry.title))
+            return
+        if task_id not in self.task_index:
+            report.rejected.append(RejectedRow(entry.line, f"unknown task: {task_id}", entry.title))
+            return
+        path = self._bundle_for(task_id, entry)
+        if path is None:
+            report.rejected.append(
+                RejectedRow(entry.line, f"no week covers {entry.start_at.date()}", entry.title)
+            )
+            return
+        key = (task_id, entry.start_at, entry.end_at)
+        if key in self.seen:
+            report.duplicates += 1
+            return
+        self.seen.add(key)
+        self.pending.setdefault(path, []).append(
+            TaskSession(
+                id=_session_id(task_id, entry.start_at, entry.end_at),
+                task_id=task_id,
+                start_at=entry.start_at,
+                end_at=entry.end_at,
+                note=entry.note or entry.title or None,
+                is_completed=None,
+            )
+        )
+        report.imported += 1
+
+    def run(
+        self,
+        entries: Iterator[TimeEntry | RejectedRow],
+        *,
+        chunk_rows: int = CHUNK_ROWS,
+        dry_run: bool = False,
+    ) -> ImportReport:
+        report = ImportReport(skipped_bundles=list(self.skipped))
+        started = time.perf_counter()
+        for chunk in _chunks(iter(entries), chunk_rows):
+            report.rows_read += len(chunk)
+            for entry in chunk:
+                if isinstance(entry, RejectedRow):
+                    report.rejected.append(entry)
+                else:
+                    self._accept(entry, report)
+            # チャンクごとに書き戻し、取り込み待ちのセッションを溜め込まない。
+            if not dry_run:
+                self._write_pending(report)
+            self.pending.clear()
+        report.elapsed_seconds = time.perf_counter() - started
+        return report
+
+    def _write_pending(self, report: ImportReport) -> None:
+        # チャンク内のセッションを週ごとにまとめ、その週のバンドルを読み直して1回で書き戻す。
+        for path, sessions in self.pending.items():
+            bundle = parse_bundle_json(path.read_bytes())
+            sessions.sort(key=lambda session: session.start_at)
+            updated = replace(bundle, task_sessions=bundle.task_sessions + tuple(sessions))
+            tmp_path = path.with_name(path.name + ".tmp")
+            tmp_path.write_text(
+                json.dumps(bundle_to_dict(updated), ensure_ascii=False, indent=2),
+                encoding="utf-8",
+            )
+            tmp_path.replace(path)
+            if str(path) not in report.updated_bundles:
+                report.updated_bundles.append(str(path))
+
+
+def write_rejects(path: Path, rejected: list[RejectedRow]) -> None:
+    with Path(path).open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["line", "reason", "raw"])
+        for row in rejected:
+            writer.writerow([row.line, row.reason, row.raw])
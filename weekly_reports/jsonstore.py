@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# 出力ディレクトリに置く小さな索引ファイル（goals.json、carryover.json）の読み書き。
+# 同じパスには常に同じインスタンスを返すので、確定処理を並行に呼んでも
+# 読み込み→更新→書き戻しが1本のロックで直列になり、更新が失われない。
+# プロセス間は {名前}.lock のファイルロックで直列にする。
+_SHARED: dict[Path, "JsonFile"] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    # 別プロセスとの排他。fcntl の無い環境では何もしない（1プロセスでのみ使う）。
+    if fcntl is None:
+        yield
+        return
+    with Path(path).open("a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class JsonFile:
+    def __init__(self, path: Path, empty: Callable[[], dict[str, Any]]) -> None:
+        self.path = Path(path)
+        self._empty = empty
+        self._lock = threading.Lock()
+        self._data: dict[str, Any] | None = None
+        self._loaded_key: tuple[int, int] | None = None
+
+    @classmethod
+    def shared(cls, path: Path, empty: Callable[[], dict[str, Any]]) -> "JsonFile":
+        key = Path(path).resolve()
+        with _SHARED_LOCK:
+            instance = _SHARED.get(key)
+            if instance is None:
+                instance = _SHARED[key] = cls(key, empty)
+            return instance
+
+    def _state(self) -> dict[str, Any]:
+        # ファイルが変わっていなければ前回読み込んだ内容を使う。
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            self._data, self._loaded_key = self._empty(), None
+            return self._data
+        key = (stat.st_mtime_ns, stat.st_size)
+        if self._data is None or key != self._loaded_key:
+            self._data = json.loads(self.path.read_text(encoding="utf-8"))
+            self._loaded_key = key
+        return self._data
+
+    def _save(self, data: dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(
+            json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8"
+        )
+        tmp_path.replace(self.path)
+        stat = self.path.stat()
+        self._data, self._loaded_key = data, (stat.st_mtime_ns, stat.st_size)
+
+    @contextmanager
+    def read(self) -> Iterator[dict[str, Any]]:
+        # 返した辞書はロックを抜けた後に変更されうるので、必要な値はブロック内で取り出す。
+        with self._lock:
+            yield self._state()
+
+    @contextmanager
+    def update(self) -> Iterator[dict[str, Any]]:
+        # 別のワーカープロセスの更新も失わないよう、読み直しから書き戻しまでファイルロックを持つ。
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with file_lock(self.path.with_suffix(".lock")):
+                data = self._state()
+                try:
+                    yield data
+                except BaseException:
+                    # 途中まで書き換えたメモリ上の内容は捨て、次回ファイルから読み直す。
+                    self._data = self._loaded_key = None
+                    raise
+                self._save(data)
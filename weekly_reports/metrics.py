@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from collections import defaultdict
 
-from weekly_reports.models import Day, Task, TaskSession
+from weekly_reports.models import Day, Task, TaskSession, WeekReportBundle
 
 
 def update_day_metrics(
@@ -43,3 +43,34 @@ def update_day_metrics(
             )
         )
     return tuple(updated_days)
+
+
+def recompute_days(bundle: WeekReportBundle, day_ids: set[str]) -> tuple[Day, ...]:
+    # 変更のあった日だけを集計し直す（他の日のタスク・セッションは集計に使わない）。
+    if not day_ids:
+        return ()
+    tasks = tuple(task for task in bundle.tasks if task.day_id in day_ids)
+    task_ids = {task.id for task in tasks}
+    sessions = tuple(session for session in bundle.task_sessions if session.task_id in task_ids)
+    days = tuple(day for day in bundle.days if day.id in day_ids)
+    return update_day_metrics(days, tasks, sessions)
+
+
+def summarize_sessions(
+    task_sessions: tuple[TaskSession, ...],
+    tasks: tuple[Task, ...],
+) -> list[tuple[str, str, int, int, int]]:
+    # (タスク名, 日付, 回数, 合計分, 完了数) を日付・タスク名順に返す。
+    titles = {task.id: task.title for task in tasks}
+    totals: dict[tuple[str, str], list[int]] = defaultdict(lambda: [0, 0, 0])
+    for session in task_sessions:
+        total = totals[(session.task_id, session.start_at.date().isoformat())]
+        total[0] += 1
+        total[1] += int((session.end_at - session.start_at).total_seconds() // 60)
+        total[2] += 1 if session.is_completed else 0
+    rows = [
+        (titles.get(task_id, "-"), day, count, minutes, completed)
+        for (task_id, day), (count, minutes, completed) in totals.items()
+    ]
+    rows.sort(key=lambda row: (row[1], row[0]))
+    return rows
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import zlib
+from typing import Iterable
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from weekly_reports.admission import AdmissionController, AdmissionRejected
+
+# 展開後の上限。小さな圧縮データが巨大なボディに膨らむのを防ぐ。
+MAX_DECOMPRESSED_BYTES = 64 * 1024 * 1024
+# 受付制御の対象（確定とまとめ）。描画は軽いので対象外。
+ADMITTED_PATHS = (("POST", "/api/weeks/finalize"), ("POST", "/api/compile"))
+
+
+class GzipRequestMiddleware:
+    # Content-Encoding: gzip のリクエストボディを展開してからアプリに渡す。
+    # （レスポンス側の圧縮は starlette の GZipMiddleware が受け持つ）
+    def __init__(self, app: ASGIApp, max_size: int = MAX_DECOMPRESSED_BYTES) -> None:
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = list(scope["headers"])
+        encoding = b""
+        for name, value in headers:
+            if name == b"content-encoding":
+                encoding = value.strip().lower()
+        if encoding != b"gzip":
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        try:
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            body = decompressor.decompress(b"".join(chunks), self.max_size + 1)
+        except zlib.error:
+            await JSONResponse({"detail": "Invalid gzip body"}, status_code=400)(
+                scope, receive, send
+            )
+            return
+        if len(body) > self.max_size or decompressor.unconsumed_tail:
+            await JSONResponse({"detail": "Request body too large"}, status_code=413)(
+                scope, receive, send
+            )
+            return
+
+        headers = [
+            (name, value)
+            for name, value in headers
+            if name not in (b"content-encoding", b"content-length")
+        ]
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        sent = False
+
+        async def receive_body() -> Message:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app({**scope, "headers": headers}, receive_body, send)
+
+
+class AdmissionMiddleware:
+    # 重いエンドポイントの呼び出し頻度を、ボディを読む前（展開・JSON解析・検証の前）に制限する。
+    # 認証が無いのでクライアントが名乗るヘッダは信用せず、接続元アドレスごとに数える。
+    def __init__(
+        self,
+        app: ASGIApp,
+        admission: AdmissionController,
+        paths: Iterable[tuple[str, str]] = ADMITTED_PATHS,
+    ) -> None:
+        self.app = app
+        self.admission = admission
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        client = scope.get("client")
+        try:
+            self.admission.admit(f"host:{client[0] if client else 'unknown'}")
+        except AdmissionRejected as exc:
+            response = JSONResponse(
+                {"detail": exc.reason},
+                status_code=429,
+                headers={"Retry-After": exc.retry_after_header},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
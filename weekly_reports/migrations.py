@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Hashable
+
+from weekly_reports.models import GOAL_SCOPES, goal_id
+from weekly_reports.snapshot import SCHEMA_VERSION
+
+Migration = Callable[[dict[str, Any]], dict[str, Any]]
+
+# from_version -> (to_version, migration)。1段ずつ辿って現行スキーマまで上げる。
+_MIGRATIONS: dict[str, tuple[str, Migration]] = {}
+
+
+def register_migration(from_version: str, to_version: str) -> Callable[[Migration], Migration]:
+    def decorator(func: Migration) -> Migration:
+        if from_version in _MIGRATIONS:
+            raise ValueError(f"Migration already registered for {from_version}")
+        _MIGRATIONS[from_version] = (to_version, func)
+        return func
+
+    return decorator
+
+
+def known_versions() -> list[str]:
+    # 旧い順に並べた、読み込み可能なスキーマ版の一覧（現行版を含む）。
+    targets = {to_version for to_version, _ in _MIGRATIONS.values()}
+    roots = [version for version in _MIGRATIONS if version not in targets]
+    versions: list[str] = []
+    for version in roots:
+        while version not in versions:
+            versions.append(version)
+            if version not in _MIGRATIONS:
+                break
+            version = _MIGRATIONS[version][0]
+    if SCHEMA_VERSION not in versions:
+        versions.append(SCHEMA_VERSION)
+    return versions
+
+
+def needs_upgrade(snapshot: dict[str, Any]) -> bool:
+    return snapshot.get("schema_version") != SCHEMA_VERSION
+
+
+def upgrade_snapshot(snapshot: dict[str, Any]) -> dict[str, Any]:
+    if not needs_upgrade(snapshot):
+        return snapshot
+    # 入力を壊さないよう、コピーしてから各段の変換を適用する。
+    upgraded = copy.deepcopy(snapshot)
+    seen: set[str] = set()
+    while upgraded.get("schema_version") != SCHEMA_VERSION:
+        version = str(upgraded.get("schema_version"))
+        if version not in _MIGRATIONS or version in seen:
+            raise ValueError(f"No migration path from snapshot schema {version}")
+        seen.add(version)
+        to_version, migration = _MIGRATIONS[version]
+        upgraded = migration(upgraded)
+        upgraded["schema_version"] = to_version
+    return upgraded
+
+
+@register_migration("1.0", "1.1")
+def _v1_0_to_v1_1(snapshot: dict[str, Any]) -> dict[str, Any]:
+    # 1.0 には週報IDと状態が無い。スナップショットは確定時にしか作られないので final とみなす。
+    snapshot.setdefault("week_report_id", f"wr_{snapshot.get('week_id', '')}")
+    snapshot.setdefault("status", "final")
+    snapshot.setdefault("prev_week_report_id", None)
+    for day in snapshot.get("next_week_days", []):
+        day.setdefault("available_minutes", None)
+    return snapshot
+
+
+@register_migration("1.1", "1.2")
+def _v1_1_to_v1_2(snapshot: dict[str, Any]) -> dict[str, Any]:
+    # 目標の文面をIDに置き換える。goals.json が無くても読めるよう、定義は全てスナップショットに残す。
+    goals = snapshot.get("goals", {})
+    refs: dict[str, list[str]] = {}
+    definitions: dict[str, dict[str, str]] = {}
+    for scope in GOAL_SCOPES:
+        refs[scope] = []
+        for text in goals.get(scope, []):
+            ref = goal_id(scope, text)
+            refs[scope].append(ref)
+            definitions[ref] = {"scope": scope, "text": text}
+    snapshot["goals"] = refs
+    snapshot["goal_defs"] = definitions
+    return snapshot
+
+
+@register_migration("1.2", "1.3")
+def _v1_2_to_v1_3(snapshot: dict[str, Any]) -> dict[str, Any]:
+    # 1.2 以前のタスクは繰り越し元を持たない。
+    for day in snapshot.get("next_week_days", []):
+        for task in day.get("tasks", []):
+            task.setdefault("origin_task_id", None)
+    for task in snapshot.get("last_week_tasks", []):
+        task.setdefault("origin_task_id", None)
+    return snapshot
+
+
+class UpgradeCache:
+    # 読み込み時に変換した結果を保持する小さなLRU。返す辞書は共有されるので呼び出し側で変更しないこと。
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize
+        self._items: OrderedDict[Hashable, dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_upgrade(
+        self, key: Hashable, load: Callable[[], dict[str, Any]]
+    ) -> dict[str, Any]:
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        upgraded = upgrade_snapshot(load())
+        with self._lock:
+            self._items[key] = upgraded
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return upgraded
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+_FILE_CACHE = UpgradeCache()
+
+
+def read_snapshot_file(path: Path) -> dict[str, Any]:
+    path = Path(path)
+    stat = path.stat()
+    # 更新されたファイルは別キーになるので、古い変換結果は使われない。
+    key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    return _FILE_CACHE.get_or_upgrade(
+        key, lambda: json.loads(path.read_text(encoding="utf-8"))
+    )
+
+
+@dataclass(frozen=True)
+class MigrationProgress:
+    total: int
+    processed: int
+    upgraded: int
+    failed: int
+    elapsed_seconds: float
+
+    @property
+    def records_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.processed / self.elapsed_seconds
+
+
+class BulkMigrator:
+    # 読み込み時の変換とは別に、アーカイブや出力ディレクトリを裏で一括変換する。
+    def __init__(
+        self,
+        *,
+        archive=None,
+        output_dir: Path | None = None,
+        on_progress: Callable[[MigrationProgress], None] | None = None,
+        report_every: int = 100,
+    ) -> None:
+        self.archive = archive
+        self.output_dir = Path(output_dir) if output_dir is not None else None
+        self.on_progress = on_progress
+        self.report_every = max(report_every, 1)
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._progress = MigrationProgress(0, 0, 0, 0, 0.0)
+        self.errors: list[str] = []
+
+    @property
+    def progress(self) -> MigrationProgress:
+        with self._lock:
+            return self._progress
+
+    def start(self) -> "BulkMigrator":
+        if self._thread is not None:
+            raise RuntimeError("Migration already started.")
+        self._thread = threading.Thread(target=self.run, name="snapshot-migrator", daemon=True)
+        self._thread.start()
+        return self
+
+    def join(self, timeout: float | None = None) -> MigrationProgress:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.progress
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _targets(self) -> list[tuple[str, Any]]:
+        from weekly_reports.archive import KIND_SNAPSHOT, SNAPSHOT_SUFFIX
+
+        targets: list[tuple[str, Any]] = []
+        if self.archive is not None:
+            targets.extend(("archive", week_id) for week_id in self.archive.week_ids(KIND_SNAPSHOT))
+        if self.output_dir is not None and self.output_dir.exists():
+            targets.extend(
+                ("file", path) for path in sorted(self.output_dir.glob(f"*{SNAPSHOT_SUFFIX}"))
+            )
+        return targets
+
+    def _migrate_one(self, source: str, target: Any) -> bool:
+        if source == "archive":
+            raw = json.loads(self.archive.read_raw_snapshot(target))
+            if not needs_upgrade(raw):
+                return False
+            self.archive.append_snapshot(upgrade_snapshot(raw))
+            return True
+        raw = json.loads(target.read_text(encoding="utf-8"))
+        if not needs_upgrade(raw):
+            return False
+        tmp_path = target.with_name(target.name + ".tmp")
+        tmp_path.write_text(
+            json.dumps(upgrade_snapshot(raw), ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        tmp_path.replace(target)
+        return True
+
+    def run(self) -> MigrationProgress:
+        targets = self._targets()
+        started = time.perf_counter()
+        processed = upgraded = failed = 0
+        for source, target in targets:
+            if self._stop.is_set():
+                break
+            try:
+                if self._migrate_one(source, target):
+                    upgraded += 1
+            except (OSError, ValueError, KeyError) as exc:
+                failed += 1
+                self.errors.append(f"{target}: {exc}")
+            processed += 1
+            progress = MigrationProgress(
+                len(targets), processed, upgraded, failed, time.perf_counter() - started
+            )
+            with self._lock:
+                self._progress = progress
+            if self.on_progress and (
+                processed % self.report_every == 0 or processed == len(targets)
+            ):
+                self.on_progress(progress)
+        progress = MigrationProgress(
+            len(targets), processed, upgraded, failed, time.perf_counter() - started
+        )
+        with self._lock:
+            self._progress = progress
+        return progress
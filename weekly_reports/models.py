@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 from dataclasses import dataclass, field
 from datetime import date, datetime
 from typing import Iterable
@@ -54,6 +55,8 @@ class Task:
     status: str = "todo"
     reason_tags: tuple[str, ...] = ()
     note: str | None = None
+    # 前週から繰り越したタスクなら、繰り越し元のタスクID。
+    origin_task_id: str | None = None
     created_at: datetime | None = None
     updated_at: datetime | None = None
 
@@ -87,8 +90,31 @@ class WeekReportBundle:
     last_week_tasks: tuple[Task, ...] = ()
 
 
+@dataclass(frozen=True)
+class Goal:
+    id: str
+    scope: str
+    text: str
+
+
 STATUS_VALUES = {"draft", "final"}
 TASK_STATUS_VALUES = {"todo", "done", "carried_over", "dropped"}
+GOAL_SCOPES = ("week", "month", "long")
+
+
+def goal_id(scope: str, text: str) -> str:
+    # 同じ種別・同じ文面の目標は週をまたいでも同じIDになる。
+    digest = hashlib.sha1(f"{scope}\x1f{text.strip()}".encode("utf-8"))
+    return f"goal_{digest.hexdigest()[:12]}"
+
+
+def report_goals(report: WeekReport) -> tuple[Goal, ...]:
+    goals = []
+    for scope, texts in zip(
+        GOAL_SCOPES, (report.goals_week, report.goals_month, report.goals_long)
+    ):
+        goals.extend(Goal(id=goal_id(scope, text), scope=scope, text=text) for text in texts)
+    return tuple(goals)
 
 
 def _require_text(value: str, label: str) -> str:
@@ -113,25 +139,30 @@ def validate_report(bundle: WeekReportBundle) -> None:
         _require_text(issue.improvement, "issue.improvement")
     day_ids = {day.id for day in bundle.days}
     for task in bundle.tasks:
-        _require_text(task.title, "task.title")
-        if task.status not in TASK_STATUS_VALUES:
-            raise ValueError(f"Invalid task status: {task.status}")
-        if task.estimated_minutes <= 0:
-            raise ValueError(f"Task estimated_minutes must be positive: {task.title}")
-        if task.day_id and task.day_id not in day_ids:
-            raise ValueError(f"Task day_id not found: {task.day_id}")
+        validate_task(task, day_ids)
     for task in bundle.last_week_tasks:
-        _require_text(task.title, "task.title")
-        if task.status not in TASK_STATUS_VALUES:
-            raise ValueError(f"Invalid task status: {task.status}")
-        if task.estimated_minutes <= 0:
-            raise ValueError(f"Task estimated_minutes must be positive: {task.title}")
+        validate_task(task, None)
     task_ids = {task.id for task in bundle.tasks}
     for session in bundle.task_sessions:
-        if session.task_id not in task_ids:
-            raise ValueError(f"TaskSession task_id not found: {session.task_id}")
-        if session.end_at <= session.start_at:
-            raise ValueError("TaskSession end_at must be after start_at.")
+        validate_task_session(session, task_ids)
+
+
+def validate_task(task: Task, day_ids: set[str] | None) -> None:
+    # day_ids が None のとき（先週分など）は日付行の存在を確認しない。
+    _require_text(task.title, "task.title")
+    if task.status not in TASK_STATUS_VALUES:
+        raise ValueError(f"Invalid task status: {task.status}")
+    if task.estimated_minutes <= 0:
+        raise ValueError(f"Task estimated_minutes must be positive: {task.title}")
+    if day_ids is not None and task.day_id and task.day_id not in day_ids:
+        raise ValueError(f"Task day_id not found: {task.day_id}")
+
+
+def validate_task_session(session: TaskSession, task_ids: set[str]) -> None:
+    if session.task_id not in task_ids:
+        raise ValueError(f"TaskSession task_id not found: {session.task_id}")
+    if session.end_at <= session.start_at:
+        raise ValueError("TaskSession end_at must be after start_at.")
 
 
 def build_issue(raw: dict) -> Issue:
@@ -157,6 +188,7 @@ def build_tasks(raw_tasks: Iterable[dict]) -> tuple[Task, ...]:
                 status=str(raw.get("status", "todo")),
                 reason_tags=tuple(raw.get("reason_tags", []) or ()),
                 note=raw.get("note"),
+                origin_task_id=raw.get("origin_task_id"),
                 created_at=_parse_datetime(raw.get("created_at"), required=False),
                 updated_at=_parse_datetime(raw.get("updated_at"), required=False),
             )
@@ -278,6 +310,7 @@ def bundle_to_dict(bundle: WeekReportBundle) -> dict:
                 "status": task.status,
                 "reason_tags": list(task.reason_tags),
                 "note": task.note,
+                "origin_task_id": task.origin_task_id,
                 "created_at": task.created_at.isoformat() if task.created_at else None,
                 "updated_at": task.updated_at.isoformat() if task.updated_at else None,
             }
@@ -305,6 +338,7 @@ def bundle_to_dict(bundle: WeekReportBundle) -> dict:
                 "status": task.status,
                 "reason_tags": list(task.reason_tags),
                 "note": task.note,
+                "origin_task_id": task.origin_task_id,
                 "created_at": task.created_at.isoformat() if task.created_at else None,
                 "updated_at": task.updated_at.isoformat() if task.updated_at else None,
             }
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import timedelta
+from functools import lru_cache
 from pathlib import Path
 
 from reportlab.lib import colors
@@ -9,11 +10,55 @@ from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import cm
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
+from weekly_reports.fonts import register_japanese_font
+from weekly_reports.metrics import summarize_sessions
 from weekly_reports.models import Day, Task, TaskSession, WeekReportBundle
+from weekly_reports.render import check_session_mode
 
+# 1つの巨大なTableはページ分割のたびに残り全行を測り直すため、行数に対して二乗で遅くなる。
+# 一定行数ごとに別のTableに分け、各チャンクでヘッダ行を繰り返す。
+TABLE_CHUNK_ROWS = 200
 
-def _section(title: str, body_lines: list[str]) -> list:
+
+@lru_cache(maxsize=None)
+def _styles(font_name: str):
     styles = getSampleStyleSheet()
+    for style in styles.byName.values():
+        style.fontName = font_name
+    return styles
+
+
+@lru_cache(maxsize=None)
+def _table_style(font_name: str) -> TableStyle:
+    return TableStyle(
+        [
+            ("FONTNAME", (0, 0), (-1, -1), font_name),
+            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ]
+    )
+
+
+def _chunked_tables(
+    header: list[str], rows: list[list[str]], col_widths: list[float], font_name: str
+) -> list:
+    if not rows:
+        rows = [["(未記入)"] + [""] * (len(header) - 1)]
+    tables = []
+    for start in range(0, len(rows), TABLE_CHUNK_ROWS):
+        table = Table(
+            [header] + rows[start : start + TABLE_CHUNK_ROWS],
+            colWidths=col_widths,
+            repeatRows=1,
+        )
+        table.setStyle(_table_style(font_name))
+        tables.append(table)
+    return tables
+
+
+def _section(title: str, body_lines: list[str], font_name: str) -> list:
+    styles = _styles(font_name)
     items = [Paragraph(f"<b>{title}</b>", styles["Heading3"])]
     if body_lines:
         items.append(Paragraph("<br/>".join(body_lines), styles["BodyText"]))
@@ -23,64 +68,54 @@ def _section(title: str, body_lines: list[str]) -> list:
     return items
 
 
-def _issues_section(issues) -> list:
-    styles = getSampleStyleSheet()
+def _issues_section(issues, font_name: str) -> list:
+    styles = _styles(font_name)
     items = [Paragraph("<b>課題/原因/改善策</b>", styles["Heading3"])]
-    rows = [["課題", "根本原因", "改善策", "タグ"]]
-    for issue in issues:
-        rows.append([issue.problem, issue.root_cause, issue.improvement, ", ".join(issue.tags)])
-    if len(rows) == 1:
-        rows.append(["(未記入)", "", "", ""])
-    table = Table(rows, colWidths=[5 * cm, 5 * cm, 5 * cm, 3 * cm])
-    table.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-            ]
+    rows = [
+        [issue.problem, issue.root_cause, issue.improvement, ", ".join(issue.tags)]
+        for issue in issues
+    ]
+    items.extend(
+        _chunked_tables(
+            ["課題", "根本原因", "改善策", "タグ"],
+            rows,
+            [5 * cm, 5 * cm, 5 * cm, 3 * cm],
+            font_name,
         )
     )
-    items.append(table)
     items.append(Spacer(1, 0.4 * cm))
     return items
 
 
-def _task_table(title: str, tasks: tuple[Task, ...]) -> list:
-    styles = getSampleStyleSheet()
+def _task_table(title: str, tasks: tuple[Task, ...], font_name: str) -> list:
+    styles = _styles(font_name)
     items = [Paragraph(f"<b>{title}</b>", styles["Heading3"])]
-    rows = [["タスク", "見積(分)", "主担当日", "状態", "理由タグ"]]
-    for task in tasks:
-        rows.append(
-            [
-                task.title,
-                str(task.estimated_minutes),
-                task.day_id,
-                task.status,
-                ", ".join(task.reason_tags),
-            ]
-        )
-    if len(rows) == 1:
-        rows.append(["(未記入)", "", "", "", ""])
-    table = Table(rows, colWidths=[7 * cm, 2.5 * cm, 3 * cm, 3 * cm, 4 * cm])
-    table.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-            ]
+    rows = [
+        [
+            task.title,
+            str(task.estimated_minutes),
+            task.day_id,
+            task.status,
+            ", ".join(task.reason_tags),
+        ]
+        for task in tasks
+    ]
+    items.extend(
+        _chunked_tables(
+            ["タスク", "見積(分)", "主担当日", "状態", "理由タグ"],
+            rows,
+            [7 * cm, 2.5 * cm, 3 * cm, 3 * cm, 4 * cm],
+            font_name,
         )
     )
-    items.append(table)
     items.append(Spacer(1, 0.4 * cm))
     return items
 
 
-def _day_table(days: tuple[Day, ...]) -> list:
-    styles = getSampleStyleSheet()
+def _day_table(days: tuple[Day, ...], font_name: str) -> list:
+    styles = _styles(font_name)
     items = [Paragraph("<b>来週タスク（日付行）</b>", styles["Heading3"])]
-    rows = [["日付", "曜日", "見積合計(分)", "セッション合計(分)", "完了率"]]
+    rows = []
     for day in days:
         weekday = day.date.strftime("%a")
         total = day.total_count or 0
@@ -95,61 +130,81 @@ def _day_table(days: tuple[Day, ...]) -> list:
                 rate,
             ]
         )
-    if len(rows) == 1:
-        rows.append(["(未記入)", "", "", "", ""])
-    table = Table(rows, colWidths=[4 * cm, 2.5 * cm, 3.5 * cm, 3.5 * cm, 4 * cm])
-    table.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-            ]
+    items.extend(
+        _chunked_tables(
+            ["日付", "曜日", "見積合計(分)", "セッション合計(分)", "完了率"],
+            rows,
+            [4 * cm, 2.5 * cm, 3.5 * cm, 3.5 * cm, 4 * cm],
+            font_name,
         )
     )
-    items.append(table)
     items.append(Spacer(1, 0.4 * cm))
     return items
 
 
-def _session_table(sessions: tuple[TaskSession, ...], tasks: tuple[Task, ...]) -> list:
-    styles = getSampleStyleSheet()
+def _session_table(
+    sessions: tuple[TaskSession, ...], tasks: tuple[Task, ...], font_name: str
+) -> list:
+    styles = _styles(font_name)
     items = [Paragraph("<b>タスク実行枠</b>", styles["Heading3"])]
-    task_map = {task.id: task for task in tasks}
-    rows = [["タスク", "開始", "終了", "完了", "メモ"]]
-    for session in sessions:
-        task_title = task_map.get(session.task_id).title if task_map.get(session.task_id) else "-"
-        rows.append(
-            [
-                task_title,
-                session.start_at.strftime("%Y-%m-%d %H:%M"),
-                session.end_at.strftime("%Y-%m-%d %H:%M"),
-                "済" if session.is_completed else "未",
-                session.note or "",
-            ]
+    titles = {task.id: task.title for task in tasks}
+    rows = [
+        [
+            titles.get(session.task_id, "-"),
+            session.start_at.strftime("%Y-%m-%d %H:%M"),
+            session.end_at.strftime("%Y-%m-%d %H:%M"),
+            "済" if session.is_completed else "未",
+            session.note or "",
+        ]
+        for session in sessions
+    ]
+    items.extend(
+        _chunked_tables(
+            ["タスク", "開始", "終了", "完了", "メモ"],
+            rows,
+            [6 * cm, 4 * cm, 4 * cm, 2 * cm, 3 * cm],
+            font_name,
         )
-    if len(rows) == 1:
-        rows.append(["(未記入)", "", "", "", ""])
-    table = Table(rows, colWidths=[6 * cm, 4 * cm, 4 * cm, 2 * cm, 3 * cm])
-    table.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-            ]
+    )
+    items.append(Spacer(1, 0.4 * cm))
+    return items
+
+
+def _session_summary_table(
+    sessions: tuple[TaskSession, ...], tasks: tuple[Task, ...], font_name: str
+) -> list:
+    # セッションを (タスク, 日付) ごとに集計し、件数・合計時間・完了数だけを載せる。
+    styles = _styles(font_name)
+    items = [Paragraph("<b>タスク実行枠（タスク・日別集計）</b>", styles["Heading3"])]
+    rows = [
+        [title, day, str(count), str(minutes), f"{completed}/{count}"]
+        for title, day, count, minutes, completed in summarize_sessions(sessions, tasks)
+    ]
+    items.extend(
+        _chunked_tables(
+            ["タスク", "日付", "回数", "合計(分)", "完了"],
+            rows,
+            [7 * cm, 3 * cm, 2 * cm, 3 * cm, 4 * cm],
+            font_name,
         )
     )
-    items.append(table)
     items.append(Spacer(1, 0.4 * cm))
     return items
 
 
-def generate_pdf(bundle: WeekReportBundle, output_path: str) -> Path:
+def generate_pdf(
+    bundle: WeekReportBundle,
+    output_path: str,
+    *,
+    session_mode: str = "full",
+    font_path: str | None = None,
+) -> Path:
+    check_session_mode(session_mode)
+    font_name = register_japanese_font(font_path).name
     path = Path(output_path)
     report = bundle.report
     doc = SimpleDocTemplate(str(path), pagesize=A4, rightMargin=1.2 * cm, leftMargin=1.2 * cm)
-    styles = getSampleStyleSheet()
+    styles = _styles(font_name)
     next_review = report.review_at + timedelta(days=7)
 
     story: list = [
@@ -164,17 +219,20 @@ def generate_pdf(bundle: WeekReportBundle, output_path: str) -> Path:
         Spacer(1, 0.5 * cm),
     ]
 
-    story.extend(_section("週目標", list(report.goals_week)))
-    story.extend(_section("月目標", list(report.goals_month)))
-    story.extend(_section("長期目標", list(report.goals_long)))
+    story.extend(_section("週目標", list(report.goals_week), font_name))
+    story.extend(_section("月目標", list(report.goals_month), font_name))
+    story.extend(_section("長期目標", list(report.goals_long), font_name))
 
-    story.extend(_task_table("先週の宿題（実績）", bundle.last_week_tasks))
-    story.extend(_day_table(bundle.days))
-    story.extend(_task_table("来週タスク", bundle.tasks))
+    story.extend(_task_table("先週の宿題（実績）", bundle.last_week_tasks, font_name))
+    story.extend(_day_table(bundle.days, font_name))
+    story.extend(_task_table("来週タスク", bundle.tasks, font_name))
 
-    story.extend(_section("GOOD", list(report.good_points)))
-    story.extend(_issues_section(report.issues))
-    story.extend(_session_table(bundle.task_sessions, bundle.tasks))
+    story.extend(_section("GOOD", list(report.good_points), font_name))
+    story.extend(_issues_section(report.issues, font_name))
+    if session_mode == "summary":
+        story.extend(_session_summary_table(bundle.task_sessions, bundle.tasks, font_name))
+    else:
+        story.extend(_session_table(bundle.task_sessions, bundle.tasks, font_name))
 
     doc.build(story)
     return path
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import ContextManager, Iterator
+
+# tracemalloc のピークはプロセス全体で1つしかなく、reset_peak() は並行中の段階の値まで消す。
+# そのためメモリも測る段階だけは1つずつ流し、CPUだけの計測は並行したまま測る。
+_MEMORY_LOCK = threading.Lock()
+
+@dataclass(frozen=True)
+class StageProfile:
+    name: str
+    elapsed_seconds: float
+    peak_memory_bytes: int | None
+    profile: cProfile.Profile | None
+
+
+class NullProfiler:
+    enabled = False
+
+    def stage(self, name: str) -> ContextManager[None]:
+        return nullcontext()
+
+
+class StageProfiler:
+    enabled = True
+
+    def __init__(self, *, memory: bool = False, top: int = 25) -> None:
+        self.memory = memory
+        self.top = top
+        self.stages: list[StageProfile] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        with _MEMORY_LOCK if self.memory else nullcontext():
+            owned = False
+            if self.memory:
+                owned = not tracemalloc.is_tracing()
+                if owned:
+                    tracemalloc.start()
+                tracemalloc.reset_peak()
+            profile: cProfile.Profile | None = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # 別の段階が同時にプロファイル中（Python 3.12 以降は1つしか有効にできない）。
+                profile = None
+            started = time.perf_counter()
+            try:
+                yield
+            finally:
+                if profile is not None:
+                    profile.disable()
+                elapsed = time.perf_counter() - started
+                peak: int | None = None
+                if self.memory:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    if owned:
+                        tracemalloc.stop()
+                self.stages.append(StageProfile(name, elapsed, peak, profile))
+
+    def summary(self) -> list[dict]:
+        return [
+            {
+                "stage": stage.name,
+                "elapsed_ms": round(stage.elapsed_seconds * 1000, 3),
+                "peak_memory_bytes": stage.peak_memory_bytes,
+            }
+            for stage in self.stages
+        ]
+
+    def write_reports(self, directory: Path, prefix: str) -> Path:
+        # 段階ごとの .prof（pstats/snakeviz で読める）と、人が読む要約テキストを書き出す。
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        lines = [f"# profile: {prefix}", ""]
+        for stage in self.stages:
+            memory = (
+                f", peak memory {stage.peak_memory_bytes / 1024:.1f} KiB"
+                if stage.peak_memory_bytes is not None
+                else ""
+            )
+            lines.append(f"## {stage.name}: {stage.elapsed_seconds * 1000:.1f} ms{memory}")
+            if stage.profile is None:
+                lines.append("(cProfile was busy with another stage)\n")
+                continue
+            stage.profile.dump_stats(str(directory / f"{prefix}_{stage.name}.prof"))
+            buffer = io.StringIO()
+            stats = pstats.Stats(stage.profile, stream=buffer)
+            stats.sort_stats("cumulative").print_stats(self.top)
+            lines.append(buffer.getvalue())
+        (directory / f"{prefix}_profile.json").write_text(
+            json.dumps(self.summary(), ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        report_path = directory / f"{prefix}_profile.txt"
+        report_path.write_text("\n".join(lines), encoding="utf-8")
+        return report_path
+
+
+def make_profiler(enabled: bool, *, memory: bool = False) -> StageProfiler | NullProfiler:
+    if not enabled:
+        return NullProfiler()
+    return StageProfiler(memory=memory)
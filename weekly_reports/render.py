@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from html import escape
+from pathlib import Path
+from string import Template
+from typing import Callable, Iterable, Iterator
+
+from weekly_reports.metrics import summarize_sessions
+from weekly_reports.models import Task, TaskSession, WeekReportBundle
+
+# PDFと同じ節構成をテキストで出す軽量レンダラ。行ごとに文字列を yield するので、
+# 大きなバンドルでも全体を1つの文字列に組み立てずにファイルやHTTPレスポンスへ流せる。
+REPORT_FORMATS = ("pdf", "html", "markdown")
+SESSION_MODES = ("full", "summary")
+REPORT_SUFFIXES = {
+    "pdf": "_weekly_report.pdf",
+    "html": "_weekly_report.html",
+    "markdown": "_weekly_report.md",
+}
+MEDIA_TYPES = {
+    "html": "text/html; charset=utf-8",
+    "markdown": "text/markdown; charset=utf-8",
+}
+EMPTY = "(未記入)"
+# StreamingResponse は同期イテレータの1要素ごとにスレッドを行き来するので、
+# 細かい断片はこの程度にまとめてから送る。
+STREAM_BUFFER_CHARS = 16 * 1024
+
+_HTML_HEAD = Template(
+    """<!DOCTYPE html>
+<html lang="ja">
+<head>
+<meta charset="utf-8">
+<title>Weekly Report $week_id</title>
+<style>
+body { font-family: sans-serif; margin: 2em; }
+table { border-collapse: collapse; margin-bottom: 1.5em; }
+th, td { border: 1px solid #999; padding: 0.2em 0.5em; vertical-align: top; }
+th { background: #ddd; }
+</style>
+</head>
+<body>
+<h1>Weekly Report</h1>
+<p>特訓日時: $review_at<br>次回日時: $next_review<br>期間: $cycle_start ~ $cycle_end<br>状態: $status</p>
+"""
+)
+_HTML_TAIL = "</body>\n</html>\n"
+
+_MARKDOWN_HEAD = Template(
+    """# Weekly Report $week_id
+
+- 特訓日時: $review_at
+- 次回日時: $next_review
+- 期間: $cycle_start ~ $cycle_end
+- 状態: $status
+
+"""
+)
+
+Row = list[str]
+
+
+def _header_fields(bundle: WeekReportBundle) -> dict[str, str]:
+    report = bundle.report
+    return {
+        "week_id": report.week_id,
+        "review_at": report.review_at.strftime("%Y-%m-%d %H:%M"),
+        "next_review": (report.review_at + timedelta(days=7)).strftime("%Y-%m-%d %H:%M"),
+        "cycle_start": report.cycle_start.isoformat(),
+        "cycle_end": report.cycle_end.isoformat(),
+        "status": report.status,
+    }
+
+
+def _task_rows(tasks: tuple[Task, ...]) -> Iterator[Row]:
+    for task in tasks:
+        yield [
+            task.title,
+            str(task.estimated_minutes),
+            task.day_id,
+            task.status,
+            ", ".join(task.reason_tags),
+        ]
+
+
+def _session_rows(
+    sessions: tuple[TaskSession, ...], tasks: tuple[Task, ...], session_mode: str
+) -> tuple[str, Row, Iterable[Row]]:
+    if session_mode == "summary":
+        rows = (
+            [title, day, str(count), str(minutes), f"{completed}/{count}"]
+            for title, day, count, minutes, completed in summarize_sessions(sessions, tasks)
+        )
+        return (
+            "タスク実行枠（タスク・日別集計）",
+            ["タスク", "日付", "回数", "合計(分)", "完了"],
+            rows,
+        )
+    titles = {task.id: task.title for task in tasks}
+    rows = (
+        [
+            titles.get(session.task_id, "-"),
+            session.start_at.strftime("%Y-%m-%d %H:%M"),
+            session.end_at.strftime("%Y-%m-%d %H:%M"),
+            "済" if session.is_completed else "未",
+            session.note or "",
+        ]
+        for session in sessions
+    )
+    return "タスク実行枠", ["タスク", "開始", "終了", "完了", "メモ"], rows
+
+
+def _sections(bundle: WeekReportBundle, session_mode: str) -> Iterator[tuple]:
+    # ("list", 見出し, 行) / ("table", 見出し, ヘッダ, 行) をPDFと同じ順に並べる。
+    report = bundle.report
+    yield ("list", "週目標", report.goals_week)
+    yield ("list", "月目標", report.goals_month)
+    yield ("list", "長期目標", report.goals_long)
+    task_header = ["タスク", "見積(分)", "主担当日", "状態", "理由タグ"]
+    yield ("table", "先週の宿題（実績）", task_header, _task_rows(bundle.last_week_tasks))
+    yield (
+        "table",
+        "来週タスク（日付行）",
+        ["日付", "曜日", "見積合計(分)", "セッション合計(分)", "完了率"],
+        (
+            [
+                day.date.isoformat(),
+                day.date.strftime("%a"),
+                str(day.planned_minutes or 0),
+                str(day.scheduled_minutes or 0),
+                f"{day.done_count or 0}/{day.total_count or 0}",
+            ]
+            for day in bundle.days
+        ),
+    )
+    yield ("table", "来週タスク", task_header, _task_rows(bundle.tasks))
+    yield ("list", "GOOD", report.good_points)
+    yield (
+        "table",
+        "課題/原因/改善策",
+        ["課題", "根本原因", "改善策", "タグ"],
+        (
+            [issue.problem, issue.root_cause, issue.improvement, ", ".join(issue.tags)]
+            for issue in report.issues
+        ),
+    )
+    yield ("table", *_session_rows(bundle.task_sessions, bundle.tasks, session_mode))
+
+
+def check_session_mode(session_mode: str) -> None:
+    if session_mode not in SESSION_MODES:
+        raise ValueError(f"Invalid session_mode: {session_mode}")
+
+
+def iter_html(bundle: WeekReportBundle, *, session_mode: str = "full") -> Iterator[str]:
+    # ジェネレータ本体は最初の next() まで動かないので、モードは呼び出し時に検証する。
+    check_session_mode(session_mode)
+    return _html_chunks(bundle, session_mode)
+
+
+def _html_chunks(bundle: WeekReportBundle, session_mode: str) -> Iterator[str]:
+    fields = {key: escape(value) for key, value in _header_fields(bundle).items()}
+    yield _HTML_HEAD.substitute(fields)
+    for kind, title, *rest in _sections(bundle, session_mode):
+        yield f"<h3>{escape(title)}</h3>\n"
+        if kind == "list":
+            lines = rest[0]
+            if not lines:
+                yield f"<p>{EMPTY}</p>\n"
+                continue
+            yield "<ul>\n"
+            for line in lines:
+                yield f"<li>{escape(line)}</li>\n"
+            yield "</ul>\n"
+            continue
+        header, rows = rest
+        yield "<table>\n<tr>" + "".join(f"<th>{escape(cell)}</th>" for cell in header) + "</tr>\n"
+        empty = True
+        for row in rows:
+            empty = False
+            yield "<tr>" + "".join(f"<td>{escape(cell)}</td>" for cell in row) + "</tr>\n"
+        if empty:
+            yield f"<tr><td colspan=\"{len(header)}\">{EMPTY}</td></tr>\n"
+        yield "</table>\n"
+    yield _HTML_TAIL
+
+
+def _markdown_cell(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("|", "\\|").replace("\n", "<br>")
+
+
+def iter_markdown(bundle: WeekReportBundle, *, session_mode: str = "full") -> Iterator[str]:
+    check_session_mode(session_mode)
+    return _markdown_chunks(bundle, session_mode)
+
+
+def _markdown_chunks(bundle: WeekReportBundle, session_mode: str) -> Iterator[str]:
+    yield _MARKDOWN_HEAD.substitute(_header_fields(bundle))
+    for kind, title, *rest in _sections(bundle, session_mode):
+        yield f"## {title}\n\n"
+        if kind == "list":
+            lines = rest[0]
+            if not lines:
+                yield f"{EMPTY}\n\n"
+                continue
+            for line in lines:
+                yield f"- {line}\n"
+            yield "\n"
+            continue
+        header, rows = rest
+        yield "| " + " | ".join(header) + " |\n"
+        yield "|" + "---|" * len(header) + "\n"
+        empty = True
+        for row in rows:
+            empty = False
+            yield "| " + " | ".join(_markdown_cell(cell) for cell in row) + " |\n"
+        if empty:
+            yield "| " + " | ".join([EMPTY] + [""] * (len(header) - 1)) + " |\n"
+        yield "\n"
+
+
+def iter_buffered(chunks: Iterable[str], size: int = STREAM_BUFFER_CHARS) -> Iterator[str]:
+    buffer: list[str] = []
+    length = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+RENDERERS: dict[str, Callable[..., Iterator[str]]] = {
+    "html": iter_html,
+    "markdown": iter_markdown,
+}
+
+
+def write_report(
+    bundle: WeekReportBundle, output_path: str, report_format: str, *, session_mode: str = "full"
+) -> Path:
+    if report_format not in RENDERERS:
+        raise ValueError(f"Invalid report format: {report_format}")
+    check_session_mode(session_mode)
+    path = Path(output_path)
+    with path.open("w", encoding="utf-8") as handle:
+        handle.writelines(RENDERERS[report_format](bundle, session_mode=session_mode))
+    return path
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Mapping
+
+from weekly_reports.jsonstore import file_lock
+from weekly_reports.models import Goal
+from weekly_reports.snapshot import resolve_goal_texts
+
+# 確定した週ごとの集計値（ロールアップ）を1行1週のJSON Linesで追記していく。
+# 月次・四半期のまとめはスナップショットを読み直さず、この集計値だけから作る。
+ROLLUP_FILE = "rollups.jsonl"
+_WEEK_ID_PATTERN = re.compile(r"^\d{4}-W\d{2}$")
+# 行全体を解析せずに週IDを取り出す。キーの直前が { か , なので文字列値の中には一致しない。
+_WEEK_ID_FIELD = re.compile(rb'[{,]\s*"week_id"\s*:\s*"([^"\\]*)"')
+_WRITE_LOCK = threading.Lock()
+
+
+def build_rollup(
+    snapshot: dict[str, Any], goals: Mapping[str, Goal] | None = None
+) -> dict[str, Any]:
+    days = snapshot.get("next_week_days", [])
+    tasks = [task for day in days for task in day.get("tasks", [])]
+    sessions = snapshot.get("task_sessions", [])
+    issues = snapshot.get("review", {}).get("issues", [])
+    issue_tags = Counter(tag for issue in issues for tag in issue.get("tags", []))
+    goal_texts = resolve_goal_texts(snapshot, goals)
+    return {
+        "week_id": snapshot["week_id"],
+        "cycle_start": snapshot["cycle"]["start"],
+        "cycle_end": snapshot["cycle"]["end"],
+        "planned_minutes": sum(day.get("planned_minutes") or 0 for day in days),
+        "scheduled_minutes": sum(day.get("scheduled_minutes") or 0 for day in days),
+        "done_count": sum(day.get("done_count") or 0 for day in days),
+        "total_count": sum(day.get("total_count") or 0 for day in days),
+        "task_count": len(tasks),
+        "session_count": len(sessions),
+        "last_week_done": sum(
+            1 for task in snapshot.get("last_week_tasks", []) if task.get("status") == "done"
+        ),
+        "last_week_total": len(snapshot.get("last_week_tasks", [])),
+        "good_count": len(snapshot.get("review", {}).get("good", [])),
+        "issue_count": len(issues),
+        "issue_tags": dict(issue_tags),
+        "goals_week": goal_texts["week"],
+        "goals_month": goal_texts["month"],
+        "goals_long": goal_texts["long"],
+    }
+
+
+def _line_week_id(line: bytes) -> str | None:
+    match = _WEEK_ID_FIELD.search(line)
+    if match:
+        return match.group(1).decode("utf-8")
+    if not line.strip():
+        return None
+    return json.loads(line).get("week_id")
+
+
+def _rollup_line(rollup: dict[str, Any]) -> str:
+    return json.dumps(rollup, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+@contextmanager
+def _write_lock(path: Path) -> Iterator[None]:
+    # 置き換え中の古いファイルへ追記して行が消えないよう、別プロセスとも rollups.lock で直列にする。
+    with _WRITE_LOCK, file_lock(path.with_suffix(".lock")):
+        yield
+
+
+def append_rollup(output_dir: Path, rollup: dict[str, Any]) -> Path:
+    path = Path(output_dir) / ROLLUP_FILE
+    with _write_lock(path), path.open("a", encoding="utf-8") as handle:
+        handle.write(_rollup_line(rollup))
+    return path
+
+
+def upsert_rollup(output_dir: Path, rollup: dict[str, Any]) -> Path:
+    # 確定し直した週は既存の行を置き換え、同じ週の行を増やさない。
+    path = Path(output_dir) / ROLLUP_FILE
+    week_id = rollup["week_id"]
+    with _write_lock(path):
+        lines = path.read_bytes().splitlines(True) if path.exists() else []
+        kept = [line for line in lines if _line_week_id(line) != week_id]
+        if len(kept) == len(lines):
+            with path.open("a", encoding="utf-8") as handle:
+                handle.write(_rollup_line(rollup))
+            return path
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_bytes(b"".join(kept) + _rollup_line(rollup).encode("utf-8"))
+        tmp_path.replace(path)
+    return path
+
+
+def check_week_id(week_id: str) -> str:
+    if not _WEEK_ID_PATTERN.match(week_id):
+        raise ValueError(f"Invalid week_id: {week_id}")
+    return week_id
+
+
+def iter_rollups(output_dir: Path, from_week: str, to_week: str) -> Iterator[dict[str, Any]]:
+    # 1回目の走査で週ごとの最新行の位置だけを覚え、2回目でその行だけを週順に読む。
+    # 保持するのは週数ぶんのオフセットだけなので、対象期間が長くてもメモリはほぼ一定。
+    from_week, to_week = check_week_id(from_week), check_week_id(to_week)
+    if to_week < from_week:
+        raise ValueError("to_week must be on or after from_week.")
+    path = Path(output_dir) / ROLLUP_FILE
+    if not path.exists():
+        return
+    offsets: dict[str, int] = {}
+    with path.open("rb") as handle:
+        offset = 0
+        for line in handle:
+            week_id = _line_week_id(line)
+            if week_id and from_week <= week_id <= to_week:
+                offsets[week_id] = offset
+            offset += len(line)
+        for week_id in sorted(offsets):
+            handle.seek(offsets[week_id])
+            yield json.loads(handle.readline())
+
+
+class CompilationTotals:
+    def __init__(self) -> None:
+        self.weeks = 0
+        self.planned_minutes = 0
+        self.scheduled_minutes = 0
+        self.done_count = 0
+        self.total_count = 0
+        self.session_count = 0
+        self.issue_count = 0
+        self.issue_tags: Counter[str] = Counter()
+        # 目標文 -> [初出週, 最終週, 週数]。件数は目標の種類数で頭打ちになる。
+        self.goals_month: dict[str, list] = {}
+        self.goals_long: dict[str, list] = {}
+
+    def add(self, rollup: dict[str, Any]) -> None:
+        self.weeks += 1
+        self.planned_minutes += rollup["planned_minutes"]
+        self.scheduled_minutes += rollup["scheduled_minutes"]
+        self.done_count += rollup["done_count"]
+        self.total_count += rollup["total_count"]
+        self.session_count += rollup["session_count"]
+        self.issue_count += rollup["issue_count"]
+        self.issue_tags.update(rollup["issue_tags"])
+        for goals, texts in (
+            (self.goals_month, rollup["goals_month"]),
+            (self.goals_long, rollup["goals_long"]),
+        ):
+            for text in texts:
+                span = goals.setdefault(text, [rollup["week_id"], rollup["week_id"], 0])
+                span[1] = rollup["week_id"]
+                span[2] += 1
+
+    @property
+    def completion_rate(self) -> float | None:
+        if not self.total_count:
+            return None
+        return round(self.done_count / self.total_count, 4)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "weeks": self.weeks,
+            "planned_minutes": self.planned_minutes,
+            "scheduled_minutes": self.scheduled_minutes,
+            "done_count": self.done_count,
+            "total_count": self.total_count,
+            "completion_rate": self.completion_rate,
+            "session_count": self.session_count,
+            "issue_count": self.issue_count,
+            "issue_tags": dict(self.issue_tags.most_common()),
+            "goals_month": [
+                {"goal": text, "first_week": first, "last_week": last, "weeks": weeks}
+                for text, (first, last, weeks) in self.goals_month.items()
+            ],
+            "goals_long": [
+                {"goal": text, "first_week": first, "last_week": last, "weeks": weeks}
+                for text, (first, last, weeks) in self.goals_long.items()
+            ],
+        }
+
+
+def iter_compiled_json(
+    rollups: Iterable[dict[str, Any]], from_week: str, to_week: str
+) -> Iterator[str]:
+    totals = CompilationTotals()
+    yield f'{{"from_week":"{from_week}","to_week":"{to_week}","weeks":['
+    for index, rollup in enumerate(rollups):
+        totals.add(rollup)
+        yield ("," if index else "") + json.dumps(rollup, ensure_ascii=False)
+    yield '],"totals":' + json.dumps(totals.to_dict(), ensure_ascii=False) + "}\n"
+
+
+def write_compiled_json(
+    output_dir: Path, from_week: str, to_week: str, output_path: Path
+) -> Path:
+    path = Path(output_path)
+    with path.open("w", encoding="utf-8") as handle:
+        handle.writelines(
+            iter_compiled_json(iter_rollups(output_dir, from_week, to_week), from_week, to_week)
+        )
+    return path
+
+
+def write_compiled_pdf(
+    output_dir: Path,
+    from_week: str,
+    to_week: str,
+    output_path: Path,
+    *,
+    font_path: str | None = None,
+) -> Path:
+    # platypus は文書全体のフローを保持するので、ここでは canvas に1行ずつ描いてページを流す。
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+    from reportlab.pdfgen.canvas import Canvas
+
+    from weekly_reports.fonts import register_japanese_font
+
+    font_name = register_japanese_font(font_path).name
+    path = Path(output_path)
+    canvas = Canvas(str(path), pagesize=A4)
+    width, height = A4
+    columns = [
+        ("週", 1.5 * cm),
+        ("期間", 4.0 * cm),
+        ("見積(分)", 8.0 * cm),
+        ("セッション(分)", 10.5 * cm),
+        ("完了", 13.5 * cm),
+        ("課題", 15.5 * cm),
+        ("セッション数", 17.0 * cm),
+    ]
+    line_height = 0.55 * cm
+    state = {"y": 0.0, "page": 0}
+
+    def new_page() -> None:
+        if state["page"]:
+            canvas.showPage()
+        state["page"] += 1
+        canvas.setFont(font_name, 14)
+        canvas.drawString(
+            1.5 * cm, height - 1.8 * cm, f"Weekly Report まとめ {from_week} ~ {to_week}"
+        )
+        canvas.setFont(font_name, 8)
+        canvas.drawRightString(width - 1.5 * cm, 1.0 * cm, str(state["page"]))
+        canvas.setFont(font_name, 9)
+        y = height - 3.0 * cm
+        for label, x in columns:
+            canvas.drawString(x, y, label)
+        canvas.line(1.5 * cm, y - 0.15 * cm, width - 1.5 * cm, y - 0.15 * cm)
+        state["y"] = y - line_height
+
+    def write_line(text: str, *, size: int = 9, x: float = 1.5 * cm) -> None:
+        if state["y"] < 2.0 * cm:
+            new_page()
+        canvas.setFont(font_name, size)
+        canvas.drawString(x, state["y"], text)
+        state["y"] -= line_height
+
+    new_page()
+    totals = CompilationTotals()
+    for rollup in iter_rollups(output_dir, from_week, to_week):
+        totals.add(rollup)
+        if state["y"] < 2.0 * cm:
+            new_page()
+        canvas.setFont(font_name, 9)
+        values = [
+            rollup["week_id"],
+            f"{rollup['cycle_start']} ~ {rollup['cycle_end']}",
+            str(rollup["planned_minutes"]),
+            str(rollup["scheduled_minutes"]),
+            f"{rollup['done_count']}/{rollup['total_count']}",
+            str(rollup["issue_count"]),
+            str(rollup["session_count"]),
+        ]
+        for (_, x), value in zip(columns, values):
+            canvas.drawString(x, state["y"], value)
+        state["y"] -= line_height
+
+    summary = totals.to_dict()
+    state["y"] -= line_height
+    write_line("合計", size=12)
+    rate = summary["completion_rate"]
+    write_line(
+        f"{summary['weeks']}週 / 見積 {summary['planned_minutes']}分 / "
+        f"セッション {summary['scheduled_minutes']}分 / "
+        f"完了 {summary['done_count']}/{summary['total_count']}"
+        + (f" ({rate:.0%})" if rate is not None else "")
+    )
+    if summary["issue_tags"]:
+        tags = ", ".join(f"{tag}: {count}" for tag, count in summary["issue_tags"].items())
+        write_line(f"課題タグ: {tags}")
+    for title, key in (("月目標", "goals_month"), ("長期目標", "goals_long")):
+        state["y"] -= line_height / 2
+        write_line(title, size=12)
+        for goal in summary[key]:
+            write_line(
+                f"{goal['goal']} ({goal['first_week']} ~ {goal['last_week']}, {goal['weeks']}週)",
+                x=2.0 * cm,
+            )
+        if not summary[key]:
+            write_line("(未記入)", x=2.0 * cm)
+    canvas.showPage()
+    canvas.save()
+    return path
+
+
+def rollup_week_ids(output_dir: Path) -> set[str]:
+    path = Path(output_dir) / ROLLUP_FILE
+    if not path.exists():
+        return set()
+    with path.open("rb") as handle:
+        return {week_id for week_id in map(_line_week_id, handle) if week_id}
+
+
+def backfill_rollups(
+    output_dir: Path,
+    snapshots: Iterable[dict[str, Any]],
+    goals: Mapping[str, Goal] | None = None,
+) -> int:
+    # アーカイブ済みの週など、ロールアップが無い確定済みスナップショットから作り直す。
+    existing = rollup_week_ids(output_dir)
+    count = 0
+    for snapshot in snapshots:
+        if snapshot["week_id"] in existing:
+            continue
+        append_rollup(output_dir, build_rollup(snapshot, goals))
+        existing.add(snapshot["week_id"])
+        count += 1
+    return count
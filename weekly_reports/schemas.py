@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import json
+from typing import Annotated, Any
+
+from pydantic import (
+    BaseModel,
+    ValidationError,
+    ValidatorFunctionWrapHandler,
+    WrapValidator,
+)
+
+from weekly_reports.models import (
+    Day,
+    Task,
+    TaskSession,
+    WeekReport,
+    WeekReportBundle,
+    validate_report,
+)
+
+
+# build_bundle が省略時に補っていた値。型付きの読み込みでも同じ入力を受け付ける。
+_REPORT_DEFAULTS = {"id": "", "week_id": "", "status": "draft"}
+_DAY_DEFAULTS = {"id": "", "week_report_id": ""}
+_TASK_DEFAULTS = {
+    "id": "",
+    "week_report_id": "",
+    "day_id": "",
+    "title": "",
+    "estimated_minutes": 0,
+    "status": "todo",
+}
+_SESSION_DEFAULTS = {"id": "", "task_id": ""}
+_ISSUE_DEFAULTS = {"problem": "", "root_cause": "", "improvement": ""}
+_REPORT_LISTS = ("goals_week", "goals_month", "goals_long", "good_points", "issues")
+_BUNDLE_LISTS = ("days", "tasks", "task_sessions", "last_week_tasks")
+
+
+def _with_defaults(raw: Any, defaults: dict[str, Any], lists: tuple[str, ...] = ()) -> Any:
+    if not isinstance(raw, dict):
+        return raw
+    raw = {**defaults, **raw}
+    for name in lists:
+        # null のリストは空として扱う。
+        if name in raw and raw[name] is None:
+            raw[name] = []
+    return raw
+
+
+def _each(raw: Any, defaults: dict[str, Any], lists: tuple[str, ...] = ()) -> Any:
+    if not isinstance(raw, list):
+        return raw
+    return [_with_defaults(item, defaults, lists) for item in raw]
+
+
+def _fill_defaults(data: Any) -> Any:
+    data = _with_defaults(data, {}, _BUNDLE_LISTS)
+    if not isinstance(data, dict):
+        return data
+    report = _with_defaults(data.get("week_report", {}), _REPORT_DEFAULTS, _REPORT_LISTS)
+    if isinstance(report, dict):
+        report["issues"] = _each(report.get("issues", []), _ISSUE_DEFAULTS, ("tags",))
+    return {
+        **data,
+        "week_report": report,
+        "days": _each(data.get("days", []), _DAY_DEFAULTS),
+        "tasks": _each(data.get("tasks", []), _TASK_DEFAULTS, ("reason_tags",)),
+        "task_sessions": _each(data.get("task_sessions", []), _SESSION_DEFAULTS),
+        "last_week_tasks": _each(
+            data.get("last_week_tasks", []), _TASK_DEFAULTS, ("reason_tags",)
+        ),
+    }
+
+
+class BundleSchema(BaseModel):
+    # ドメインのdataclassをそのままフィールド型に使い、JSONから1回の検証でモデルまで組み立てる。
+    week_report: WeekReport
+    days: tuple[Day, ...] = ()
+    tasks: tuple[Task, ...] = ()
+    task_sessions: tuple[TaskSession, ...] = ()
+    last_week_tasks: tuple[Task, ...] = ()
+
+    def to_bundle(self) -> WeekReportBundle:
+        bundle = WeekReportBundle(
+            report=self.week_report,
+            days=self.days,
+            tasks=self.tasks,
+            task_sessions=self.task_sessions,
+            last_week_tasks=self.last_week_tasks,
+        )
+        validate_report(bundle)
+        return bundle
+
+    @classmethod
+    def from_bundle(cls, bundle: WeekReportBundle) -> "BundleSchema":
+        # 既に検証済みのバンドルなので再検証はしない。
+        return cls.model_construct(
+            week_report=bundle.report,
+            days=bundle.days,
+            tasks=bundle.tasks,
+            task_sessions=bundle.task_sessions,
+            last_week_tasks=bundle.last_week_tasks,
+        )
+
+
+class FinalizeResponse(BaseModel):
+    bundle: BundleSchema
+    snapshot: dict[str, Any]
+    report_path: str | None = None
+
+
+def _lenient(data: Any, handler: ValidatorFunctionWrapHandler) -> BundleSchema:
+    # 揃った入力はそのまま検証し、失敗したときだけ既定値を補って検証し直す。
+    try:
+        return handler(data)
+    except ValidationError:
+        filled = _fill_defaults(data)
+        if filled == data:
+            raise
+        return handler(filled)
+
+
+# API・ファイルから受け取るバンドル。BundleSchema 自体に検証フックを載せると
+# model_validate_json の高速経路が使えなくなるので、入口側でだけ既定値を補う。
+LenientBundle = Annotated[BundleSchema, WrapValidator(_lenient)]
+
+
+def parse_bundle_json(raw: str | bytes) -> WeekReportBundle:
+    try:
+        schema = BundleSchema.model_validate_json(raw)
+    except ValidationError:
+        schema = BundleSchema.model_validate(_fill_defaults(json.loads(raw)))
+    return schema.to_bundle()
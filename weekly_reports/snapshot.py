@@ -1,10 +1,23 @@
 from __future__ import annotations
 
 from collections import defaultdict
+from datetime import date, datetime
+from typing import Collection, Mapping
 
-from weekly_reports.models import Task, TaskSession, WeekReportBundle
+from weekly_reports.models import (
+    GOAL_SCOPES,
+    Day,
+    Goal,
+    Issue,
+    Task,
+    TaskSession,
+    WeekReport,
+    WeekReportBundle,
+    build_task_sessions,
+    report_goals,
+)
 
-SCHEMA_VERSION = "1.0"
+SCHEMA_VERSION = "1.3"
 
 
 def _task_to_dict(task: Task) -> dict:
@@ -17,6 +30,7 @@ def _task_to_dict(task: Task) -> dict:
         "priority": task.priority,
         "reason_tags": list(task.reason_tags),
         "note": task.note,
+        "origin_task_id": task.origin_task_id,
     }
 
 
@@ -31,8 +45,21 @@ def _session_to_dict(session: TaskSession) -> dict:
     }
 
 
-def build_snapshot(bundle: WeekReportBundle, *, pdf_path: str, json_path: str) -> dict:
+def build_snapshot(
+    bundle: WeekReportBundle,
+    *,
+    pdf_path: str | None,
+    json_path: str,
+    report_path: str | None = None,
+    defined_goal_ids: Collection[str] = (),
+) -> dict:
+    # 目標はIDで参照する。定義（文面）は前の週までに定義済みでない目標だけを goal_defs に書き、
+    # 毎週同じ文面を持ち回らない。省いた定義は goals.json から引く（resolve_goal_texts）。
     report = bundle.report
+    goals = report_goals(report)
+    goal_refs: dict[str, list[str]] = {scope: [] for scope in GOAL_SCOPES}
+    for goal in goals:
+        goal_refs[goal.scope].append(goal.id)
     tasks_by_day: dict[str, list[Task]] = defaultdict(list)
     for task in bundle.tasks:
         tasks_by_day[task.day_id].append(task)
@@ -43,6 +70,7 @@ def build_snapshot(bundle: WeekReportBundle, *, pdf_path: str, json_path: str) -
             {
                 "id": day.id,
                 "date": day.date.isoformat(),
+                "available_minutes": day.available_minutes,
                 "planned_minutes": day.planned_minutes,
                 "scheduled_minutes": day.scheduled_minutes,
                 "done_count": day.done_count,
@@ -54,15 +82,19 @@ def build_snapshot(bundle: WeekReportBundle, *, pdf_path: str, json_path: str) -
     snapshot = {
         "schema_version": SCHEMA_VERSION,
         "week_id": report.week_id,
+        "week_report_id": report.id,
+        "status": report.status,
+        "prev_week_report_id": report.prev_week_report_id,
         "cycle": {
             "start": report.cycle_start.isoformat(),
             "end": report.cycle_end.isoformat(),
         },
         "review_at": report.review_at.isoformat(),
-        "goals": {
-            "week": list(report.goals_week),
-            "month": list(report.goals_month),
-            "long": list(report.goals_long),
+        "goals": goal_refs,
+        "goal_defs": {
+            goal.id: {"scope": goal.scope, "text": goal.text}
+            for goal in goals
+            if goal.id not in defined_goal_ids
         },
         "review": {
             "good": list(report.good_points),
@@ -82,6 +114,100 @@ def build_snapshot(bundle: WeekReportBundle, *, pdf_path: str, json_path: str) -
         "exports": {
             "pdf_path": pdf_path,
             "json_path": json_path,
+            "report_path": report_path,
         },
     }
     return snapshot
+
+
+def _task_from_dict(raw: dict, week_report_id: str) -> Task:
+    return Task(
+        id=str(raw.get("id", "")),
+        week_report_id=week_report_id,
+        day_id=str(raw.get("day_id", "")),
+        title=str(raw.get("title", "")),
+        estimated_minutes=int(raw.get("estimated_minutes", 0)),
+        priority=raw.get("priority"),
+        status=str(raw.get("status", "todo")),
+        reason_tags=tuple(raw.get("reason_tags", []) or ()),
+        note=raw.get("note"),
+        origin_task_id=raw.get("origin_task_id"),
+    )
+
+
+def resolve_goal_texts(
+    snapshot: dict, goals: Mapping[str, Goal] | None = None
+) -> dict[str, list[str]]:
+    # goal_defs に無いID（前の週までに定義済みの目標）は goals.json の定義から引く。
+    definitions = snapshot.get("goal_defs", {})
+    resolved: dict[str, list[str]] = {}
+    for scope in GOAL_SCOPES:
+        texts = []
+        for ref in snapshot.get("goals", {}).get(scope, []):
+            if ref in definitions:
+                texts.append(definitions[ref]["text"])
+            elif goals is not None and ref in goals:
+                texts.append(goals[ref].text)
+            else:
+                raise ValueError(f"Unknown goal id: {ref}")
+        resolved[scope] = texts
+    return resolved
+
+
+def snapshot_to_bundle(
+    snapshot: dict, goals: Mapping[str, Goal] | None = None
+) -> WeekReportBundle:
+    # 現行スキーマのスナップショットからバンドルを復元する。古い版は migrations.upgrade_snapshot を先に通す。
+    if snapshot.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported snapshot schema: {snapshot.get('schema_version')}")
+    report_id = str(snapshot.get("week_report_id", ""))
+    prev_id = snapshot.get("prev_week_report_id")
+    goal_texts = resolve_goal_texts(snapshot, goals)
+    review = snapshot.get("review", {})
+    report = WeekReport(
+        id=report_id,
+        week_id=str(snapshot.get("week_id", "")),
+        cycle_start=date.fromisoformat(snapshot["cycle"]["start"]),
+        cycle_end=date.fromisoformat(snapshot["cycle"]["end"]),
+        review_at=datetime.fromisoformat(snapshot["review_at"]),
+        status=str(snapshot.get("status", "final")),
+        prev_week_report_id=prev_id,
+        goals_week=tuple(goal_texts["week"]),
+        goals_month=tuple(goal_texts["month"]),
+        goals_long=tuple(goal_texts["long"]),
+        good_points=tuple(review.get("good", [])),
+        issues=tuple(
+            Issue(
+                problem=issue["problem"],
+                root_cause=issue["root_cause"],
+                improvement=issue["improvement"],
+                tags=tuple(issue.get("tags", [])),
+            )
+            for issue in review.get("issues", [])
+        ),
+    )
+    days: list[Day] = []
+    tasks: list[Task] = []
+    for raw_day in snapshot.get("next_week_days", []):
+        days.append(
+            Day(
+                id=raw_day["id"],
+                week_report_id=report_id,
+                date=date.fromisoformat(raw_day["date"]),
+                available_minutes=raw_day.get("available_minutes"),
+                planned_minutes=raw_day.get("planned_minutes"),
+                scheduled_minutes=raw_day.get("scheduled_minutes"),
+                done_count=raw_day.get("done_count"),
+                total_count=raw_day.get("total_count"),
+            )
+        )
+        tasks.extend(_task_from_dict(raw, report_id) for raw in raw_day.get("tasks", []))
+    return WeekReportBundle(
+        report=report,
+        days=tuple(days),
+        tasks=tuple(tasks),
+        task_sessions=build_task_sessions(snapshot.get("task_sessions", [])),
+        last_week_tasks=tuple(
+            _task_from_dict(raw, prev_id or "") for raw in snapshot.get("last_week_tasks", [])
+        ),
+    )
@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import deque
+from dataclasses import replace
+from typing import Any, Literal, Protocol
+
+from pydantic import BaseModel, Field
+
+from weekly_reports.drafts import DraftNotFound, DraftStore
+from weekly_reports.metrics import recompute_days, update_day_metrics
+from weekly_reports.models import Day, WeekReportBundle
+from weekly_reports.schemas import BundleSchema
+
+# 下書き（WeekReport.id）ごとのWebSocketチャネル。
+# クライアントは {"type": "event", "op_id", "base_seq", "event": {"type", "data"}} を送り、
+# サーバは drafts のイベントログに seq を振って追記し、全員に差分（patch）を配る。
+# base_seq より後に同じ項目（タスクのフィールド等）が変わっていたら、その項目の変更は
+# 先に確定した方を優先して捨て、送り主にだけ conflict を返す。
+# 追記から配信までをチャネルのロック内で行うので、patch は必ず seq 順に届く。
+RECENT_EVENTS = 1_000
+SEND_TIMEOUT_SECONDS = 5.0
+_ANY = "*"
+
+
+class Connection(Protocol):
+    async def send_text(self, data: str) -> None: ...
+
+    async def close(self, code: int = 1000, reason: str | None = None) -> None: ...
+
+
+class SyncEvent(BaseModel):
+    type: str
+    data: dict[str, Any] = Field(default_factory=dict)
+
+
+class SyncMessage(BaseModel):
+    type: Literal["event", "resync"]
+    op_id: str | int | None = None
+    client_id: str | None = None
+    # 省略時は最新版に対する変更として扱う（REST からの追記もこれ）。
+    base_seq: int | None = Field(default=None, ge=0)
+    event: SyncEvent | None = None
+
+
+def _mapping(value: Any) -> dict[str, Any]:
+    return value if isinstance(value, dict) else {}
+
+
+def touched_fields(event_type: str, data: dict[str, Any]) -> set[tuple[str, str, str]]:
+    # (種別, ID, フィールド) の集合。フィールドが "*" なら対象全体に触れる。
+    fields = [str(name) for name in _mapping(data.get("fields"))]
+    if event_type == "task_added":
+        return {("task", str(_mapping(data.get("task")).get("id")), _ANY)}
+    if event_type == "task_updated":
+        return {("task", str(data.get("task_id")), name) for name in fields}
+    if event_type == "task_status_changed":
+        return {("task", str(data.get("task_id")), "status")}
+    if event_type == "task_removed":
+        return {("task", str(data.get("task_id")), _ANY)}
+    if event_type == "session_logged":
+        return {("session", str(_mapping(data.get("session")).get("id")), _ANY)}
+    if event_type == "session_removed":
+        return {("session", str(data.get("session_id")), _ANY)}
+    if event_type == "report_updated":
+        return {("report", "", name) for name in fields}
+    return set()
+
+
+def _overlaps(left: set[tuple[str, str, str]], right: set[tuple[str, str, str]]) -> set:
+    conflicts = set()
+    for kind, entity_id, name in left:
+        for other_kind, other_id, other_name in right:
+            if kind == other_kind and entity_id == other_id and _ANY in (name, other_name):
+                conflicts.add((kind, entity_id, name))
+            elif (kind, entity_id, name) == (other_kind, other_id, other_name):
+                conflicts.add((kind, entity_id, name))
+    return conflicts
+
+
+def affected_day_ids(
+    before: WeekReportBundle, after: WeekReportBundle, event_type: str, data: dict[str, Any]
+) -> set[str]:
+    if event_type.startswith("task_"):
+        task_id = data.get("task", {}).get("id") if event_type == "task_added" else data.get(
+            "task_id"
+        )
+        return {
+            task.day_id
+            for bundle in (before, after)
+            for task in bundle.tasks
+            if task.id == task_id
+        }
+    if event_type == "session_logged":
+        task_id = data.get("session", {}).get("task_id")
+        return {task.day_id for task in after.tasks if task.id == task_id}
+    if event_type == "session_removed":
+        task_ids = {
+            session.task_id
+            for session in before.task_sessions
+            if session.id == data.get("session_id")
+        }
+        return {task.day_id for task in before.tasks if task.id in task_ids}
+    return set()
+
+
+def _day_metrics(day: Day) -> dict[str, Any]:
+    return {
+        "id": day.id,
+        "planned_minutes": day.planned_minutes,
+        "scheduled_minutes": day.scheduled_minutes,
+        "done_count": day.done_count,
+        "total_count": day.total_count,
+    }
+
+
+def _encode(message: dict[str, Any]) -> str:
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+
+
+class DraftChannel:
+    def __init__(self, draft_id: str, store: DraftStore) -> None:
+        self.draft_id = draft_id
+        self.store = store
+        self.connections: set[Connection] = set()
+        self.lock = asyncio.Lock()
+        # 競合判定用に直近のイベントの (seq, 送り主, 触れた項目) だけを覚えておく。
+        self.recent: deque[tuple[int, str | None, set[tuple[str, str, str]]]] = deque(
+            maxlen=RECENT_EVENTS
+        )
+        # チャネルが最後に取り込んだ seq と、その時点の日ごとの集計。
+        self.seq = 0
+        self.days: dict[str, Day] | None = None
+
+    async def _drop(self, connection: Connection) -> None:
+        # 送れない・詰まった接続は外して閉じ、再接続（hello）からやり直させる。
+        self.connections.discard(connection)
+        try:
+            await asyncio.wait_for(connection.close(code=1011), SEND_TIMEOUT_SECONDS)
+        except Exception:
+            pass
+
+    async def _deliver(self, connection: Connection, text: str) -> None:
+        try:
+            await asyncio.wait_for(connection.send_text(text), SEND_TIMEOUT_SECONDS)
+        except Exception:
+            await self._drop(connection)
+
+    async def _broadcast(
+        self, message: dict[str, Any], exclude: Connection | None = None
+    ) -> None:
+        # JSON化は1回だけ。全接続へ並行して送り、期限内に送れなかった接続は外す。
+        text = _encode(message)
+        sends = {
+            asyncio.ensure_future(connection.send_text(text)): connection
+            for connection in list(self.connections)
+            if connection is not exclude
+        }
+        if not sends:
+            return
+        done, pending = await asyncio.wait(sends, timeout=SEND_TIMEOUT_SECONDS)
+        for task in pending:
+            task.cancel()
+        failed = [task for task in done if task.exception() is not None] + list(pending)
+        for task in failed:
+            await self._drop(sends[task])
+
+    async def _catch_up(
+        self, exclude: Connection | None = None
+    ) -> tuple[int, WeekReportBundle]:
+        # チャネルを通らずに追記されたイベント（CLI等）があれば取り込んで配る。
+        # 読み込みはファイルロックを待つことがあるので、イベントループを止めないよう別スレッドで行う。
+        seq, bundle = await asyncio.to_thread(self.store.load, self.draft_id)
+        if self.days is not None and seq == self.seq:
+            return seq, bundle
+        days = {
+            day.id: day
+            for day in update_day_metrics(bundle.days, bundle.tasks, bundle.task_sessions)
+        }
+        if self.days is None:
+            self.seq, self.days = seq, days
+            return seq, bundle
+        events = await asyncio.to_thread(
+            lambda: [
+                event
+                for event in self.store.history(self.draft_id, self.seq)
+                if event.seq <= seq
+            ]
+        )
+        changed = [day for day_id, day in days.items() if self.days.get(day_id) != day]
+        self.seq, self.days = seq, days
+        for index, event in enumerate(events):
+            self.recent.append((event.seq, None, touched_fields(event.type, event.data)))
+            last = index == len(events) - 1
+            await self._broadcast(
+                {
+                    "type": "patch",
+                    "op_id": None,
+                    "origin": None,
+                    "seq": event.seq,
+                    "at": event.at,
+                    "event": {"type": event.type, "data": event.data},
+                    "days": [_day_metrics(day) for day in changed] if last else [],
+                },
+                exclude,
+            )
+        return seq, bundle
+
+    def _with_metrics(self, bundle: WeekReportBundle) -> WeekReportBundle:
+        days = self.days or {}
+        return replace(bundle, days=tuple(days.get(day.id, day) for day in bundle.days))
+
+    async def hello(self, connection: Connection) -> None:
+        # 取り込みと hello の送信をロック内で行い、hello より古い patch が後から届かないようにする。
+        async with self.lock:
+            seq, bundle = await self._catch_up(exclude=connection)
+            await self._deliver(
+                connection,
+                _encode(
+                    {
+                        "type": "hello",
+                        "draft_id": self.draft_id,
+                        "seq": seq,
+                        "bundle": BundleSchema.from_bundle(
+                            self._with_metrics(bundle)
+                        ).model_dump(mode="json"),
+                    }
+                ),
+            )
+
+    async def reply(self, connection: Connection, message: dict[str, Any]) -> None:
+        async with self.lock:
+            await self._deliver(connection, _encode(message))
+
+    def _resolve(
+        self,
+        base_seq: int,
+        seq: int,
+        client_id: str | None,
+        event_type: str,
+        data: dict[str, Any],
+    ) -> tuple[dict[str, Any] | None, list[list[str]], bool]:
+        # (適用するデータ, 捨てた項目, 再同期が必要か) を返す。
+        if base_seq >= seq:
+            return data, [], False
+        if not self.recent or self.recent[0][0] > base_seq + 1:
+            # 覚えている範囲より古い版からの変更は判定できないので、全体を取り直させる。
+            return None, [], True
+        touched = touched_fields(event_type, data)
+        newer: set[tuple[str, str, str]] = set()
+        for event_seq, origin, fields in self.recent:
+            # 自分が続けて送った変更は、確認を待たずに送っても競合扱いしない。
+            if event_seq > base_seq and (client_id is None or origin != client_id):
+                newer |= fields
+        conflicts = _overlaps(touched, newer)
+        if not conflicts:
+            return data, [], False
+        dropped = [list(item) for item in sorted(conflicts)]
+        if event_type in ("task_updated", "report_updated"):
+            names = {name for _, _, name in conflicts}
+            fields = {
+                name: value
+                for name, value in _mapping(data.get("fields")).items()
+                if name not in names
+            }
+            if fields:
+                return {**data, "fields": fields}, dropped, False
+        return None, dropped, False
+
+    async def submit(
+        self, message: SyncMessage, sender: Connection | None = None
+    ) -> tuple[dict[str, Any], bool]:
+        # (結果, 全員に配ったか) を返す。競合・エラーは送り主にだけ返す。
+        op_id = message.op_id
+        client_id = message.client_id
+        async with self.lock:
+            seq, before = await self._catch_up()
+            reply: dict[str, Any]
+            if message.event is None:
+                reply = {"type": "error", "op_id": op_id, "seq": seq, "detail": "event is required"}
+                if sender is not None:
+                    await self._deliver(sender, _encode(reply))
+                return reply, False
+            event_type, data = message.event.type, message.event.data
+            base_seq = seq if message.base_seq is None else message.base_seq
+            resolved, dropped, resync = self._resolve(
+                base_seq, seq, client_id, event_type, data
+            )
+            if resolved is None:
+                reply = {
+                    "type": "conflict",
+                    "op_id": op_id,
+                    "seq": seq,
+                    "fields": dropped,
+                    "resync": resync,
+                }
+            else:
+                try:
+                    appended, after = await asyncio.to_thread(
+                        self.store.append_and_load, self.draft_id, event_type, resolved
+                    )
+                except ValueError as exc:
+                    reply = {"type": "error", "op_id": op_id, "seq": seq, "detail": str(exc)}
+                else:
+                    self.seq = appended.seq
+                    self.recent.append(
+                        (appended.seq, client_id, touched_fields(event_type, resolved))
+                    )
+                    changed = recompute_days(
+                        after, affected_day_ids(before, after, event_type, resolved)
+                    )
+                    for day in changed:
+                        self.days[day.id] = day
+                    patch = {
+                        "type": "patch",
+                        "op_id": op_id,
+                        "origin": client_id,
+                        "seq": appended.seq,
+                        "at": appended.at,
+                        "event": {"type": event_type, "data": resolved},
+                        "days": [_day_metrics(day) for day in changed],
+                    }
+                    if dropped:
+                        patch["dropped"] = dropped
+                    await self._broadcast(patch)
+                    return patch, True
+            if sender is not None:
+                await self._deliver(sender, _encode(reply))
+            return reply, False
+
+
+class SyncHub:
+    # 接続中の下書きだけチャネルを持つ。待機中の接続はソケット以外に資源を持たない。
+    def __init__(self, store: DraftStore) -> None:
+        self.store = store
+        self.channels: dict[str, DraftChannel] = {}
+
+    def join(self, draft_id: str, connection: Connection) -> DraftChannel:
+        if not self.store.exists(draft_id):
+            raise DraftNotFound(draft_id)
+        channel = self.channels.get(draft_id)
+        if channel is None:
+            channel = self.channels[draft_id] = DraftChannel(draft_id, self.store)
+        channel.connections.add(connection)
+        return channel
+
+    def leave(self, channel: DraftChannel, connection: Connection) -> None:
+        channel.connections.discard(connection)
+        if not channel.connections:
+            self.channels.pop(channel.draft_id, None)
+
+    async def append(
+        self, draft_id: str, event_type: str, data: dict[str, Any]
+    ) -> dict[str, Any]:
+        # REST からの追記。接続中の下書きならチャネルを通して配信・集計・競合判定に載せる。
+        channel = self.channels.get(draft_id)
+        if channel is None:
+            event = await asyncio.to_thread(self.store.append, draft_id, event_type, data)
+            return {"seq": event.seq, "at": event.at}
+        reply, applied = await channel.submit(
+            SyncMessage(type="event", event=SyncEvent(type=event_type, data=data))
+        )
+        if not applied:
+            raise ValueError(reply.get("detail", "Event was not applied."))
+        return {"seq": reply["seq"], "at": reply["at"]}
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "channels": len(self.channels),
+            "connections": sum(len(channel.connections) for channel in self.channels.values()),
+        }
@@ -1,9 +1,24 @@
 from __future__ import annotations
 
+import json
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta
+from pathlib import Path
 from uuid import uuid4
 
-from weekly_reports.models import Day, WeekReport, WeekReportBundle
+from weekly_reports.carryover import CarryOverIndex, carry_over_tasks
+from weekly_reports.goals import GoalStore
+from weekly_reports.metrics import update_day_metrics
+from weekly_reports.models import Day, WeekReport, WeekReportBundle, report_goals
+from weekly_reports.profiling import NullProfiler, StageProfiler
+from weekly_reports.render import (
+    REPORT_FORMATS,
+    REPORT_SUFFIXES,
+    check_session_mode,
+    write_report,
+)
+from weekly_reports.rollups import build_rollup, upsert_rollup
+from weekly_reports.snapshot import build_snapshot
 
 
 def week_id_from_date(start_date) -> str:
@@ -11,7 +26,12 @@ def week_id_from_date(start_date) -> str:
     return f"{iso_year}-W{iso_week:02d}"
 
 
-def init_week_report(review_at: datetime, prev_bundle: WeekReportBundle | None) -> WeekReportBundle:
+def init_week_report(
+    review_at: datetime,
+    prev_bundle: WeekReportBundle | None,
+    *,
+    carry_over: bool = True,
+) -> WeekReportBundle:
     # レビューは金曜18:00想定で、次のサイクル開始は土曜日。
     cycle_start = review_at.date() + timedelta(days=1)
     cycle_end = cycle_start + timedelta(days=6)
@@ -50,4 +70,91 @@ def init_week_report(review_at: datetime, prev_bundle: WeekReportBundle | None)
                 total_count=0,
             )
         )
-    return WeekReportBundle(report=report, days=tuple(days))
+    if prev_bundle is None or not carry_over:
+        return WeekReportBundle(report=report, days=tuple(days))
+    tasks, last_week_tasks = carry_over_tasks(prev_bundle, report_id, tuple(days), now)
+    return WeekReportBundle(
+        report=report, days=tuple(days), tasks=tasks, last_week_tasks=last_week_tasks
+    )
+
+
+@dataclass(frozen=True)
+class FinalizeResult:
+    bundle: WeekReportBundle
+    snapshot: dict
+    json_path: Path
+    pdf_path: Path | None = None
+    report_path: Path | None = None
+
+
+def finalize_week_report(
+    bundle: WeekReportBundle,
+    output_dir: Path,
+    *,
+    generate_pdf: bool = True,
+    session_mode: str = "full",
+    report_format: str = "pdf",
+    profiler: StageProfiler | NullProfiler | None = None,
+) -> FinalizeResult:
+    if report_format not in REPORT_FORMATS:
+        raise ValueError(f"Invalid report format: {report_format}")
+    check_session_mode(session_mode)
+    profiler = profiler or NullProfiler()
+    with profiler.stage("update_day_metrics"):
+        updated_days = update_day_metrics(bundle.days, bundle.tasks, bundle.task_sessions)
+    report = replace(bundle.report, status="final", updated_at=datetime.now())
+    updated_bundle = WeekReportBundle(
+        report=report,
+        days=updated_days,
+        tasks=bundle.tasks,
+        task_sessions=bundle.task_sessions,
+        last_week_tasks=bundle.last_week_tasks,
+    )
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    json_path = output_dir / f"{report.week_id}_snapshot.json"
+
+    # generate_pdf が止めるのはPDFだけ。HTML/Markdown は report_format に従って常に書く。
+    report_path: Path | None = None
+    if generate_pdf and report_format == "pdf":
+        # PDF生成が必要な時だけ reportlab を読み込み、テスト時の依存を軽くする。
+        from weekly_reports.pdf import generate_pdf as render_pdf
+
+        pdf_file = output_dir / f"{report.week_id}{REPORT_SUFFIXES['pdf']}"
+        with profiler.stage("generate_pdf"):
+            report_path = render_pdf(updated_bundle, str(pdf_file), session_mode=session_mode)
+    elif report_format != "pdf":
+        report_path = output_dir / f"{report.week_id}{REPORT_SUFFIXES[report_format]}"
+        with profiler.stage(f"render_{report_format}"):
+            write_report(updated_bundle, str(report_path), report_format, session_mode=session_mode)
+    # 実際に書いたファイルだけを記録する（PDFを作っていなければ pdf_path は null）。
+    pdf_path = report_path if report_format == "pdf" else None
+    goal_store = GoalStore(output_dir)
+    goals = report_goals(report)
+    with profiler.stage("build_snapshot"):
+        snapshot = build_snapshot(
+            updated_bundle,
+            pdf_path=str(pdf_path) if pdf_path else None,
+            json_path=str(json_path),
+            report_path=str(report_path) if report_path else None,
+            defined_goal_ids=goal_store.defined_before(report.week_id),
+        )
+    with profiler.stage("write_snapshot"):
+        json_path.write_text(
+            json.dumps(snapshot, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+    with profiler.stage("write_rollup"):
+        # 月次・四半期のまとめ用に、週の集計値だけを別に書いておく。
+        rollup = build_rollup(snapshot, {goal.id: goal for goal in goals})
+        upsert_rollup(output_dir, rollup)
+    with profiler.stage("update_goals"):
+        goal_store.record_week(report.week_id, goals, rollup)
+    with profiler.stage("update_carryover"):
+        CarryOverIndex(output_dir).record(report.week_id, updated_bundle.tasks)
+    return FinalizeResult(
+        bundle=updated_bundle,
+        snapshot=snapshot,
+        json_path=json_path,
+        pdf_path=pdf_path,
+        report_path=report_path,
+    )